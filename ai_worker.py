@@ -0,0 +1,109 @@
+import queue
+import threading
+from boardstate import *
+from gomoku import Gomoku
+from gomoku_ai import gomokuAI
+
+
+class AIWorker(object):
+    '''
+    Runs a gomokuAI on a background thread so the game loop keeps
+    drawing while it thinks. The AI searches its own copy of the
+    board; the move it picks is handed back through a queue as
+    (i, j, state), (None, None, state) when it adds no stone, and is
+    played on the real board by the caller. An error raised by the
+    search is handed back the same way and raised by poll_move.
+    '''
+
+    def __init__(
+        self,
+        gomoku,
+        currentState,
+        depth,
+        **options
+        ):
+        self.__gomoku = gomoku
+        self.__currentState = currentState
+
+        # the board the AI searches on, kept in step with the real one
+        # before every request
+
+        self.__board = Gomoku(gomoku.get_size())
+        self.__ai = gomokuAI(self.__board, currentState, depth,
+                             **options)
+
+        self.__requests = queue.Queue()
+        self.__results = queue.Queue()
+        self.__thinking = False
+
+        self.__thread = threading.Thread(target=self.__run, daemon=True)
+        self.__thread.start()
+
+    def get_ai(self):
+        return self.__ai
+
+    def is_thinking(self):
+        return self.__thinking
+
+    def request_move(self, first=False):
+        '''
+        Ask for a move on the current position of the real board.
+        first plays the opening move instead of searching.
+        '''
+        if self.__thinking:
+            return False
+        self.__thinking = True
+        self.__requests.put((bytes(self.__gomoku.get_board()), first))
+        return True
+
+    def poll_move(self):
+        '''
+        Return the (i, j, state) picked by the AI, (None, None, state)
+        when it played no stone, or None while it is still thinking.
+        The move is not played on the real board. Raises the error the
+        search failed with, if it failed.
+        '''
+        try:
+            move = self.__results.get_nowait()
+        except queue.Empty:
+            return None
+        self.__thinking = False
+        if isinstance(move, Exception):
+            raise move
+        return move
+
+    def close(self):
+        self.__requests.put(None)
+        self.__thread.join()
+        self.__ai.close()
+
+    def __run(self):
+        while True:
+            request = self.__requests.get()
+            if request is None:
+                return
+            (cells, first) = request
+
+            board = self.__board.get_board()
+            size = self.__board.get_size()
+            for k in range(size * size):
+                if board[k] != cells[k]:
+                    self.__board.set_chessboard_state(k // size, k
+                            % size, STATES[cells[k]])
+
+            try:
+                if first:
+                    self.__ai.first_step()
+                else:
+                    self.__ai.one_step()
+            except Exception as error:
+                self.__results.put(error)
+                continue
+
+            # the AI played on its own board, find the stone it added
+
+            move = (None, None, self.__currentState)
+            for k in range(size * size):
+                if board[k] != cells[k]:
+                    move = (k // size, k % size, self.__currentState)
+            self.__results.put(move)
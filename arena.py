@@ -0,0 +1,268 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import argparse
+import csv
+import json
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from boardstate import *
+from gomoku import Gomoku
+from sparse import SparseGomoku
+from gomoku_ai import gomokuAI
+from explanation import QUIET
+
+# settings an engine of the arena may have, with their defaults
+
+ENGINE_DEFAULTS = {
+    'name': None,
+    'depth': 1,
+    'time_budget': None,
+    'scores': None,
+    'vectorized': False,
+    'tt_size': 1 << 16,
+    'threat_budget': 50,
+    'book': None,
+    }
+
+# columns of a CSV result file, a JSONL file has the same keys
+
+FIELDS = ['game', 'seed', 'size', 'sparse', 'black', 'white', 'winner',
+          'result', 'moves', 'black_seconds', 'white_seconds', 'opening',
+          'move_list']
+
+
+def engine_settings(engine, name):
+    '''
+    Return engine (a dict of ENGINE_DEFAULTS keys) with the defaults
+    filled in, name when it has none.
+    '''
+    unknown = set(engine) - set(ENGINE_DEFAULTS)
+    if unknown:
+        raise ValueError('unknown engine settings: %s'
+                         % ', '.join(sorted(unknown)))
+    settings = dict(ENGINE_DEFAULTS)
+    settings.update(engine)
+    if settings['name'] is None:
+        settings['name'] = name
+    return settings
+
+def random_opening(
+    rng,
+    stones,
+    size=N,
+    spread=3,
+    ):
+    '''
+    Return stones distinct (i, j) around the centre of a size * size
+    board, (0, 0) on an unbounded one (size None), black's first,
+    drawn from rng.
+    '''
+    centre = 0 if size is None else size // 2
+    opening = []
+    while len(opening) < stones:
+        move = (rng.randint(centre - spread, centre + spread),
+                rng.randint(centre - spread, centre + spread))
+        if move not in opening:
+            opening.append(move)
+    return opening
+
+def play_game(task):
+    '''
+    Play one headless game. task is (game number, seed, board size,
+    sparse, black engine, white engine, opening stones, move limit),
+    sparse playing on a SparseGomoku. Returns the result as a dict of
+    FIELDS.
+    '''
+    (game, seed, size, sparse, black, white, stones, maxMoves) = task
+    if sparse:
+        gomoku = SparseGomoku(size)
+    else:
+        gomoku = Gomoku(size)
+    if size is not None:
+        maxMoves = min(maxMoves, size * size)
+    opening = random_opening(random.Random(seed), stones, size)
+    state = BoardState.BLACK
+    for (i, j) in opening:
+        gomoku.set_chessboard_state(i, j, state)
+        state = BoardState.WHITE if state == BoardState.BLACK \
+            else BoardState.BLACK
+
+    ais = {}
+    for (color, engine) in ((BoardState.BLACK, black),
+                            (BoardState.WHITE, white)):
+        ais[color] = gomokuAI(gomoku, color, engine['depth'],
+                              vectorized=engine['vectorized'],
+                              tt_size=engine['tt_size'],
+                              time_budget=engine['time_budget'],
+                              threat_budget=engine['threat_budget'],
+                              scores=engine['scores'],
+                              book=engine['book'],
+                              verbosity=QUIET)
+    seconds = {BoardState.BLACK: 0.0, BoardState.WHITE: 0.0}
+
+    moves = list(opening)
+    winner = BoardState.EMPTY
+    try:
+        while len(moves) < maxMoves:
+            start = time.time()
+            if not moves:
+                played = ais[state].first_step()
+            else:
+                played = ais[state].one_step()
+            seconds[state] += time.time() - start
+            if not played:
+                break
+            moves.append(gomoku.get_last_move())
+            if gomoku.get_chess_result() != BoardState.EMPTY:
+                winner = state
+                break
+            state = BoardState.WHITE if state == BoardState.BLACK \
+                else BoardState.BLACK
+    finally:
+        for ai in ais.values():
+            ai.close()
+
+    if winner == BoardState.BLACK:
+        (result, winnerName) = ('black', black['name'])
+    elif winner == BoardState.WHITE:
+        (result, winnerName) = ('white', white['name'])
+    else:
+        (result, winnerName) = ('draw', None)
+    return {
+        'game': game,
+        'seed': seed,
+        'size': size,
+        'sparse': sparse,
+        'black': black['name'],
+        'white': white['name'],
+        'winner': winnerName,
+        'result': result,
+        'moves': len(moves),
+        'black_seconds': round(seconds[BoardState.BLACK], 3),
+        'white_seconds': round(seconds[BoardState.WHITE], 3),
+        'opening': len(opening),
+        'move_list': moves,
+        }
+
+
+class ResultWriter(object):
+    '''
+    Streams game results to path, as CSV when it ends in .csv and
+    as one JSON object per line otherwise; each result is flushed as
+    soon as it is written.
+    '''
+
+    def __init__(self, path):
+        self.__file = open(path, 'w', newline='')
+        if path.endswith('.csv'):
+            self.__csv = csv.DictWriter(self.__file, FIELDS)
+            self.__csv.writeheader()
+        else:
+            self.__csv = None
+
+    def write(self, result):
+        if self.__csv is not None:
+            row = dict(result)
+            row['move_list'] = ' '.join('%d,%d' % move for move in
+                                        result['move_list'])
+            self.__csv.writerow(row)
+        else:
+            row = dict(result)
+            row['move_list'] = [list(move) for move in result['move_list']]
+            self.__file.write(json.dumps(row) + '\n')
+        self.__file.flush()
+
+    def close(self):
+        self.__file.close()
+
+
+def run_arena(
+    engine_a,
+    engine_b,
+    games,
+    output,
+    workers=None,
+    seed=0,
+    opening=2,
+    max_moves=None,
+    size=N,
+    sparse=False,
+    ):
+    '''
+    Play games between engine_a and engine_b on workers processes
+    (all cores by default) and stream the results to output. Games
+    come in pairs on the same opening, each engine playing black once;
+    pair p opens with opening random stones drawn from seed + p.
+    Games are played on a size * size board, a SparseGomoku when
+    sparse is true or size is None (unbounded), and drawn after
+    max_moves stones: a full board by default, N * N stones on an
+    unbounded one. Returns {engine name or 'draw': games}.
+    '''
+    if size is None:
+        sparse = True
+    if max_moves is None:
+        max_moves = N * N if size is None else size * size
+    engine_a = engine_settings(engine_a, 'A')
+    engine_b = engine_settings(engine_b, 'B')
+    if engine_a['name'] == engine_b['name']:
+        raise ValueError('the engines need different names')
+
+    tasks = []
+    for game in range(games):
+        if game % 2 == 0:
+            (black, white) = (engine_a, engine_b)
+        else:
+            (black, white) = (engine_b, engine_a)
+        tasks.append((game, seed + game // 2, size, sparse, black,
+                      white, opening, max_moves))
+
+    tally = {engine_a['name']: 0, engine_b['name']: 0, 'draw': 0}
+    writer = ResultWriter(output)
+    try:
+        with ProcessPoolExecutor(workers) as pool:
+            for future in as_completed([pool.submit(play_game, task)
+                                        for task in tasks]):
+                result = future.result()
+                writer.write(result)
+                tally[result['winner'] or 'draw'] += 1
+    finally:
+        writer.close()
+    return tally
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Play gomokuAI engines '
+            'against each other without a display.')
+    parser.add_argument('--a', default='{}', help='engine A settings as '
+                        'JSON, e.g. \'{"depth": 2, "scores": "dong"}\'')
+    parser.add_argument('--b', default='{}', help='engine B settings as '
+                        'JSON')
+    parser.add_argument('--games', type=int, default=10)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--opening', type=int, default=2,
+                        help='random stones each game opens with')
+    parser.add_argument('--max-moves', type=int, default=None,
+                        help='stones on the board that end a game '
+                        'as a draw, a full board by default')
+    parser.add_argument('--size', type=int, default=N,
+                        help='board size, 0 for an unbounded board')
+    parser.add_argument('--sparse', action='store_true',
+                        help='play on a sparse board')
+    parser.add_argument('--output', default='arena.jsonl',
+                        help='.csv for CSV, otherwise JSON lines')
+    args = parser.parse_args(argv)
+
+    start = time.time()
+    tally = run_arena(json.loads(args.a), json.loads(args.b), args.games,
+                      args.output, args.workers, args.seed,
+                      args.opening, args.max_moves, args.size or None,
+                      args.sparse)
+    elapsed = time.time() - start
+    print(' '.join('%s %d' % item for item in sorted(tally.items())))
+    print('%d games in %.1f s, %.0f games an hour' % (args.games, elapsed,
+          args.games * 3600 / max(elapsed, 1e-9)))
+
+if __name__ == '__main__':
+    main()
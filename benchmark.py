@@ -0,0 +1,235 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from boardstate import *
+from gomoku import Gomoku
+from sparse import SparseGomoku
+from gomoku_ai import gomokuAI
+from explanation import QUIET
+
+# fixed positions as (kind, moves), the moves played alternately from
+# black; the side to move is the one after the last move. The moves
+# are given on a N * N board and moved to the centre of other sizes.
+
+CORPUS = {
+    'centre': ('opening', [(7, 7)]),
+    'diagonal': ('opening', [(7, 7), (8, 8), (6, 8)]),
+    'knight': ('opening', [(7, 7), (6, 8), (8, 9), (7, 9)]),
+    'middle_12': ('middle', [(9, 7), (9, 6), (6, 5), (4, 4), (6, 10),
+                  (8, 6), (7, 9), (10, 6), (7, 6), (11, 6)]),
+    'middle_16': ('middle', [(7, 10), (8, 10), (10, 7), (7, 8), (10, 8),
+                  (5, 5), (10, 6), (10, 9), (10, 4), (10, 5), (8, 6),
+                  (9, 6), (9, 7), (8, 7)]),
+    'middle_18': ('middle', [(5, 8), (8, 5), (6, 8), (7, 9), (8, 4),
+                  (10, 7), (4, 8), (7, 8), (3, 8), (2, 8), (5, 6), (9, 6),
+                  (7, 4), (7, 10), (7, 7), (8, 7)]),
+    'open_three': ('tactical', [(7, 5), (8, 6), (7, 6), (6, 6), (7, 7)]),
+    'block_four': ('tactical', [(7, 4), (7, 3), (7, 5), (8, 5), (7, 6),
+                   (6, 6), (7, 7)]),
+    'four_three': ('tactical', [(7, 7), (6, 6), (7, 8), (7, 6), (7, 9),
+                   (10, 10), (8, 6), (3, 3), (9, 6), (2, 2)]),
+    }
+
+
+def position(
+    moves,
+    size=N,
+    sparse=False,
+    ):
+    '''
+    Return (gomoku, state to move) after moves, on a size * size
+    board, a SparseGomoku when sparse is true or size is None. Raises
+    ValueError when the moves, kept centred, do not fit on the board.
+    '''
+    if sparse or size is None:
+        gomoku = SparseGomoku(size)
+    else:
+        gomoku = Gomoku(size)
+    shift = (0 if size is None else size // 2) - N // 2
+    state = BoardState.BLACK
+    for (i, j) in moves:
+        if not gomoku.is_inside(i + shift, j + shift):
+            raise ValueError('(%d, %d) does not fit on a %d * %d board'
+                             % (i, j, size, size))
+        gomoku.set_chessboard_state(i + shift, j + shift, state)
+        state = BoardState.WHITE if state == BoardState.BLACK \
+            else BoardState.BLACK
+    return gomoku, state
+
+def best_time(function, repeats):
+    '''
+    Fastest of repeats timed calls of function, in seconds.
+    '''
+    best = None
+    for n in range(repeats):
+        start = time.perf_counter()
+        function()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def bench_position(
+    moves,
+    depths,
+    step_depth,
+    repeats,
+    size=N,
+    sparse=False,
+    ):
+    '''
+    Time the parts of the engine on one position. Every search starts
+    from a new AI, so no table or ordering is carried between them.
+    '''
+    (gomoku, state) = position(moves, size, sparse)
+    result = {}
+
+    ai = gomokuAI(gomoku, state, 1, verbosity=QUIET)
+    frontier = ai.generate(state)
+    result['frontier'] = len(frontier)
+    result['evaluate'] = best_time(lambda : ai.evaluate(state), repeats)
+    result['evaluate_point'] = best_time(lambda : [ai.evaluate_point(i,
+            j, state) for (i, j) in frontier], repeats)
+    result['generate'] = best_time(lambda : ai.generate(state), repeats)
+    ai.close()
+
+    # time to each depth and nodes per second
+    result['search'] = {}
+    for depth in depths:
+        ai = gomokuAI(gomoku, state, depth, verbosity=QUIET)
+        start = time.perf_counter()
+        ai.alpha_beta_prune(depth, state)
+        elapsed = time.perf_counter() - start
+        result['search'][str(depth)] = {'seconds': elapsed,
+                'nodes': ai.get_nodes(), 'nodes_per_second':
+                ai.get_nodes() / max(elapsed, 1e-9)}
+        ai.close()
+
+    # one_step end to end on a copy, then again for its peak memory
+    # (tracemalloc slows everything down, so it is not timed)
+    board = gomoku.copy()
+    ai = gomokuAI(board, state, step_depth, verbosity=QUIET)
+    start = time.perf_counter()
+    ai.one_step()
+    result['one_step'] = time.perf_counter() - start
+    ai.close()
+
+    board = gomoku.copy()
+    tracemalloc.start()
+    ai = gomokuAI(board, state, step_depth, verbosity=QUIET)
+    ai.one_step()
+    ai.close()
+    result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return result
+
+def run_benchmark(
+    depths=(1, 2, 3, 4),
+    step_depth=2,
+    repeats=5,
+    names=None,
+    size=N,
+    sparse=False,
+    ):
+    '''
+    Benchmark the corpus positions in names (all by default) on a
+    size * size board, sparse or not, skipping those that do not fit
+    on it. Returns the results with the machine and settings they were
+    taken on.
+    '''
+    if names is None:
+        names = sorted(CORPUS)
+    results = {}
+    for name in names:
+        (kind, moves) = CORPUS[name]
+        try:
+            position(moves, size, sparse)
+        except ValueError as error:
+            print(name, 'skipped:', error, flush=True)
+            continue
+        results[name] = bench_position(moves, depths, step_depth, repeats,
+                                       size, sparse)
+        results[name]['kind'] = kind
+        print(name, '%.3f s' % sum(search['seconds'] for search in
+              results[name]['search'].values()), flush=True)
+    return {
+        'machine': {'python': sys.version.split()[0],
+                    'implementation': platform.python_implementation(),
+                    'platform': platform.platform(),
+                    'processor': platform.processor()},
+        'settings': {'depths': list(depths), 'step_depth': step_depth,
+                     'repeats': repeats, 'size': size, 'sparse': sparse},
+        'results': results,
+        }
+
+def _metrics(result):
+    '''
+    (name, value, higher is better) of every number in a position
+    result.
+    '''
+    metrics = [('evaluate', result['evaluate'], False),
+               ('evaluate_point', result['evaluate_point'], False),
+               ('generate', result['generate'], False)]
+    for (depth, search) in sorted(result['search'].items()):
+        metrics.append(('depth %s' % depth, search['seconds'], False))
+        metrics.append(('depth %s nodes/s' % depth,
+                        search['nodes_per_second'], True))
+    metrics.append(('one_step', result['one_step'], False))
+    metrics.append(('peak bytes', result['peak_bytes'], False))
+    return metrics
+
+def compare(before, after):
+    '''
+    Print every metric of the positions both result files have, with
+    the speedup (or saving) of after over before.
+    '''
+    for name in sorted(set(before['results']) & set(after['results'])):
+        print(name)
+        old = dict((metric, value) for (metric, value, higher) in
+                   _metrics(before['results'][name]))
+        for (metric, value, higher) in _metrics(after['results'][name]):
+            if metric not in old:
+                continue
+            if higher:
+                ratio = value / max(old[metric], 1e-12)
+            else:
+                ratio = old[metric] / max(value, 1e-12)
+            print('  %-20s %14.6g %14.6g %7.2fx' % (metric, old[metric],
+                  value, ratio))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark gomokuAI on '
+            'a fixed set of positions.')
+    parser.add_argument('--output', default='benchmark.json')
+    parser.add_argument('--max-depth', type=int, default=4)
+    parser.add_argument('--step-depth', type=int, default=2,
+                        help='depth of the one_step timing')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--positions', nargs='*', choices=sorted(CORPUS))
+    parser.add_argument('--size', type=int, default=N,
+                        help='board size, 0 for an unbounded board')
+    parser.add_argument('--sparse', action='store_true',
+                        help='benchmark on a sparse board')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='compare two result files instead')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as before, \
+            open(args.compare[1]) as after:
+            compare(json.load(before), json.load(after))
+        return
+    results = run_benchmark(range(1, args.max_depth + 1),
+                            args.step_depth, args.repeats, args.positions,
+                            args.size or None, args.sparse)
+    with open(args.output, 'w') as output:
+        json.dump(results, output, indent=1, sort_keys=True)
+
+if __name__ == '__main__':
+    main()
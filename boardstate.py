@@ -1,10 +1,13 @@
 from enum import Enum
 
-#define a board with size N * N
+#default board size, Gomoku(size) makes a board of any other
 N = 15
 
 class BoardState(Enum):
 	#three possible states for a given intersection
     EMPTY = 0
     BLACK = 1
-    WHITE = 2
\ No newline at end of file
+    WHITE = 2
+
+#decode the byte stored in a board cell back into its BoardState
+STATES = (BoardState.EMPTY, BoardState.BLACK, BoardState.WHITE)
@@ -75,49 +75,189 @@ def enum_to_string(vector):
     return string_list
 
 
-def evaluate_vector(vector): 
+#digit of every cell in a base-3 window code, same as BoardState values
+PATTERN_DIGITS = {'empty': 0, 'black': 1, 'white': 2}
+
+def encode_window(codes):
     '''
-    Return the score for a vector (line or column or diagonal)
+    Return the base-3 code of a window of cell values, first cell
+    as the most significant digit.
     '''
-    
-    string_list = enum_to_string(vector)
-    
-    
-    score = {'white': 0, 'black': 0}
-    length = len(string_list)
+    code = 0
+    for value in codes:
+        code = code * 3 + value
+    return code
+
+def compile_patterns(white_patterns, white_scores, black_patterns,
+                     black_scores):
+    '''
+    Build a lookup table from every window code to
+    (white score, black score, pattern id), pattern id being the
+    index into the pattern lists or -1 when nothing matches.
+    '''
+    length = len(white_patterns[0])
+    table = [(0, 0, -1)] * 3 ** length
+    for i in range(len(white_patterns)):
+        code = encode_window([PATTERN_DIGITS[s] for s in white_patterns[i]])
+        table[code] = (white_scores[i], table[code][1], i)
+    for i in range(len(black_patterns)):
+        code = encode_window([PATTERN_DIGITS[s] for s in black_patterns[i]])
+        table[code] = (table[code][0], black_scores[i], i)
+    return table
+
+PATTERN5_TABLE = compile_patterns(WHITE_5PATTERNS, WHITE_5SCORES,
+                                  BLACK_5PATTERNS, BLACK_5SCORES)
+PATTERN6_TABLE = compile_patterns(WHITE_6PATTERNS, WHITE_6SCORES,
+                                  BLACK_6PATTERNS, BLACK_6SCORES)
+
+# named score sets as (white 5, white 6, black 5, black 6) scores
+
+SCORE_SETS = {
+    'default': (WHITE_5SCORES, WHITE_6SCORES, BLACK_5SCORES,
+                BLACK_6SCORES),
+    'dong': ([50000,720,720,720,720,720],
+             [8640,720,720,720,720,120,120,120,20,20],
+             [50000,720,720,720,720,720],
+             [8640,720,720,720,720,120,120,120,20,20]),
+    }
+
+def pattern_tables(scores=None):
+    '''
+    Return (5 cell table, 6 cell table) for scores, the name of a
+    score set or a (white 5, white 6, black 5, black 6) tuple of score
+    lists. None gives PATTERN5_TABLE and PATTERN6_TABLE.
+    '''
+    if scores is None or scores == 'default':
+        return PATTERN5_TABLE, PATTERN6_TABLE
+    if isinstance(scores, str):
+        if scores not in SCORE_SETS:
+            raise ValueError('unknown score set %r' % scores)
+        scores = SCORE_SETS[scores]
+    (white5, white6, black5, black6) = scores
+    return (compile_patterns(WHITE_5PATTERNS, white5, BLACK_5PATTERNS,
+            black5), compile_patterns(WHITE_6PATTERNS, white6,
+            BLACK_6PATTERNS, black6))
+
+def scan_line(codes, tables=None):
+    '''
+    Roll 5 and 6 cell windows over a line of cell values and yield
+    (start, length, white score, black score, pattern id) for every
+    window that matches a pattern, in the order evaluate_vector
+    scores them. tables are the pattern_tables to score with.
+    '''
+    if tables is None:
+        tables = (PATTERN5_TABLE, PATTERN6_TABLE)
+    (table5, table6) = tables
+    length = len(codes)
 
     if length == 5:
-        for i in range(len(WHITE_5PATTERNS)):
-            if WHITE_5PATTERNS[i] == string_list:
-                score['white'] += WHITE_5SCORES[i]
-            if BLACK_5PATTERNS[i] == string_list:
-                score['black'] += BLACK_5SCORES[i]
-        return score
+        (white, black, pattern) = table5[encode_window(codes)]
+        if pattern >= 0:
+            yield 0, 5, white, black, pattern
+        return
+
+    if length < 6:
+        return
 
+    code = encode_window(codes[:4])
     for i in range(length - 5):
-        temp = [string_list[i], string_list[i + 1], string_list[i + 2],
-                string_list[i + 3], string_list[i + 4]]
-        for i in range(len(WHITE_5PATTERNS)):
-            if WHITE_5PATTERNS[i] == temp:
-                score['white'] += WHITE_5SCORES[i]
-            if BLACK_5PATTERNS[i] == temp:
-                score['black'] += BLACK_5SCORES[i]
+        code = code % 81 * 3 + codes[i + 4]
+        (white, black, pattern) = table5[code]
+        if pattern >= 0:
+            yield i, 5, white, black, pattern
 
+    code = encode_window(codes[:5])
     for i in range(length - 6):
-        temp = [
-            string_list[i],
-            string_list[i + 1],
-            string_list[i + 2],
-            string_list[i + 3],
-            string_list[i + 4],
-            string_list[i + 5],
-            ]
-        for i in range(len(WHITE_6PATTERNS)):
-            if WHITE_6PATTERNS[i] == temp:
-                score['white'] += WHITE_6SCORES[i]
-            if BLACK_6PATTERNS[i] == temp:
-                score['black'] += BLACK_6SCORES[i]
-    return score
+        code = code % 243 * 3 + codes[i + 5]
+        (white, black, pattern) = table6[code]
+        if pattern >= 0:
+            yield i, 6, white, black, pattern
+
+def evaluate_line(codes, tables=None):
+    '''
+    Return (white score, black score) for a line of cell values.
+    '''
+    if tables is None:
+        tables = (PATTERN5_TABLE, PATTERN6_TABLE)
+    length = len(codes)
+
+    if length == 5:
+        entry = tables[0][encode_window(codes)]
+        return entry[0], entry[1]
+
+    white = 0
+    black = 0
+    if length < 6:
+        return white, black
+
+    table = tables[0]
+    code = ((codes[0] * 3 + codes[1]) * 3 + codes[2]) * 3 + codes[3]
+    for i in range(4, length - 1):
+        code = code % 81 * 3 + codes[i]
+        entry = table[code]
+        white += entry[0]
+        black += entry[1]
+
+    table = tables[1]
+    code = (((codes[0] * 3 + codes[1]) * 3 + codes[2]) * 3 + codes[3]) \
+        * 3 + codes[4]
+    for i in range(5, length - 1):
+        code = code % 243 * 3 + codes[i]
+        entry = table[code]
+        white += entry[0]
+        black += entry[1]
+
+    return white, black
+
+def evaluate_line_addLoc(
+    codes,
+    loc_vec,
+    tables=None,
+    matches=None,
+    ):
+    '''
+    Return the scores and pattern matches for a line of cell values,
+    loc_vec holding the (i, j) of every cell. matches are the
+    scan_line results of the line when they are already known.
+    '''
+    score = {'white': 0, 'black': 0}
+    loc_pat_sco = {'white': [], 'black': []}
+
+    if matches is None:
+        matches = scan_line(codes, tables)
+    for (start, length, white, black, pattern) in matches:
+        if length == 5:
+            (white_patterns, black_patterns) = (WHITE_5PATTERNS,
+                    BLACK_5PATTERNS)
+        else:
+            (white_patterns, black_patterns) = (WHITE_6PATTERNS,
+                    BLACK_6PATTERNS)
+
+        # a full line of five keeps its own location list
+
+        if len(codes) == 5:
+            loc_temp = loc_vec
+        else:
+            loc_temp = list(loc_vec[start:start + length])
+
+        if white:
+            score['white'] += white
+            loc_pat_sco['white'].append((loc_temp, white_patterns[pattern],
+                                         white))
+        if black:
+            score['black'] += black
+            loc_pat_sco['black'].append((loc_temp, black_patterns[pattern],
+                                         black))
+
+    return score, loc_pat_sco
+
+def evaluate_vector(vector): 
+    '''
+    Return the score for a vector (line or column or diagonal)
+    '''
+    
+    (white, black) = evaluate_line([item.value for item in vector])
+    return {'white': white, 'black': black}
 
 def evaluate_vector_addLoc(vector_value_locations): #7022
     '''
@@ -126,68 +266,85 @@ def evaluate_vector_addLoc(vector_value_locations): #7022
     vector=vector_value_locations[0]#7022
     loc_vec = vector_value_locations[1]#7022
     
-    string_list = enum_to_string(vector)
-    
-    
-    score = {'white': 0, 'black': 0}
-    
-    loc_pat_sco ={'white': [], 'black': []} #7022
-    
-    length = len(string_list)
+    return evaluate_line_addLoc([item.value for item in vector], loc_vec)
 
-    if length == 5:
-        for i in range(len(WHITE_5PATTERNS)):
-            if WHITE_5PATTERNS[i] == string_list:
-                score['white'] += WHITE_5SCORES[i]
-                loc_pat_sco['white'].append((loc_vec,WHITE_5PATTERNS[i],WHITE_5SCORES[i]))#7022
-                
-                
-            if BLACK_5PATTERNS[i] == string_list:
-                score['black'] += BLACK_5SCORES[i]
-                loc_pat_sco['black'].append((loc_vec,BLACK_5PATTERNS[i],BLACK_5SCORES[i]))#7022
-        
-        return score,loc_pat_sco#####702270227022
 
-    for i in range(length - 5):
-        temp = [string_list[i], string_list[i + 1], string_list[i + 2],
-                string_list[i + 3], string_list[i + 4]]
-        
-        loc_temp=[loc_vec[i], loc_vec[i + 1], loc_vec[i + 2],
-                loc_vec[i + 3], loc_vec[i + 4]]#7022
-        
-        for i in range(len(WHITE_5PATTERNS)):
-            if WHITE_5PATTERNS[i] == temp:
-                score['white'] += WHITE_5SCORES[i]
-                loc_pat_sco['white'].append((loc_temp,WHITE_5PATTERNS[i],WHITE_5SCORES[i]))#7022
-                
-            if BLACK_5PATTERNS[i] == temp:
-                score['black'] += BLACK_5SCORES[i]
-                loc_pat_sco['black'].append((loc_temp,BLACK_5PATTERNS[i],BLACK_5SCORES[i]))#7022
+class LineCache(object):
+    '''
+    Fixed-size, direct-mapped cache of line results keyed by the line
+    contents, a tuple of cell values: the (white, black) scores of
+    evaluate_line and, once asked for, the scan_line matches. Lines
+    repeat a lot between sibling nodes, candidate points and turns. A
+    slot is simply overwritten by the next line hashed to it.
+    '''
 
-    for i in range(length - 6):
-        temp = [
-            string_list[i],
-            string_list[i + 1],
-            string_list[i + 2],
-            string_list[i + 3],
-            string_list[i + 4],
-            string_list[i + 5],
-            ]
-        
-        loc_temp=[loc_vec[i], loc_vec[i + 1], loc_vec[i + 2],
-                loc_vec[i + 3], loc_vec[i + 4],loc_vec[i + 5]]#7022
-        
-        for i in range(len(WHITE_6PATTERNS)):
-            if WHITE_6PATTERNS[i] == temp:
-                score['white'] += WHITE_6SCORES[i]
-                loc_pat_sco['white'].append((loc_temp,WHITE_6PATTERNS[i],WHITE_6SCORES[i]))#7022
-                
-            if BLACK_6PATTERNS[i] == temp:
-                score['black'] += BLACK_6SCORES[i]
-                loc_pat_sco['black'].append((loc_temp,BLACK_6PATTERNS[i],BLACK_6SCORES[i]))#7022
-              
-    return score,loc_pat_sco#7022
-
-      
-
-        
+    def __init__(self, size=1 << 16, scores=None):
+        self.__tables = pattern_tables(scores)
+
+        # round down to a power of two so a mask picks the slot
+
+        self.__size = 1
+        while self.__size * 2 <= size:
+            self.__size *= 2
+        self.__mask = self.__size - 1
+        self.clear()
+
+    def get_size(self):
+        return self.__size
+
+    def get_tables(self):
+        return self.__tables
+
+    def get_hits(self):
+        return self.__hits
+
+    def get_misses(self):
+        return self.__misses
+
+    def clear(self):
+        '''
+        Empty the cache and reset the counters.
+        '''
+        self.__slots = [None] * self.__size
+        self.__hits = 0
+        self.__misses = 0
+
+    def scores(self, codes):
+        '''
+        Return (white score, black score) of the line codes.
+        '''
+        slot = hash(codes) & self.__mask
+        entry = self.__slots[slot]
+        if entry is not None and entry[0] == codes:
+            self.__hits += 1
+            return entry[1]
+        self.__misses += 1
+        scores = evaluate_line(codes, self.__tables)
+        self.__slots[slot] = (codes, scores, None)
+        return scores
+
+    def matches(self, codes):
+        '''
+        Return the scan_line results of the line codes as a tuple.
+        '''
+        slot = hash(codes) & self.__mask
+        entry = self.__slots[slot]
+        if entry is not None and entry[0] == codes and entry[2] \
+            is not None:
+            self.__hits += 1
+            return entry[2]
+        self.__misses += 1
+        matches = tuple(scan_line(codes, self.__tables))
+        if entry is not None and entry[0] == codes:
+            scores = entry[1]
+        else:
+            scores = evaluate_line(codes, self.__tables)
+        self.__slots[slot] = (codes, scores, matches)
+        return matches
+
+    def line_addLoc(self, codes, loc_vec):
+        '''
+        evaluate_line_addLoc of the line codes from the cache.
+        '''
+        return evaluate_line_addLoc(codes, loc_vec,
+                                    matches=self.matches(codes))
@@ -0,0 +1,236 @@
+import json
+import sys
+
+__all__ = ['QUIET', 'MOVES', 'FULL', 'wanted', 'MemorySink', 'NDJSONSink',
+           'TerminalSink']
+
+# verbosity levels: nothing, the move decisions, the decisions with
+# every candidate path and its patterns
+
+QUIET = 0
+MOVES = 1
+FULL = 2
+
+# lowest verbosity each kind of record is emitted at
+
+LEVELS = {
+    'five': MOVES,
+    'check': MOVES,
+    'forced_win': MOVES,
+    'book': MOVES,
+    'motivation': MOVES,
+    'paths': FULL,
+    }
+
+
+def wanted(kind, verbosity):
+    '''
+    Return True if records of kind are emitted at verbosity.
+    '''
+    return LEVELS[kind] <= verbosity
+
+
+class MemorySink(object):
+    '''
+    Keeps every record in a list.
+    '''
+
+    def __init__(self):
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class NDJSONSink(object):
+    '''
+    Writes one JSON object per line to a file through a buffer of
+    buffer_size bytes. file is a path or an open text file.
+    '''
+
+    def __init__(self, file, buffer_size=1 << 16):
+        if isinstance(file, str):
+            self.__file = open(file, 'w', buffering=buffer_size)
+            self.__owned = True
+        else:
+            self.__file = file
+            self.__owned = False
+
+    def emit(self, record):
+        self.__file.write(json.dumps(record) + '\n')
+
+    def flush(self):
+        self.__file.flush()
+
+    def close(self):
+        if self.__owned:
+            self.__file.close()
+        else:
+            self.__file.flush()
+
+
+class TerminalSink(object):
+    '''
+    Renders records as the colored text the AI has always printed,
+    one write per record. stream defaults to sys.stdout at the time
+    of writing.
+    '''
+
+    def __init__(self, stream=None):
+        self.__stream = stream
+
+    def emit(self, record):
+        stream = self.__stream
+        if stream is None:
+            stream = sys.stdout
+        stream.write(render(record))
+
+    def flush(self):
+        stream = self.__stream
+        if stream is None:
+            stream = sys.stdout
+        stream.flush()
+
+    def close(self):
+        self.flush()
+
+
+def _text(*values, end='\n'):
+    '''
+    The text print(*values, end=end) writes.
+    '''
+    return ' '.join(str(value) for value in values) + end
+
+def _value_colors(value, colors):
+    for (values, color) in colors:
+        if value in values:
+            return _text(color, value, '\033[0m')
+    return _text(value)
+
+def _patterns(
+    patterns,
+    move,
+    moveColor,
+    stringColors,
+    valueColors,
+    ):
+    '''
+    Lines of (locations, pattern, value) matches, move highlighted
+    among the locations.
+    '''
+    text = []
+    for (locations, pattern, value) in patterns:
+        for coordinate in locations:
+            if coordinate == move:
+                text.append(_text(moveColor, coordinate, '\033[0m',
+                            end=''))
+            else:
+                text.append(_text(coordinate, end=''))
+        text.append(_text('   ', end=''))
+        for string in pattern:
+            text.append(_text(stringColors.get(string, string), ' ',
+                        end=''))
+        text.append(_text('   ', end=''))
+        text.append(_value_colors(value, valueColors))
+    return ''.join(text)
+
+def render(record):
+    '''
+    Return the terminal text of a record.
+    '''
+    kind = record['type']
+
+    if kind == 'five':
+        (i, j) = record['move']
+        return _text('\n\n Gomoku AI make a move', '(', i, ',', j, ')',
+                     'to form \033[0;35mFive in a row\033[0m:', '(', i,
+                     ',', j, ') with', record['cells'])
+
+    if kind == 'check':
+        (i, j) = record['move']
+        text = _text('\n\n Gomoku AI has check and need to check if opponent already has one checkmate:')
+        if not record['safe']:
+            return text + _text('Not safe,Opponent has checkmat, searching other moves...')
+        return text + _text('\033[0;35m   Opponent does not have checkmate.\033[0m') \
+            + _text('\n It is safe for Gomoku to make a move', '(', i,
+                    ',', j, ')',
+                    'to form \033[0;35munbroken four\033[0m in a row:\n',
+                    record['cells'])
+
+    if kind == 'forced_win':
+        return _text('\n\n Gomoku AI has a forced win by \033[0;35mcontinuous threats\033[0m:',
+                     record['line'])
+
+    if kind == 'book':
+        (i, j) = record['move']
+        return _text('\n\n Gomoku AI plays', '(', i, ',', j, ')',
+                     'from its \033[0;35mopening book\033[0m')
+
+    if kind == 'motivation':
+        motivation = record['motivation']
+        if motivation == 'none':
+            return _text('\n\nMotivation of Gomoku AI: \033[0;35mNo defense No attack\033[0m')
+        if motivation == 'defense':
+            text = _text('\n\nMotivation of Gomoku AI: \033[0;35mDefense\033[0m')
+        else:
+            text = _text('\n\nMotivation of Gomoku AI: \033[0;35mAttack\033[0m')
+        return text + _patterns(record['patterns'], record['move'],
+                                '\033[1;34m', {'black'
+                                : '\033[0;34;47mblack\033[0m', 'white'
+                                : '\033[0;32;47mwhite\033[0m'},
+                                [((50000, 5000, 500), '\033[1;34;47m'),
+                                ((100, ), '\033[1;34m')])
+
+    # candidate paths, the chosen one first
+    text = []
+    optimalSituationScore = 0
+    for (i, path) in enumerate(record['paths']):
+        if i == 0:
+            text.append(_text('\033[0;35mGomoku AI selects path:\033[0m\n',
+                        'If GomokuAI(black) make a move :',
+                        '\033[1;34;47m', path['black'], '\033[0m',
+                        'Optimal move of white:', '\033[1;32;47m',
+                        path['white'], '\033[0m'))
+        else:
+            text.append(_text('\n\n\033[0;31;43mOther candidate path\033[0m',
+                        i, ':\n', 'If next move of black:',
+                        '\033[1;34;47m', path['black'], '\033[0m',
+                        'Optimal move of white:', '\033[1;32;47m',
+                        path['white'], '\033[0m'))
+
+        text.append(_text('\033[1;34;47mBlack Patterns:\033[0m'))
+        text.append(_text('\033[1;33mLocations\t\033[0m',
+                    '\033[1;33mPattern\t\033[0m',
+                    '\033[1;33mValue\t\033[0m'))
+        text.append(_patterns(path['black_patterns'], path['black'],
+                    '\033[1;34;47m', {'black': '\033[0;34;47mblack\033[0m'
+                    }, [((5000, 500), '\033[1;34;47m'), ((100, ),
+                    '\033[1;34m')]))
+
+        text.append(_text('\033[1;32;47mWhite Patterns:\033[0m'))
+        text.append(_text('\033[1;33mLocations\t\033[0m',
+                    '\033[1;33mPattern\t\033[0m',
+                    '\033[1;33mValue\t\033[0m'))
+        text.append(_patterns(path['white_patterns'], path['white'],
+                    '\033[1;32;47m', {'white': '\033[0;32;47mwhite\033[0m'
+                    }, [((50000, 5000, 500), '\033[1;32;47m'), ((100, ),
+                    '\033[1;32m'), ((1000000, ), '\033[1;35;47m')]))
+
+        if i == 0:
+            optimalSituationScore = path['score']
+            text.append(_text('\033[0;31mConclusion:\033[0m'))
+            text.append(_text('\033[0;31mblackScoreSum - whiteScoreSum =',
+                        path['score'], '\033[0m'))
+        else:
+            text.append(_text('\033[0;31mConclusion:\033[0m'))
+            text.append(_text('\033[0;31mblackScoreSum - whiteScoreSum =',
+                        path['score'],
+                        'which is smaller than Optimal path:',
+                        optimalSituationScore, '\033[0m'))
+    return ''.join(text)
@@ -5,55 +5,92 @@ from boardstate import *
 from gomoku import Gomoku
 from render import GameRender
 from gomoku_ai import *
+from ai_worker import AIWorker
 
 #run in terminal
 if __name__ == '__main__': 
-    gomoku = Gomoku()
+    #change the board size here, 19 for a go board
+    gomoku = Gomoku(N)
     render = GameRender(gomoku)
 
-    #change the AI here, bigger the depth stronger the AI
-    ai = gomokuAI(gomoku, BoardState.BLACK, 2)
-    ai2 = gomokuAI(gomoku, BoardState.WHITE, 1)
-
-    result = BoardState.EMPTY
-
     #enable ai here
     enable_ai = True
     enable_ai2 = False
 
+    #change the AI here, bigger the depth stronger the AI
+    #the AIs think on their own threads so the window keeps drawing,
+    #ponder lets an ai search on the player's time
+    ai = AIWorker(gomoku, BoardState.BLACK, 2, ponder=True)
+    ai2 = None
+    if enable_ai2:
+        ai2 = AIWorker(gomoku, BoardState.WHITE, 1)
+
+    result = BoardState.EMPTY
+
     #edit if ai plays first
-    ai.first_step()
-    result = gomoku.get_chess_result()
+    ai.request_move(first=True)
+    waiting = ai
     render.change_state()
 
     while True:
-        #ai vs ai section
-        if enable_ai2:
-            ai2.one_step()
-            result = gomoku.get_chess_result()
-            if result != BoardState.EMPTY:
-                print (result, "wins")
-                break
-            if enable_ai:
-
-                ai.one_step()
+        #take the move of the thinking ai, if it is ready
+        if waiting is not None:
+            move = waiting.poll_move()
+            if move is not None:
+                worker = waiting
+                waiting = None
+                if move[0] is None:
+                    #the ai found no move to play
+                    print ("no move left, draw")
+                    break
+                gomoku.set_chessboard_state(move[0], move[1], move[2])
                 result = gomoku.get_chess_result()
 
-                if result != BoardState.EMPTY:
+                #ai vs ai section
+                if worker is ai2:
+                    if result != BoardState.EMPTY:
+                        print (result, "wins")
+                        break
+                    if enable_ai:
+                        ai.request_move()
+                        waiting = ai
+                    else:
+                        render.change_state()
+                elif enable_ai2 and result != BoardState.EMPTY:
                     print (result, "wins")
                     break
-            else:
-                render.change_state()
+        elif enable_ai2 and result == BoardState.EMPTY:
+            ai2.request_move()
+            waiting = ai2
+
+        #draw, before the wait for events below so a move the ai just
+        #made is on the screen while the loop sleeps
+        render.draw_chess()
+        render.draw_mouse()
 
-        
+        if waiting is not None:
+            render.draw_thinking()
 
-        #pygame event, player vs. ai section
-        for event in pygame.event.get():
+        if result != BoardState.EMPTY:
+            render.draw_result(result)
+
+        #update, only what changed is redrawn
+        render.display()
+        render.tick()
+
+        #pygame event, player vs. ai section, the loop sleeps until
+        #the next event when no ai has a move to make
+        busy = waiting is not None or \
+            enable_ai2 and result == BoardState.EMPTY
+        for event in render.get_events(busy):
             #exit
 
             if event.type == QUIT:
                 exit()
             elif event.type ==  MOUSEBUTTONDOWN:
+                #no moves while an ai is thinking
+                if waiting is not None:
+                    continue
                 #play a step
                 if render.one_step():
                     result = gomoku.get_chess_result()
@@ -62,18 +99,7 @@ if __name__ == '__main__':
                 if result != BoardState.EMPTY:
                     break
                 if enable_ai:
-
-                    ai.one_step()
-                    result = gomoku.get_chess_result()
+                    ai.request_move()
+                    waiting = ai
                 else:
                     render.change_state()
-        
-        #draw
-        render.draw_chess()
-        render.draw_mouse()
-
-        if result != BoardState.EMPTY:
-            render.draw_result(result)
-
-        #update
-        pygame.display.update()
\ No newline at end of file
@@ -0,0 +1,212 @@
+from operator import itemgetter
+
+# the eight directions as (xdirection, ydirection), in the order
+# has_checkmate walks them: both ways along each axis
+
+DIRECTIONS = ((-1, 0), (1, 0), (0, -1), (0, 1), (-1, 1), (1, -1),
+              (-1, -1), (1, 1))
+DIRECTION_INDEX = dict((direction, d) for (d, direction) in
+                       enumerate(DIRECTIONS))
+
+# the four axes as (i, j) steps, the order threat-space search probes
+
+AXES = ((0, 1), (1, 0), (1, 1), (1, -1))
+
+def line_getter(cells):
+    '''
+    Return a function reading the values of cells off a board as a
+    tuple.
+    '''
+    if len(cells) == 1:
+        cell = cells[0]
+        return lambda board: (board[cell], )
+    return itemgetter(*cells)
+
+
+class Geometry(object):
+    '''
+    Every table about the shape of a size * size board the scanners
+    need, computed once: cells are flat indexes i * size + j.
+
+    lines            rows, columns and diagonals of 5 cells or more,
+                     in the order and direction gomokuAI.evaluate
+                     scans them, as tuples of cells
+    line_locations   the same lines as lists of (i, j)
+    line_codes       per line, a function reading it off a board
+    cell_lines       per cell, (line number, position in the line)
+                     of the lines through it
+    adjacent         per cell, the cells one step away
+    neighbors        per cell, the cells one or two steps away along
+                     the axes
+    near             per cell, the part of neighbors has_neighbor
+                     reads: it gives up on an axis at its first step
+                     off the board, other direction included
+    rays             per cell and DIRECTIONS index, the cells 1 to 4
+                     steps away, stopping at the edge
+    pattern_rays     per cell and DIRECTIONS index, the cells -1 to 4
+                     steps away, stopping at the first step off the
+                     board, as direction_pattern reads them
+    probes           per cell and AXES index, the 9 cells centred on
+                     it, -1 off the board
+    point_lines      per cell, the 4 lines evaluate_point scores
+    point_codes      per cell, functions reading them off a board
+    '''
+
+    def __init__(self, size):
+        self.size = size
+        self.cells = size * size
+
+        self.line_locations = self.__lines()
+        self.lines = [tuple(i * size + j for (i, j) in line) for line in
+                      self.line_locations]
+        self.line_codes = [line_getter(line) for line in self.lines]
+        self.cell_lines = [[] for k in range(self.cells)]
+        for (number, line) in enumerate(self.lines):
+            for (position, k) in enumerate(line):
+                self.cell_lines[k].append((number, position))
+
+        self.adjacent = []
+        self.neighbors = []
+        self.near = []
+        self.rays = []
+        self.pattern_rays = []
+        self.probes = []
+        self.point_lines = []
+        for i in range(size):
+            for j in range(size):
+                self.adjacent.append(self.__near(i, j, (1, )))
+                self.neighbors.append(self.__near(i, j, (1, 2)))
+                self.near.append(self.__has_neighbor_cells(i, j))
+                self.rays.append(tuple(self.__ray(i, j, xdirection,
+                                 ydirection, range(1, 5)) for
+                                 (xdirection, ydirection) in DIRECTIONS))
+                self.pattern_rays.append(tuple(self.__ray(i, j,
+                        xdirection, ydirection, range(-1, 5)) for
+                        (xdirection, ydirection) in DIRECTIONS))
+                self.probes.append(tuple(self.__probe(i, j, di, dj)
+                                   for (di, dj) in AXES))
+                self.point_lines.append(self.__point_lines(i, j))
+        self.point_codes = [tuple(line_getter(line) for line in lines)
+                            for lines in self.point_lines]
+
+    def __inside(self, i, j):
+        return 0 <= i < self.size and 0 <= j < self.size
+
+    def __lines(self):
+        size = self.size
+        lines = []
+
+        #row
+        for i in range(size):
+            lines.append([(i, j) for j in range(size)])
+
+        #column
+        for j in range(size):
+            lines.append([(i, j) for i in range(size)])
+
+        lines.append([(x, x) for x in range(size)])
+        for i in range(1, size - 4):
+            # y=x dialogue below
+            lines.append([(x, x - i) for x in range(i, size)])
+            # y=x dialogue above
+            lines.append([(y - i, y) for y in range(i, size)])
+
+        lines.append([(x, size - x - 1) for x in range(size)])
+        for i in range(4, size - 1):
+            lines.append([(x, i - x) for x in range(i, -1, -1)])
+            lines.append([(x, size - x + size - i - 2) for x in
+                         range(size - i - 1, size)])
+
+        return lines
+
+    def __near(self, i, j, steps):
+        cells = []
+        for (xdirection, ydirection) in DIRECTIONS:
+            for step in steps:
+                if self.__inside(i + ydirection * step, j + xdirection
+                                 * step):
+                    cells.append((i + ydirection * step) * self.size + j
+                                 + xdirection * step)
+        return cells
+
+    def __has_neighbor_cells(self, i, j):
+        cells = []
+        for axis in range(4):
+            for (xdirection, ydirection) in DIRECTIONS[2 * axis:2 * axis
+                    + 2]:
+                if not self.__inside(i + ydirection, j + xdirection):
+                    break
+                cells.append((i + ydirection) * self.size + j
+                             + xdirection)
+                if not self.__inside(i + ydirection * 2, j + xdirection
+                                     * 2):
+                    break
+                cells.append((i + ydirection * 2) * self.size + j
+                             + xdirection * 2)
+        return cells
+
+    def __ray(
+        self,
+        i,
+        j,
+        xdirection,
+        ydirection,
+        steps,
+        ):
+        cells = []
+        for step in steps:
+            if not self.__inside(i + ydirection * step, j + xdirection
+                                 * step):
+                break
+            cells.append((i + ydirection * step) * self.size + j
+                         + xdirection * step)
+        return tuple(cells)
+
+    def __probe(self, i, j, di, dj):
+        cells = []
+        for step in range(-4, 5):
+            (y, x) = (i + di * step, j + dj * step)
+            if self.__inside(y, x):
+                cells.append(y * self.size + x)
+            else:
+                cells.append(-1)
+        return tuple(cells)
+
+    def __point_lines(self, i, j):
+
+        # the row, the column, the diagonal and the anti-diagonal
+        # evaluate_point has always read; left of the main
+        # anti-diagonal that is the one at the same distance from it
+        # as (i, j) is from the main diagonal
+
+        N = self.size
+        lines = [tuple(i * N + x for x in range(N)), tuple(y * N + j
+                 for y in range(N))]
+        if j > i:
+            lines.append(tuple(x * N + x + j - i for x in range(0, N
+                         - j + i)))
+        elif j == i:
+            lines.append(tuple(x * N + x for x in range(N)))
+        else:
+            lines.append(tuple((x + i - j) * N + x for x in range(0, N
+                         - i + j)))
+        if i + j == N - 1:
+            lines.append(tuple(x * N + N - 1 - x for x in range(N)))
+        elif i + j < N - 1:
+            lines.append(tuple(x * N + N - 1 - x - abs(i - j) for x in
+                         range(N - abs(i - j))))
+        else:
+            lines.append(tuple(x * N + N - 1 - x + i + j - N + 1 for x in
+                         range(i + j - N + 1, N)))
+        return tuple(lines)
+
+
+_geometries = {}
+
+def geometry(size):
+    '''
+    Return the Geometry of a size * size board, built on first use.
+    '''
+    if size not in _geometries:
+        _geometries[size] = Geometry(size)
+    return _geometries[size]
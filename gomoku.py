@@ -1,27 +1,198 @@
 # Gomoku logic design based on xerwin's tutorial
 # http://www.cnblogs.com/erwin/p/7828956.html
 
+import random
 from enum import Enum
 from boardstate import *
+from geometry import geometry, DIRECTION_INDEX
+
+# Zobrist keys: one random 64 bit number per (cell, BoardState value),
+# zero for an empty cell. The fixed seed keeps hashes stable between
+# runs and processes.
+
+_zobrist_random = random.Random(20171211)
+ZOBRIST_KEYS = [(0, _zobrist_random.getrandbits(64),
+                _zobrist_random.getrandbits(64)) for k in range(N * N)]
+
+# mixed into a position hash when white is to move
+
+ZOBRIST_WHITE_TO_MOVE = _zobrist_random.getrandbits(64)
+
+# keys of every board size, ZOBRIST_KEYS being those of the default
+
+_zobristKeys = {N: ZOBRIST_KEYS}
+
+def zobrist_keys(size):
+    '''
+    Return the Zobrist keys of a size * size board, indexed by
+    i * size + j, drawn from a seed of their own on first use.
+    '''
+    if size not in _zobristKeys:
+        rng = random.Random('zobrist %d' % size)
+        _zobristKeys[size] = [(0, rng.getrandbits(64),
+                              rng.getrandbits(64)) for k in
+                              range(size * size)]
+    return _zobristKeys[size]
+
+
+class ChessMapView(object):
+    '''
+    Read-only size * size view over the flat board buffer, so callers
+    indexing get_chessMap()[i][j] still receive BoardState members.
+    '''
+
+    def __init__(self, board, size):
+        self.__board = board
+        self.__size = size
+
+    def __len__(self):
+        return self.__size
+
+    def __getitem__(self, i):
+        size = self.__size
+        if i < 0:
+            i += size
+        if i < 0 or i >= size:
+            raise IndexError('chessMap row out of range')
+        return [STATES[state] for state in self.__board[i * size:(i + 1)
+                * size]]
+
+    def __iter__(self):
+        for i in range(self.__size):
+            yield self[i]
 
 
 class Gomoku(object):
 
-    def __init__(self):
+    def __init__(self, size=N):
+
+        # create a size * size map, one byte per intersection holding
+        # the BoardState value, cell (i, j) lives at index i * size + j
 
-        # create a N * N map
+        self.__size = size
+        self.__board = bytearray(size * size)
 
-        self.__chessMap = [[BoardState.EMPTY for j in range(N)]
-                           for i in range(N)]
+        # lines, neighbours and rays of every cell, and the Zobrist
+        # keys, shared by every board of the same size
+
+        self.__geometry = geometry(size)
+        self.__zobrist = zobrist_keys(size)
         self.__currentI = -1
         self.__currentJ = -1
         self.__currentState = BoardState.EMPTY
 
+        # Zobrist hash of the stones on the board
+
+        self.__hash = 0
+
+        # candidate moves: the empty cells with a stone within two
+        # steps, and for every cell the number of such stones
+
+        self.__frontier = set()
+        self.__stonesNear = [0] * (size * size)
+
+        # moves played with make_move, so undo_move can take them back
+
+        self.__history = []
+
+        # objects told about every changed cell, see attach
+
+        self.__observers = []
+
+    def attach(self, observer):
+        '''
+        Call observer.update(i, j) whenever cell (i, j) changes.
+        '''
+        self.__observers.append(observer)
+
+    def detach(self, observer):
+        self.__observers.remove(observer)
+
+    def get_size(self):
+        return self.__size
+
+    def get_geometry(self):
+        return self.__geometry
+
+    def is_inside(self, i, j):
+        size = self.__size
+        return 0 <= i < size and 0 <= j < size
+
     def get_chessMap(self):
-        return self.__chessMap
+        return ChessMapView(self.__board, self.__size)
+
+    def get_board(self):
+        '''
+        Return the flat board buffer, BoardState values indexed by
+        i * size + j.
+        '''
+        return self.__board
+
+    def get_empty_count(self):
+        return self.__board.count(0)
+
+    def get_last_move(self):
+        '''
+        Return the (i, j) of the last stone set, None before any.
+        '''
+        if self.__currentState == BoardState.EMPTY:
+            return None
+        return (self.__currentI, self.__currentJ)
 
     def get_chessboard_state(self, i, j):
-        return self.__chessMap[i][j]
+        return STATES[self.__board[i * self.__size + j]]
+
+    def zobrist_key(
+        self,
+        i,
+        j,
+        state,
+        ):
+        '''
+        Return the key a stone of state on (i, j) adds to the hash.
+        '''
+        return self.__zobrist[i * self.__size + j][state.value]
+
+    def get_hash(self):
+        '''
+        Return the Zobrist hash of the stones on the board.
+        '''
+        return self.__hash
+
+    def get_frontier(self):
+        '''
+        Return the set of empty cells (as i * size + j) that have a
+        stone within two steps along a row, column or diagonal.
+        '''
+        return self.__frontier
+
+    def get_frontier_cells(self):
+        '''
+        Return the frontier as (i, j), in board order.
+        '''
+        return [divmod(k, self.__size) for k in sorted(self.__frontier)]
+
+    def __set_cell(self, k, value):
+        '''
+        Write one cell, keeping the hash and the frontier up to date.
+        '''
+        old = self.__board[k]
+        self.__hash ^= self.__zobrist[k][old] ^ self.__zobrist[k][value]
+        self.__board[k] = value
+
+        if not old and value:
+            self.__frontier.discard(k)
+            for near in self.__geometry.neighbors[k]:
+                self.__stonesNear[near] += 1
+                if not self.__board[near]:
+                    self.__frontier.add(near)
+        elif old and not value:
+            for near in self.__geometry.neighbors[k]:
+                self.__stonesNear[near] -= 1
+                if not self.__stonesNear[near]:
+                    self.__frontier.discard(near)
+            if self.__stonesNear[k]:
+                self.__frontier.add(k)
 
     def set_chessboard_state(
         self,
@@ -29,10 +200,58 @@ class Gomoku(object):
         j,
         state,
         ):
-        self.__chessMap[i][j] = state
+        size = self.__size
+        if not (0 <= i < size and 0 <= j < size):
+            raise IndexError('(%d, %d) is off the board' % (i, j))
+        self.__set_cell(i * size + j, state.value)
         self.__currentI = i
         self.__currentJ = j
         self.__currentState = state
+        for observer in self.__observers:
+            observer.update(i, j)
+
+    def make_move(
+        self,
+        i,
+        j,
+        state,
+        ):
+        '''
+        Play a move that can be taken back with undo_move.
+        '''
+        self.__history.append((i, j, self.__currentI, self.__currentJ,
+                              self.__currentState))
+        self.set_chessboard_state(i, j, state)
+
+    def undo_move(self):
+        '''
+        Take back the last make_move and restore the previous last move.
+        '''
+        (i, j, lastI, lastJ, lastState) = self.__history.pop()
+        self.__set_cell(i * self.__size + j, BoardState.EMPTY.value)
+        self.__currentI = lastI
+        self.__currentJ = lastJ
+        self.__currentState = lastState
+        for observer in self.__observers:
+            observer.update(i, j)
+
+    def copy(self):
+        '''
+        Return an independent board, copying only the flat buffer.
+        Observers are not carried over.
+        '''
+        other = Gomoku(self.__size)
+        other.__board[:] = self.__board
+        other.__currentI = self.__currentI
+        other.__currentJ = self.__currentJ
+        other.__currentState = self.__currentState
+        other.__hash = self.__hash
+        other.__frontier = set(self.__frontier)
+        other.__stonesNear = list(self.__stonesNear)
+        return other
+
+    def __deepcopy__(self, memo):
+        return self.copy()
 
     def get_chess_result(self):
         if self.connected_five(self.__currentI, self.__currentJ,
@@ -50,15 +269,11 @@ class Gomoku(object):
         player,
         ):
         count = 0
-        for step in range(1, 5):  # look four more steps on a certain direction
-            if xdirection != 0 and (j + xdirection * step < 0 or j
-                                    + xdirection * step >= N):
-                break
-            if ydirection != 0 and (i + ydirection * step < 0 or i
-                                    + ydirection * step >= N):
-                break
-            if self.__chessMap[i + ydirection * step][j + xdirection
-                    * step] == player:
+        player = player.value
+        # look four more steps on a certain direction
+        ray = self.__geometry.rays[i * self.__size + j]
+        for k in ray[DIRECTION_INDEX[(xdirection, ydirection)]]:
+            if self.__board[k] == player:
                 count += 1
             else:
                 break
@@ -85,7 +300,3 @@ class Gomoku(object):
                     return True
 
         return False
-
-
-
-            
\ No newline at end of file
@@ -1,11 +1,101 @@
 #!/usr/bin/python
 # -*- coding: utf-8 -*-
 
+import multiprocessing
 import random
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from boardstate import *
-from copy import deepcopy
 from evaluate import *
-from gomoku import Gomoku
+from gomoku import Gomoku, ZOBRIST_WHITE_TO_MOVE
+from geometry import DIRECTION_INDEX
+from incremental import IncrementalEvaluator
+from sparse import SparseGomoku, SparseEvaluator, SparseThreats
+from vectorized import VectorizedEvaluator
+from transposition import *
+from move_ordering import MoveOrderer
+from threat_space import ThreatSpaceSearch
+from threat_index import ThreatIndex
+from explanation import *
+from search_stats import SearchStats, timed
+from opening_book import OpeningBook
+
+
+class SearchTimeout(Exception):
+    '''
+    Raised inside alpha_beta_prune when the time budget runs out.
+    '''
+    pass
+
+
+# state of a root search worker process: the best root score found so
+# far, the index of the root move that found it, the lock guarding both
+# and the worker's own board and AI, reused between tasks
+_rootWorker = {}
+
+def _init_root_worker(alpha, index, lock):
+    _rootWorker['shared'] = (alpha, index, lock)
+
+def _search_root_move(task):
+    '''
+    Search one root move in a worker process. Returns
+    (move number, score, alpha searched with, steps, loc_pat_sco),
+    the score being exact only when it is above that alpha. search
+    numbers the root searches of the AI sending the tasks, the
+    worker's table and move history are aged when it changes.
+    '''
+    (cells, size, stateValue, depth, number, move, beta, deadline,
+     options, search) = task
+    (alpha, index, lock) = _rootWorker['shared']
+
+    # a move listed before the current best one must also report a
+    # tie, as the serial search would pick it on a tie
+    with lock:
+        bound = alpha.value
+        if number < index.value:
+            bound -= 1
+
+    if _rootWorker.get('options') != (size, options):
+        gomoku = Gomoku(size)
+        _rootWorker['gomoku'] = gomoku
+        _rootWorker['ai'] = gomokuAI(gomoku, BoardState.BLACK, depth,
+                                     **options)
+        _rootWorker['options'] = (size, options)
+    gomoku = _rootWorker['gomoku']
+    ai = _rootWorker['ai']
+    if _rootWorker.get('search') != search:
+        ai.new_search()
+        _rootWorker['search'] = search
+    board = gomoku.get_board()
+    for k in range(size * size):
+        if board[k] != cells[k]:
+            gomoku.set_chessboard_state(k // size, k % size,
+                                        STATES[cells[k]])
+
+    state = STATES[stateValue]
+    if state == BoardState.WHITE:
+        nextState = BoardState.BLACK
+    else:
+        nextState = BoardState.WHITE
+
+    gomoku.make_move(move[0], move[1], state)
+    ai.set_deadline(deadline)
+    try:
+        score, steps, loc_pat_sco = ai.alpha_beta_prune(depth - 1,
+                nextState, -beta, -bound, 1)
+    finally:
+        ai.set_deadline(None)
+        gomoku.undo_move()
+
+    score = -score
+    if score > bound:
+        with lock:
+            if score > alpha.value or score == alpha.value and number \
+                < index.value:
+                alpha.value = score
+                index.value = number
+    return number, score, bound, steps, loc_pat_sco
 
 
 class gomokuAI(object):
@@ -16,13 +106,295 @@ class gomokuAI(object):
         gomoku,
         currentState,
         depth,
+        vectorized=False,
+        tt_size=1 << 16,
+        time_budget=None,
+        workers=1,
+        ponder=False,
+        table=None,
+        threat_budget=50,
+        explanation=None,
+        verbosity=FULL,
+        scores=None,
+        timing=False,
+        book=None,
+        line_cache_size=1 << 16,
         ):
 
         self.__gomoku = gomoku
+        self.__size = gomoku.get_size()
+
+        # a SparseGomoku is searched from its stones alone: no board
+        # tables, one process, no vectorized evaluator and no
+        # threat-space search, which all work on the flat board
+        self.__sparse = isinstance(gomoku, SparseGomoku)
+        if self.__sparse:
+            if vectorized or workers > 1:
+                raise ValueError('a sparse board is searched by one '
+                                 'process without the vectorized '
+                                 'evaluator')
+            self.__geometry = None
+        else:
+            self.__geometry = gomoku.get_geometry()
         self.__currentState = currentState
         self.__depth = depth
-        self.__currentI = -1
-        self.__currentJ = -1
+        # the move the last search chose, None when it had none
+        self.__currentI = None
+        self.__currentJ = None
+
+        # line scores kept up to date by the board on every move,
+        # so search leaves only rescore the lines a move touched;
+        # scores picks the pattern scores (see evaluate.SCORE_SETS).
+        # Lines are scored through a cache of line_cache_size lines
+        # shared with evaluate and evaluate_point
+        self.__scores = scores
+        self.__lineCache = LineCache(line_cache_size, scores)
+        if self.__sparse:
+            self.__evaluator = SparseEvaluator(gomoku,
+                    cache=self.__lineCache)
+        else:
+            self.__evaluator = IncrementalEvaluator(gomoku,
+                    cache=self.__lineCache)
+
+        # fours, open threes and has_check cells of both colors, read
+        # by one_step instead of scanning the board
+        if self.__sparse:
+            self.__threatIndex = SparseThreats(gomoku)
+        else:
+            self.__threatIndex = ThreatIndex(gomoku)
+
+        # whole-board evaluate/threat_evaluate in NumPy batches
+        if vectorized:
+            self.__vectorized = VectorizedEvaluator(self.__geometry,
+                    self.__lineCache.get_tables())
+        else:
+            self.__vectorized = None
+
+        # search results shared between transposed positions,
+        # tt_size entries at most, 0 turns the table off; table shares
+        # the one of another AI instead
+        if table is not None:
+            self.__table = table
+        elif tt_size:
+            self.__table = TranspositionTable(tt_size)
+        else:
+            self.__table = None
+
+        # seconds one_step may search, None searches to a fixed depth;
+        # with a budget depth is the deepest iteration tried
+        self.__timeBudget = time_budget
+        self.__deadline = None
+
+        # killer moves and history scores learnt from beta cutoffs
+        self.__orderer = MoveOrderer()
+
+        # alpha_beta_prune calls made on this process, and the
+        # counters of the move being chosen
+        self.__nodes = 0
+        self.__stats = SearchStats()
+
+        # timing on (or a hook(phase, seconds) to call) wraps the
+        # timed phases, off it costs nothing
+        self.__timing = timing
+        self.__score = self.__evaluator.score
+        if timing:
+            get_stats = lambda : self.__stats
+            self.generate = timed(self.generate, 'generate', get_stats)
+            self.evaluate_point = timed(self.evaluate_point,
+                                        'evaluate_point', get_stats)
+            self.__score = timed(self.__score, 'evaluate', get_stats)
+
+        # root moves split over a pool of worker processes, started
+        # on the first search that needs it
+        self.__workers = workers
+        self.__options = {'vectorized': vectorized, 'tt_size': tt_size,
+                          'threat_budget': 0, 'scores': scores,
+                          'line_cache_size': line_cache_size}
+        self.__pool = None
+        self.__searches = 0
+
+        # after each move, search the position after the opponent's
+        # expected reply on a background thread
+        self.__ponder = ponder
+        self.__pv = None
+        self.__ponderThread = None
+        self.__ponderAI = None
+        self.__ponderHash = None
+        self.__ponderResult = None
+
+        # forced wins of fours and threes looked for before the search,
+        # threat_budget moves at most (each costs about a millisecond),
+        # 0 turns it off
+        if threat_budget and not self.__sparse:
+            self.__threats = ThreatSpaceSearch(gomoku, threat_budget)
+        else:
+            self.__threats = None
+
+        # moves of known openings, played without a search; book is
+        # the path of a book file or an OpeningBook to share
+        if isinstance(book, str):
+            self.__book = OpeningBook(book)
+            self.__ownBook = True
+        else:
+            self.__book = book
+            self.__ownBook = False
+
+        # where explanation records go, the colored terminal text by
+        # default, and how much of them (QUIET, MOVES or FULL)
+        if explanation is None:
+            explanation = TerminalSink()
+        self.__explanation = explanation
+        self.__verbosity = verbosity
+
+    def explains(self, kind):
+        '''
+        Return True if explanation records of kind are emitted.
+        '''
+        return wanted(kind, self.__verbosity)
+
+    def explain(self, record):
+        if wanted(record['type'], self.__verbosity):
+            self.__explanation.emit(record)
+
+    def get_nodes(self):
+        '''
+        Nodes (leaves included) alpha_beta_prune searched so far,
+        worker processes of a parallel search not counted.
+        '''
+        return self.__nodes
+
+    def get_line_cache(self):
+        return self.__lineCache
+
+    def get_stats(self):
+        '''
+        Return the SearchStats of the last one_step.
+        '''
+        return self.__stats
+
+    def get_pv(self):
+        '''
+        Return the line the last move expects as (i, j) moves, the
+        move played first, or None.
+        '''
+        return self.__pv
+
+    def new_search(self):
+        '''
+        Age the transposition table and the move history before a
+        new root search, in this process and in the worker processes.
+        '''
+        if self.__table is not None:
+            self.__table.new_search()
+        self.__orderer.new_search()
+        self.__searches += 1
+
+    def set_deadline(self, deadline):
+        '''
+        Make alpha_beta_prune raise SearchTimeout after time.time()
+        passes deadline, None for no limit.
+        '''
+        self.__deadline = deadline
+
+    def close(self):
+        '''
+        Stop pondering, shut down the worker processes of a parallel
+        search and stop following the board. The AI cannot search
+        after it is closed.
+        '''
+        self.stop_ponder()
+        if self.__pool is not None:
+            self.__pool.shutdown(cancel_futures=True)
+            self.__pool = None
+        if self.__evaluator is not None:
+            self.__evaluator.close()
+            self.__evaluator = None
+            self.__threatIndex.close()
+        if self.__ownBook:
+            self.__book.close()
+            self.__ownBook = False
+
+    def ponder(self):
+        '''
+        Search, on a background thread, the position after the reply
+        the last principal variation expects from the opponent, one
+        depth deeper at a time up to the AI's depth. The transposition
+        table is shared, so a search of any other reply still finds it
+        warmed up. Returns whether a search started.
+        '''
+        self.stop_ponder()
+        if not self.__pv or len(self.__pv) < 2:
+            return False
+        (i, j) = self.__pv[1]
+        if self.__gomoku.get_chessboard_state(i, j) != BoardState.EMPTY:
+            return False
+        if self.__currentState == BoardState.WHITE:
+            opponentState = BoardState.BLACK
+        else:
+            opponentState = BoardState.WHITE
+
+        gomoku = self.__gomoku.copy()
+        gomoku.set_chessboard_state(i, j, opponentState)
+        self.__ponderAI = gomokuAI(gomoku, self.__currentState,
+                                   self.__depth,
+                                   self.__vectorized is not None,
+                                   table=self.__table,
+                                   threat_budget=0,
+                                   scores=self.__scores)
+        self.__ponderHash = gomoku.get_hash()
+        self.__ponderResult = None
+        self.__ponderThread = threading.Thread(target=self.__ponder_search,
+                args=(self.__ponderAI, self.__pv[2:]), daemon=True)
+        self.__ponderThread.start()
+        return True
+
+    def __ponder_search(self, ai, pv):
+
+        # iterative deepening until the deadline stop_ponder or
+        # __take_ponder give it, keeping the deepest finished depth
+
+        for depth in range(1, self.__depth + 1):
+            (ai.__currentI, ai.__currentJ) = (None, None)
+            try:
+                score,steps,loc_pat_sco = ai.alpha_beta_prune(depth,
+                        self.__currentState, pv=pv)
+            except SearchTimeout:
+                return
+            self.__ponderResult = (score, steps, loc_pat_sco,
+                                   ai.__currentI, ai.__currentJ, depth)
+            if steps:
+                pv = [move for move in reversed(steps[-1])
+                      if move != (None, None)]
+
+    def stop_ponder(self):
+        '''
+        Stop the background search, if one runs, and wait for it.
+        '''
+        if self.__ponderThread is not None:
+            self.__ponderAI.set_deadline(0)
+            self.__ponderThread.join()
+            self.__ponderThread = None
+            self.__ponderAI = None
+
+    def __take_ponder(self, deadline):
+        '''
+        Return the pondered (score, steps, loc_pat_sco, i, j, depth)
+        of the deepest depth finished when the opponent played the
+        expected reply, else stop pondering and return None. A search
+        still running keeps deepening until deadline (a time.time()
+        value, None waits for it to reach the AI's depth).
+        '''
+        if self.__ponderThread is None:
+            return None
+        if self.__ponderHash != self.__gomoku.get_hash():
+            self.stop_ponder()
+            return None
+        if deadline is not None:
+            self.__ponderAI.set_deadline(deadline)
+        self.__ponderThread.join()
+        self.__ponderThread = None
+        self.__ponderAI = None
+        return self.__ponderResult
 
     def set_board(
         self,
@@ -44,34 +416,13 @@ class gomokuAI(object):
         neighbors or not. Neighbors are defined as pieces
         within 2 empty intersections.
         '''
-        #exhaustive search for four axes
-        directions = [[(-1, 0), (1, 0)], [(0, -1), (0, 1)], [(-1, 1),
-                      (1, -1)], [(-1, -1), (1, 1)]]
-        for axis in directions:
-            for (xdirection, ydirection) in axis:
-
-                if xdirection != 0 and (j + xdirection < 0 or j
-                        + xdirection >= N):
-                    break
-                if ydirection != 0 and (i + ydirection < 0 or i
-                        + ydirection >= N):
-                    break
-                if self.__gomoku.get_chessMap()[i + ydirection][j
-                        + xdirection] != BoardState.EMPTY:
-                    return True
-
-                if xdirection != 0 and (j + xdirection * 2 < 0 or j
-                        + xdirection * 2 >= N):
-                    break
-
-                if ydirection != 0 and (i + ydirection * 2 < 0 or i
-                        + ydirection * 2 >= N):
-                    break
-
-                if self.__gomoku.get_chessMap()[i + ydirection * 2][j
-                        + xdirection * 2] != BoardState.EMPTY:
-                    return True
-
+        if self.__sparse:
+            return self.__gomoku.has_stone_near(i, j)
+        board = self.__gomoku.get_board()
+        #the cells up to two steps away on the four axes
+        for k in self.__geometry.near[i * self.__size + j]:
+            if board[k]:
+                return True
         return False
 
     def direction_count(
@@ -86,20 +437,22 @@ class gomokuAI(object):
         This counts how many connected pieces are on a specific
         direction. Returns the counted number.
         '''
+        if self.__sparse:
+            count = self.__gomoku.direction_count(i, j, xdirection,
+                    ydirection, state)
+            return count, [(i + ydirection * step, j + xdirection * step)
+                           for step in range(1, count + 1)]
 
+        board = self.__gomoku.get_board()
+        state = state.value
         count = 0
         fiveStore=[]#7022
-        for step in range(1, 5):  # look four more steps on a certain direction
-            if xdirection != 0 and (j + xdirection * step < 0 or j
-                                    + xdirection * step >= N):
-                break
-            if ydirection != 0 and (i + ydirection * step < 0 or i
-                                    + ydirection * step >= N):
-                break
-            if self.__gomoku.get_chessMap()[i + ydirection * step][j
-                    + xdirection * step] == state:
+        # look four more steps on a certain direction
+        ray = self.__geometry.rays[i * self.__size + j]
+        for k in ray[DIRECTION_INDEX[(xdirection, ydirection)]]:
+            if board[k] == state:
                 count += 1
-                fiveStore.append((i+ydirection * step,j + xdirection*step))#7022
+                fiveStore.append(divmod(k, self.__size))#7022
                 
             else:
                 break
@@ -116,21 +469,26 @@ class gomokuAI(object):
         '''
         Returns the pattern with length 6 to evaluate later
         '''
+        if self.__sparse:
+            pattern = []
+            fourStore = []
+            for step in range(-1, 5):
+                (y, x) = (i + ydirection * step, j + xdirection * step)
+                if not self.__gomoku.is_inside(y, x):
+                    break
+                pattern.append(self.__gomoku.get_chessboard_state(y, x))
+                fourStore.append((y, x))
+            return pattern,fourStore
 
+        board = self.__gomoku.get_board()
         pattern = []
         fourStore=[]#7022
-        for step in range(-1, 5):  # generate a list with len 10
-            if xdirection != 0 and (j + xdirection * step < 0 or j
-                                    + xdirection * step >= N):
-                break
-            if ydirection != 0 and (i + ydirection * step < 0 or i
-                                    + ydirection * step >= N):
-                break
-
-            pattern.append(self.__gomoku.get_chessMap()[i + ydirection
-                           * step][j + xdirection * step])
+        # steps -1 to 4, up to the edge of the board
+        ray = self.__geometry.pattern_rays[i * self.__size + j]
+        for k in ray[DIRECTION_INDEX[(xdirection, ydirection)]]:
+            pattern.append(STATES[board[k]])
             
-            fourStore.append((i+ydirection * step,j + xdirection*step))
+            fourStore.append(divmod(k, self.__size))
 
         return pattern,fourStore
 
@@ -139,9 +497,10 @@ class gomokuAI(object):
         state,
         i,
         j,
+        verbose=True,
         ):
         '''
-        Checkmate means five in a row.
+        Checkmate means five in a row. verbose explains the five found.
         '''
         directions = [[(-1, 0), (1, 0)], [(0, -1), (0, 1)], [(-1, 1),
                       (1, -1)], [(-1, -1), (1, 1)]]
@@ -163,7 +522,9 @@ class gomokuAI(object):
                 
                 if axis_count >= 5:
                     
-                    print('\n\n Gomoku AI make a move','(',i,',',j,')','to form \033[0;35mFive in a row\033[0m:','(',i,',',j,') with',fiveSpots)#7022
+                    if verbose:
+                        self.explain({'type': 'five', 'move': (i, j),
+                                      'cells': fiveSpots})#7022
                     
                     return True
         return False
@@ -178,206 +539,80 @@ class gomokuAI(object):
         Check means a unblocked four.
         Double-three should also be a check, but it's not added yet.
         '''
-        directions = [[(-1, 0), (1, 0)], [(0, -1), (0, 1)], [(-1, 1),
-                      (1, -1)], [(-1, -1), (1, 1)]]
-
-        for axis in directions:
-            currentPattern = []
-            fourStore=[]#7022
-            for (xdirection, ydirection) in axis:
-                
-                #????why double add??????
-                '''
-                currentPattern += self.direction_pattern(i, j,
-                        xdirection, ydirection, state)
-                '''
-                transfer_currentPattern, transfer_foureSpots= self.direction_pattern(i, j,
-                        xdirection, ydirection, state)#7022
-                
-                
-                currentPattern += transfer_currentPattern#7022
-                
-                #print('tranpattern',transfer_currentPattern,'c',currentPattern)
-                
-                fourStore += transfer_foureSpots#7022
-                
-              
-                
-                if len(currentPattern) > 2:
-                    currentPattern[1] = state
-                    
-                
-                
-                if enum_to_string(currentPattern) == WHITE_6PATTERNS[0]:
-                    
-                    return True, fourStore #7022
-                
-                if enum_to_string(currentPattern) == BLACK_6PATTERNS[0]:
-                    
-                    #print('mpd33333333333333rrrrrrrrrrrrrrr',currentPattern)
-                    
-                    return True, fourStore#7022
-                
-        return False, fourStore#7022
+        fourStore = self.__threatIndex.check(state, i, j)
+        if fourStore is not None:
+            return True, fourStore#7022
+        return False, []#7022
 
     def opponent_has_checkmate(self, state):
         '''
         Check if opponent has checkmate.
         '''
-        vectors = []
-
-        #exhaustive search
-
-        for i in range(N):
-            vectors.append(self.__gomoku.get_chessMap()[i])
-
-        for j in range(N):
-            vectors.append([self.__gomoku.get_chessMap()[i][j] for i in
-                           range(N)])
-
-        vectors.append([self.__gomoku.get_chessMap()[x][x] for x in
-                       range(N)])
-        for i in range(1, N - 4):
-            v = [self.__gomoku.get_chessMap()[x][x - i] for x in
-                 range(i, N)]
-            vectors.append(v)
-            v = [self.__gomoku.get_chessMap()[y - i][y] for y in
-                 range(i, N)]
-            vectors.append(v)
-
-        vectors.append([self.__gomoku.get_chessMap()[x][N - x - 1]
-                       for x in range(N)])
-        for i in range(4, N - 1):
-            v = [self.__gomoku.get_chessMap()[x][i - x] for x in
-                 range(i, -1, -1)]
-            vectors.append(v)
-            v = [self.__gomoku.get_chessMap()[x][N - x + N - i - 2]
-                 for x in range(N - i - 1, N)]
-            vectors.append(v)
-
-        #checkmate
-        for vector in vectors:
-            temp = enum_to_string(vector)
-            if state == BoardState.BLACK:
-                for pattern in WHITE_5PATTERNS:
-                    if sublist(pattern, temp):
-                        return True
-            if state == BoardState.WHITE:
-                for pattern in BLACK_5PATTERNS:
-                    if sublist(pattern, temp):
-                        return True
+        if state == BoardState.BLACK:
+            return self.__threatIndex.has_five_or_four(BoardState.WHITE)
+        if state == BoardState.WHITE:
+            return self.__threatIndex.has_five_or_four(BoardState.BLACK)
         return False
 
-    def generate(self):
+    def generate(self, state=None):
         '''
-        Generate a list of available points for searching.
+        Generate a list of available points (i, j) for searching,
+        best evaluate_point score for state first.
         '''
-        ## store the nodes
+        if state is None:
+            state = self.__currentState
+        ## store the moves
         frontierList = []
-        for i in range(N):
-            for j in range(N):
-                ## just consider empty 
-                if self.__gomoku.get_chessMap()[i][j] \
-                    != BoardState.EMPTY:
-                    continue  # only search for available spots
-                if not self.has_neighbor(self.__gomoku.get_chessMap()[i][j],
-                        i, j):
-                    continue
-
-                if self.__currentState == BoardState.WHITE:
-                    nextState = BoardState.BLACK
-                else:
-                    nextState = BoardState.WHITE
+        ## only empty cells near a stone, kept up to date by the board
+        for (i, j) in self.__gomoku.get_frontier_cells():
+            if not self.has_neighbor(BoardState.EMPTY, i, j):
+                continue
 
-                #depth -1 every time
-                
-                #### first parameter of gomoku is the state of whole board 
-                nextPlay = gomokuAI(deepcopy(self.__gomoku), nextState,
-                                    self.__depth - 1)
-                nextPlay.set_board(i, j, self.__currentState)
-
-                frontierList.append((nextPlay, i, j))
+            frontierList.append((i, j))
 
         # Degree Heuristcs, Sort points based on their evaluation
 
         frontierScores = []
-        for node in frontierList:
-            frontierScores.append(self.evaluate_point(node[1], node[2]))
+        for (i, j) in frontierList:
+            frontierScores.append(self.evaluate_point(i, j, state))
 
         frontierZipped = zip(frontierList, frontierScores)
-        frontierSorted = sorted(frontierZipped, key=lambda t: t[1])
+        frontierSorted = sorted(frontierZipped, key=lambda t: t[1],
+                                reverse=True)
         #print('frontierSorted',frontierSorted)
         
-        (frontierList, frontierScores) = zip(*frontierSorted)
-        return frontierList
+        return [move for (move, score) in frontierSorted]
 
-    def negate(self):
+    def negate(self, state=None):
         
-        score,loc_pat_sco=self.evaluate()
+        if state is None:
+            state = self.__currentState
+        score,loc_pat_sco=self.__evaluator.evaluate(state)
         return -score,loc_pat_sco
 
-    def evaluate(self):
+    def evaluate(self, state=None):
         '''
-        Return the board score for Minimax Search.
+        Return the board score for Minimax Search, with state
+        the player to move (the AI's own state by default).
         '''
-        #exhaustive search
-        vectors = []
-        
-        
-        #row
-        for i in range(N):
-            
-            #7022
-            row_locations=[]
-            for j in range(N):
-                row_locations.append((i,j))
-            #7022    
-                
-            vectors.append((self.__gomoku.get_chessMap()[i],row_locations))#7022
-            
-        
-        #column
-        for j in range(N):
-            vectors.append(([self.__gomoku.get_chessMap()[i][j] for i in
-                           range(N)],[(i,j)for i in range(N)])) #7022
-        
-        vectors.append(([self.__gomoku.get_chessMap()[x][x] for x in
-                       range(N)],[(x,x)for x in range(N)]))#7022
-       
-        #
-        for i in range(1, N - 4):
-            # y=x dialogue below
-            v = ([self.__gomoku.get_chessMap()[x][x - i] for x in
-                 range(i, N)],[(x,x-i)for x in range(i, N)]) #7022
-            vectors.append(v)
-            # y=x dialogue above
-            v = ([self.__gomoku.get_chessMap()[y - i][y] for y in
-                 range(i, N)],[(y-i,y) for y in range(i,N)])#7022
-                
-            vectors.append(v)
-
-        vectors.append(([self.__gomoku.get_chessMap()[x][N - x - 1]
-                       for x in range(N)],[(x,N-x-1) for x in range(N)]))#7022
-
-        
-        
-        for i in range(4, N - 1):
-            v = ([self.__gomoku.get_chessMap()[x][i - x] for x in
-                 range(i, -1, -1)],[(x,i-x) for x in range(i,-1,-1)])#7022
-            vectors.append(v)
-            v = ([self.__gomoku.get_chessMap()[x][N - x + N - i - 2]
-                 for x in range(N - i - 1, N)],[(x,N - x + N - i - 2)for x in range(N - i - 1, N)])#7022
-            vectors.append(v)
+        if state is None:
+            state = self.__currentState
+        if self.__sparse:
+            return self.__evaluator.evaluate(state)
+        board = self.__gomoku.get_board()
+        if self.__vectorized is not None:
+            return self.__vectorized.evaluate(board, state)
+        #exhaustive search over every line of the board
+        geometry = self.__geometry
 
         board_score = 0
-
-       
         loc_pat_sco ={'white':[],'black':[]}
         
-        
-        for v in vectors:
+        for (codes, locations) in zip(geometry.line_codes,
+                                      geometry.line_locations):
             
-            score,temp_loc_pat_sco = evaluate_vector_addLoc(v)
+            score,temp_loc_pat_sco = self.__lineCache.line_addLoc(
+                    codes(board), locations)
             #print('scloc',score,'+',loc,'+',v)
             
             #7022
@@ -389,199 +624,457 @@ class gomokuAI(object):
             #7022
             
             
-            if self.__currentState == BoardState.WHITE:
+            if state == BoardState.WHITE:
                 board_score += score['black'] - score['white']
             else:
                 board_score += score['white'] - score['black']
                 
         return board_score,loc_pat_sco
 
-    def evaluate_point(self, i, j):
+    def evaluate_point(self, i, j, state=None):
         '''
         Return a point score for Degree Heuristics.
         '''
-        vectors = []
-        vectors.append(self.__gomoku.get_chessMap()[i])
-        vectors.append([self.__gomoku.get_chessMap()[i][j] for i in
-                       range(N)])
-
-        if j > i:
-            v = [self.__gomoku.get_chessMap()[x][x + j - i] for x in
-                 range(0, N - j + i)]
-            vectors.append(v)
-        elif j == i:
-
-            vectors.append([self.__gomoku.get_chessMap()[x][x] for x in
-                           range(N)])
-        elif j < i:
-
-            v = [self.__gomoku.get_chessMap()[x + i - j][x] for x in
-                 range(0, N - i + j)]
-            vectors.append(v)
-
-        if i + j == N - 1:
-            vectors.append([self.__gomoku.get_chessMap()[x][N - 1 - x]
-                           for x in range(N)])
-        elif i + j < N - 1:
-
-            v = [self.__gomoku.get_chessMap()[x][N - 1 - x - abs(i
-                 - j)] for x in range(N - abs(i - j))]
-            vectors.append(v)
-        elif i + j > N - 1:
-
-            vectors.append([self.__gomoku.get_chessMap()[x][N - 1 - x
-                           + i + j - N + 1] for x in range(i + j - N
-                           + 1, N)])
-                
+        if state is None:
+            state = self.__currentState
+        if self.__sparse:
+            return self.__evaluator.point_score(i, j, state)
+        board = self.__gomoku.get_board()
         # score is the position with empty move 
         point_score = 0
-        for v in vectors:
-            score = evaluate_vector(v)
-            if self.__currentState == BoardState.WHITE:
-                point_score += score['white']
+        for codes in self.__geometry.point_codes[i * self.__size
+                                             + j]:
+            (white, black) = self.__lineCache.scores(codes(board))
+            if state == BoardState.WHITE:
+                point_score += white
             else:
-                point_score += score['black']
+                point_score += black
                 
         
         return point_score
 
     def alpha_beta_prune(
         self,
-        ai,
+        depth,
+        state,
         alpha=-10000000,
         
         ## why it is 10000000
         beta=10000000,
+        ply=0,
+        pv=None,
         ):
-        ## 
+        '''
+        Negamax search on the shared board, state is the player to
+        move. Children are played with make_move and taken back with
+        undo_move. The root (ply 0) collects one path per move that
+        raised alpha, every other node returns its best path only.
+        pv is the line to try first, from a shallower search. Leaves
+        keep no pattern matches, loc_pat_sco holds None for them.
+        '''
+
+        self.__nodes += 1
+        stats = self.__stats
+        if self.__deadline is not None and time.time() > self.__deadline:
+            raise SearchTimeout()
 
         steps=[]#7022
         loc_pat_sco=[]
         
-        if ai.__depth <= 0:
-            ## negate min max score
-            score,temp_loc_pat_sco = ai.negate()
+        if depth <= 0:
+            ## negate min max score, score only: the pattern matches
+            ## are rebuilt by path_loc_pat_sco for the paths explained
+            stats.leaves += 1
+            score = -self.__score(state)
             location=[(None,None)]##7022
-            #print('Terminal-Node:','board-score',score*(-1),'node-depth:',ai.__depth)#7022
-            return score,location,temp_loc_pat_sco ##7022
+            return score,location,None ##7022
         
-        # only use the first 20 nodes
+        if state == BoardState.WHITE:
+            nextState = BoardState.BLACK
+        else:
+            nextState = BoardState.WHITE
 
-        # for (nextPlay, i, j) in ai.generate()[:20]:
-        for (nextPlay, i, j) in ai.generate():
-            '''
-            print('father-node\'s beta-alpha:',beta,'&',alpha,'move:','(',i,',',j,')','player:',ai.__currentState,'node-depth', \
-                  nextPlay.__depth)#7022
-            '''
+        # the root has to search its moves to collect every path
+        table = self.__table
+        if ply == 0:
+            table = None
+        if table is not None:
+            key = self.__gomoku.get_hash()
+            if state == BoardState.WHITE:
+                key ^= ZOBRIST_WHITE_TO_MOVE
+            entry = table.probe(key)
+            stats.tableProbes += 1
+            if entry is not None:
+                stats.tableHits += 1
+            if entry is not None and entry[1] >= depth:
+                (score, bound) = (entry[2], entry[3])
+                if bound == UPPER and score <= alpha \
+                    or bound == EXACT and score <= alpha:
+                    return alpha,[],[]
+                if bound == LOWER and score >= beta \
+                    or bound == EXACT and score >= beta:
+                    return beta,list(entry[6]),entry[7]
+                if bound == EXACT:
+                    return score,list(entry[6]),entry[7]
+            alphaOrig = alpha
+            bestMove = None
+
+        hashMove = None
+        if table is not None and entry is not None:
+            hashMove = entry[4]
+        pvMove = None
+        if pv:
+            pvMove = pv[0]
+        moves = self.__orderer.order(self.generate(state), state, ply,
+                                     hashMove, pvMove)
+
+        if ply == 0 and self.__workers > 1 and depth > 1 and len(moves) > 1:
+            return self.__parallel_root(depth, state, alpha, beta, moves,
+                                        pv)
+
+        stats.expanded[ply] = stats.expanded.get(ply, 0) + 1
+        for (index, (i, j)) in enumerate(moves):
             ## negate alpha???
             ## Since '-' every time it is different
             ## why - beta, - alpha
             
-            # leaf is                                             
-            #transfer_steps=[]
-            
-            transfer_score, transfer_steps, temp_loc_pat_sco = self.alpha_beta_prune(nextPlay, -beta, -alpha)##7022
+            if pv and pv[0] == (i, j):
+                nextPV = pv[1:]
+            else:
+                nextPV = None
+
+            stats.children[ply] = stats.children.get(ply, 0) + 1
+            self.__gomoku.make_move(i, j, state)
+            try:
+                transfer_score, transfer_steps, temp_loc_pat_sco = \
+                    self.alpha_beta_prune(depth - 1, nextState, -beta,
+                                          -alpha, ply + 1, nextPV)##7022
+            finally:
+                self.__gomoku.undo_move()
             
             temp_score=-transfer_score
             
-            #transfer_steps += transfer_location#7022
-            #print('--------',temp_score,'!!!!beta-alpha',beta,alpha,' loc:',i,'-',j, \
-                  #nextPlay.__currentState,nextPlay.__depth)
-                  
-            
-                
             if temp_score > beta:
-                #print(temp_score,'> beta',beta)#7022
+                self.__orderer.cutoff((i, j), state, ply, depth)
+                stats.cutoffs[index] = stats.cutoffs.get(index, 0) + 1
                 transfer_steps.append((i,j))#7022
                 
-                if nextPlay.__depth==1:   #7022
+                if ply == 0:   #7022
                     
                     steps.append(transfer_steps)  #7022
-                    #print('steps',steps)
-                    
                     loc_pat_sco.append(temp_loc_pat_sco)
                     return beta,steps,loc_pat_sco##7022
                 else:
+                    if table is not None:
+                        table.store(key, depth, beta, LOWER, (i, j),
+                                    list(transfer_steps), temp_loc_pat_sco)
                     return beta,transfer_steps,temp_loc_pat_sco##7022
                 
             if temp_score > alpha:
-                #print(temp_score,'> alpha:',alpha)#7022
                 alpha = temp_score
-                (ai.__currentI, ai.__currentJ) = (i, j)
+                if ply == 0:
+                    (self.__currentI, self.__currentJ) = (i, j)
+                elif table is not None:
+                    bestMove = (i, j)
                 
                 transfer_steps.append((i,j))#7022
                 
-                if nextPlay.__depth==1:   #7022
+                if ply == 0:   #7022
                     steps.append(transfer_steps)  #7022
-                    #print('steps',steps)
                     loc_pat_sco.append(temp_loc_pat_sco)
                 else:
                     steps=transfer_steps
                     loc_pat_sco=temp_loc_pat_sco
+
+        if table is not None:
+            if alpha <= alphaOrig:
+                table.store(key, depth, alpha, UPPER, None)
+            elif alpha >= beta:
+                table.store(key, depth, alpha, LOWER, bestMove,
+                            list(steps), loc_pat_sco)
+            else:
+                table.store(key, depth, alpha, EXACT, bestMove,
+                            list(steps), loc_pat_sco)
         return alpha,steps,loc_pat_sco ##7022
     
         ## no alpha > beta
     
-        
+    def __parallel_root(
+        self,
+        depth,
+        state,
+        alpha,
+        beta,
+        moves,
+        pv,
+        ):
+        '''
+        Root of alpha_beta_prune with the moves after the first one
+        searched by worker processes. Workers share the best score so
+        far as their alpha. Results are then replayed in move order,
+        so the move chosen is the one the serial search would choose.
+        '''
+        if self.__pool is None:
+            context = multiprocessing.get_context()
+            self.__sharedLock = context.Lock()
+            self.__sharedAlpha = context.RawValue('q', 0)
+            self.__sharedIndex = context.RawValue('q', 0)
+            self.__pool = ProcessPoolExecutor(self.__workers,
+                    mp_context=context, initializer=_init_root_worker,
+                    initargs=(self.__sharedAlpha, self.__sharedIndex,
+                              self.__sharedLock))
+
+        if state == BoardState.WHITE:
+            nextState = BoardState.BLACK
+        else:
+            nextState = BoardState.WHITE
+
+        # the first move is searched here to give the workers an alpha
+        (i, j) = moves[0]
+        nextPV = None
+        if pv and pv[0] == (i, j):
+            nextPV = pv[1:]
+        self.__gomoku.make_move(i, j, state)
+        try:
+            transfer_score, transfer_steps, temp_loc_pat_sco = \
+                self.alpha_beta_prune(depth - 1, nextState, -beta,
+                                      -alpha, 1, nextPV)
+        finally:
+            self.__gomoku.undo_move()
+        results = [(0, -transfer_score, alpha, transfer_steps,
+                   temp_loc_pat_sco)]
+
+        with self.__sharedLock:
+            self.__sharedAlpha.value = max(alpha, -transfer_score)
+            self.__sharedIndex.value = 0
+
+        if -transfer_score <= beta:
+            cells = bytes(self.__gomoku.get_board())
+            futures = [self.__pool.submit(_search_root_move, (cells,
+                       self.__size, state.value, depth, number,
+                       moves[number], beta, self.__deadline,
+                       self.__options, self.__searches)) for number in
+                       range(1,
+                       len(moves))]
+            try:
+                results += [future.result() for future in futures]
+            except SearchTimeout:
+                for future in futures:
+                    future.cancel()
+                raise
+
+        # replay the root loop in move order, a score is only known
+        # exactly when it is above the alpha it was searched with
+        steps=[]
+        loc_pat_sco=[]
+        for (number, temp_score, bound, transfer_steps,
+             temp_loc_pat_sco) in results:
+            if temp_score <= bound:
+                continue
+            transfer_steps.append(moves[number])
+            if temp_score > beta:
+                steps.append(transfer_steps)
+                loc_pat_sco.append(temp_loc_pat_sco)
+                return beta,steps,loc_pat_sco
+            if temp_score > alpha:
+                alpha = temp_score
+                (self.__currentI, self.__currentJ) = moves[number]
+                steps.append(transfer_steps)
+                loc_pat_sco.append(temp_loc_pat_sco)
+        return alpha,steps,loc_pat_sco
+
+    def iterative_deepening(self, time_budget, max_depth=None):
+        '''
+        Search depth 1, 2, 3, ... until time_budget seconds are used
+        up, each iteration trying the previous best line first. Returns
+        (score, steps, loc_pat_sco) of the deepest finished iteration
+        and leaves its move in currentI, currentJ.
+        '''
+        if max_depth is None:
+            max_depth = self.__gomoku.get_empty_count()
+        deadline = time.time() + time_budget
+
+        result = None
+        pv = None
+        depth = 1
+        # an unbounded board has no empty cell count to stop at
+        while max_depth is None or depth <= max_depth:
+            (self.__currentI, self.__currentJ) = (None, None)
+            try:
+                score,steps,loc_pat_sco = self.alpha_beta_prune(depth,
+                        self.__currentState, pv=pv)
+            except SearchTimeout:
+                break
+            finally:
+                self.__deadline = None
+            result = (score, steps, loc_pat_sco, self.__currentI,
+                      self.__currentJ)
+            self.__stats.depth = depth
+
+            # the root path of the chosen move, leaf first
+            if steps:
+                pv = [move for move in reversed(steps[-1])
+                      if move != (None, None)]
+
+            # depth 1 always finishes, deeper ones stop at the deadline
+            if time.time() >= deadline:
+                break
+            self.__deadline = deadline
+            depth += 1
+
+        (score, steps, loc_pat_sco, self.__currentI, self.__currentJ) = \
+            result
+        return score, steps, loc_pat_sco
+
     def first_step(self):
-        #AI plays in the center
-        self.__gomoku.set_chessboard_state(7, 7, self.__currentState)
+        #AI plays the book move, else in the center
+        move = self.__book_move()
+        if move is None and self.__size is None:
+            move = (0, 0)
+        elif move is None:
+            move = (self.__size // 2, self.__size // 2)
+        self.__gomoku.set_chessboard_state(move[0], move[1],
+                self.__currentState)
         return True
 
-    def one_step(self):
-        
-        # ????? why not use ''generate' function
-        for i in range(N):
-            for j in range(N):
-                if self.__gomoku.get_chessMap()[i][j] \
-                    != BoardState.EMPTY:
-                    continue  # only search for available spots
-
-                ## ??i ,j is a position which could be five in a row,-----!!!1
-                if self.has_checkmate(self.__currentState, i, j):
-                    #print ('has checkmate')
+    def __book_move(self):
+        if self.__book is None:
+            return None
+        return self.__book.probe(self.__gomoku, self.__currentState)
+
+    def one_step(self, time_budget=None):
+        '''
+        Play one move. time_budget (seconds) overrides the budget given
+        to the constructor, without one the search has a fixed depth.
+        Returns the SearchStats of the move, false when no move was
+        played.
+        '''
+        stats = SearchStats(self.__timing if callable(self.__timing)
+                            else None)
+        self.__stats = stats
+        nodes = self.__nodes
+        (hits, misses) = (self.__lineCache.get_hits(),
+                          self.__lineCache.get_misses())
+        start = time.perf_counter()
+        if time_budget is None:
+            time_budget = self.__timeBudget
+
+        # one deadline for the whole move: waiting for the ponder
+        # search and any search after it share the budget
+        deadline = None
+        if time_budget is not None:
+            deadline = time.time() + time_budget
+        pondered = self.__take_ponder(deadline)
+        stats.played = self.__play_step(deadline, pondered)
+        stats.nodes = self.__nodes - nodes
+        stats.lineHits = self.__lineCache.get_hits() - hits
+        stats.lineMisses = self.__lineCache.get_misses() - misses
+        stats.elapsed = time.perf_counter() - start
+        return stats
+
+    def __play_step(self, deadline, pondered):
+        stats = self.__stats
+        self.__pv = None
+        # only cells near a stone can make five or four, the frontier
+        # holds them all, visited in board order
+        for (i, j) in self.__gomoku.get_frontier_cells():
+
+            ## ??i ,j is a position which could be five in a row,-----!!!1
+            if self.has_checkmate(self.__currentState, i, j):
+                #print ('has checkmate')
+                self.__gomoku.set_chessboard_state(i, j,
+                        self.__currentState)
+                (stats.move, stats.reason) = ((i, j), 'five')
+                return True
+            ##  without neighbor, jump this position
+            if not self.has_neighbor(BoardState.EMPTY, i, j):
+                continue
+            ## Firstly check self, then check opponent ???
+            '''
+            if self.has_check(self.__currentState
+            '''
+            TrueOrFalse_hasCheck, fourStore=self.has_check(self.__currentState, i, j)#7022
+            if TrueOrFalse_hasCheck:
+                safe = not self.opponent_has_checkmate(self.__currentState)
+                self.explain({'type': 'check', 'move': (i, j),
+                              'cells': fourStore, 'safe': safe})#####7022
+                if safe:
+                    ## set a move
                     self.__gomoku.set_chessboard_state(i, j,
                             self.__currentState)
+                    (stats.move, stats.reason) = ((i, j), 'check')
                     return True
-                ##  without neighbor, jump this position
-                if not self.has_neighbor(self.__gomoku.get_chessMap()[i][j],
-                        i, j):
-                    continue
-                ## Firstly check self, then check opponent ???
-                '''
-                if self.has_check(self.__currentState
-                '''
-                TrueOrFalse_hasCheck, fourStore=self.has_check(self.__currentState, i, j)#7022
-                if TrueOrFalse_hasCheck:
-                    print ('\n\n Gomoku AI has check and need to check if opponent already has one checkmate:')
-
-                    if self.opponent_has_checkmate(self.__currentState) \
-                        is True:
-
-                        print ('Not safe,Opponent has checkmat, searching other moves...')
-                    elif self.opponent_has_checkmate(self.__currentState) \
-                        is False:
-                        ## set a move
-                        print ('\033[0;35m   Opponent does not have checkmate.\033[0m')
-                        print('\n It is safe for Gomoku to make a move','(',i,',',j,')','to form \033[0;35munbroken four\033[0m in a row:\n',fourStore)#####7022
-                        
-                        
-                        self.__gomoku.set_chessboard_state(i, j,
-                                self.__currentState)
-                        return True
-        
-        # node is just a class
-        node = gomokuAI(self.__gomoku, self.__currentState,
-                        self.__depth)
         
-        #???????????? will next step be changed
-        score,steps,loc_pat_sco = self.alpha_beta_prune(node)#7022
+        # a known opening needs no search
+        move = self.__book_move()
+        if move is not None:
+            (i, j) = move
+            self.explain({'type': 'book', 'move': (i, j)})
+            self.__gomoku.set_chessboard_state(i, j,
+                    self.__currentState)
+            (stats.move, stats.reason) = ((i, j), 'book')
+            return True
+
+        # a forced win found by threat-space search, it sees far
+        # deeper than alpha_beta_prune; under a time budget it may use
+        # half of the time left, the search gets the rest
+        if self.__threats is not None:
+            start = time.perf_counter()
+            threatDeadline = None
+            if deadline is not None:
+                now = time.time()
+                threatDeadline = now + max(0, deadline - now) / 2
+            line = self.__threats.solve(self.__currentState,
+                                        deadline=threatDeadline)
+            if self.__timing:
+                stats.add_time('threat_space', time.perf_counter() - start)
+            if line:
+                (i, j) = line[0]
+                self.explain({'type': 'forced_win', 'line': line})
+                self.__gomoku.set_chessboard_state(i, j,
+                        self.__currentState)
+                (stats.move, stats.reason) = ((i, j), 'forced_win')
+                self.__pv = line
+                if self.__ponder:
+                    self.ponder()
+                return True
+
+        # the search plays and takes back moves on our own board
+        (self.__currentI, self.__currentJ) = (None, None)
+        self.new_search()
+        start = time.perf_counter()
+        if pondered is not None:
+            (score, steps, loc_pat_sco, self.__currentI,
+             self.__currentJ, stats.depth) = pondered
+            stats.pondered = True
+        elif deadline is not None:
+            score,steps,loc_pat_sco = self.iterative_deepening(max(0,
+                    deadline - time.time()), self.__depth)
+        else:
+            score,steps,loc_pat_sco = self.alpha_beta_prune(self.__depth,
+                    self.__currentState)#7022
+            stats.depth = self.__depth
+        if self.__timing:
+            stats.add_time('search', time.perf_counter() - start)
+        stats.score = score
         
         #self.print_explanation(steps,loc_pat_sco)
+
+        # the pattern matches of the paths print_explanation shows,
+        # replayed from the board the search started on
+        loc_pat_sco = [None] * len(steps)
+        if self.explains('paths'):
+            for n in range(max(0, len(steps) - 3), len(steps)):
+                loc_pat_sco[n] = self.path_loc_pat_sco(steps[n])
+
+        # the line the search expects, its reply is what we ponder on
+        if steps:
+            self.__pv = [move for move in reversed(steps[-1])
+                         if move != (None, None)]
         
         
         
-        (i, j) = (node.__currentI, node.__currentJ)
+        (i, j) = (self.__currentI, self.__currentJ)
         #print ('\n','\n','\n','score',score,' loc:',i,'-',j)
         
         # ??? is the next step an empty position
@@ -590,313 +1083,111 @@ class gomokuAI(object):
             
             if self.__gomoku.get_chessboard_state(i, j) \
                 != BoardState.EMPTY:
-                self.one_step()
+                return self.__play_step(deadline, None)
                 
             else:
                 
                 noAttackNoDefense=0
+                motivation = self.explains('motivation')
                 
                 #7022
-                before_move_attackOrDefense, defense_loc_pat_sco=self.threat_evaluate() #7022
-                
-                if before_move_attackOrDefense==2:
-                    print('\n\nMotivation of Gomoku AI: \033[0;35mDefense\033[0m')
-                    optimalMove=(i,j)
-                    
-                    self.loc_pat_sco_print(defense_loc_pat_sco['white'],optimalMove)
-                    
-                    noAttackNoDefense=2
+                if motivation:
+                    before_move_attackOrDefense, defense_loc_pat_sco=self.threat_evaluate() #7022
+                    if before_move_attackOrDefense==2:
+                        self.explain({'type': 'motivation',
+                                      'motivation': 'defense',
+                                      'move': (i, j),
+                                      'patterns': defense_loc_pat_sco['white']})
+                        noAttackNoDefense=2
             
                 #7022  
                 
                 
                 self.__gomoku.set_chessboard_state(i, j,
                         self.__currentState)
+                (stats.move, stats.reason) = ((i, j), 'search')
                 
 
                 #7022
-                after_move_attackOrDefense, attack_loc_pat_sco=self.threat_evaluate() #7022
-                
-                if after_move_attackOrDefense==1:
-                    print('\n\nMotivation of Gomoku AI: \033[0;35mAttack\033[0m')
-                    optimalMove=(i,j)
-                    self.loc_pat_sco_print(attack_loc_pat_sco['black'],optimalMove)
-                    
-                    noAttackNoDefense=1
-                
+                if motivation:
+                    after_move_attackOrDefense, attack_loc_pat_sco=self.threat_evaluate() #7022
+                    if after_move_attackOrDefense==1:
+                        self.explain({'type': 'motivation',
+                                      'motivation': 'attack',
+                                      'move': (i, j),
+                                      'patterns': attack_loc_pat_sco['black']})
+                        noAttackNoDefense=1
                 
-                if noAttackNoDefense==0:
-                    print('\n\nMotivation of Gomoku AI: \033[0;35mNo defense No attack\033[0m')
+                    if noAttackNoDefense==0:
+                        self.explain({'type': 'motivation',
+                                      'motivation': 'none',
+                                      'move': (i, j)})
                     
                 self.print_explanation(steps,loc_pat_sco)
                 #7022
+
+                if self.__ponder:
+                    self.ponder()
                 
                 
                 return True
             
         return False
     
-    def loc_pat_sco_print(self,loc_pat_sco,optimalMove):
-        
-        for temp in loc_pat_sco:
-                       for coordinate in temp[0]:
-                           #print(coordinate,piece_black)
-                           if coordinate==optimalMove:
-                               
-                               print('\033[1;34m',coordinate,'\033[0m',end='')
-                           else:
-                               print(coordinate,end='')
-                           
-                       print('   ',end='')
-                       
-                       for string in temp[1]:
-                           if string=='black':
-                              print('\033[0;34;47mblack\033[0m',' ',end='')
-                              
-                           elif string=='white':
-                              print('\033[0;32;47mwhite\033[0m',' ',end='')
-                              
-                           else:    
-                              print(string,' ',end='')
-                              
-                       print('   ',end='')
-                       
-                       if temp[2]==50000 or temp[2]==5000 or temp[2]==500 :
-                           
-                           print('\033[1;34;47m',temp[2],'\033[0m')
-                           
-                       elif temp[2]==100:
-                           
-                           print('\033[1;34m',temp[2],'\033[0m')
-                       else:
-                           print(temp[2])
-                           
-    def print_explanation(self,steps,loc_pat_sco):
-        
-        optimalSituationScore=0
-        for i in range(len(steps)):
-            white_Pattern=loc_pat_sco[len(steps)-1-i]['white']
-            black_Pattern=loc_pat_sco[len(steps)-1-i]['black']
-            
-            #steps like [[None,None,(white,white),(black,black)],[None,None,(white,white),(black,black)],...]
-            piece_white=steps[len(steps)-1-i][1]
-            piece_black=steps[len(steps)-1-i][2]
-            
-            
-            if i==0:
-               
-               print('\033[0;35mGomoku AI selects path:\033[0m\n','If GomokuAI(black) make a move :',
-                     '\033[1;34;47m',piece_black,'\033[0m','Optimal move of white:',
-                     '\033[1;32;47m',piece_white,'\033[0m',) 
-                
-            else:
-              print('\n\n\033[0;31;43mOther candidate path\033[0m',i,':\n','If next move of black:',
-                     '\033[1;34;47m',piece_black,'\033[0m','Optimal move of white:',
-                     '\033[1;32;47m',piece_white,'\033[0m',)  
-               
-            #Black 7022
-            print('\033[1;34;47mBlack Patterns:\033[0m')
-            print('\033[1;33mLocations\t\033[0m','\033[1;33mPattern\t\033[0m','\033[1;33mValue\t\033[0m')
-           
-            # if it is a force, do not compare with other move
-            forceOpponent=False
-            
-            #collect score 
-            blackScore=0
-            for temp in black_Pattern:
-                
-               blackScore += temp[2]
-               
-               for coordinate in temp[0]:
-                   #print(coordinate,piece_black)
-                   if coordinate==piece_black:
-                       print('\033[1;34;47m',coordinate,'\033[0m',end='')
-                   else:
-                       print(coordinate,end='')
-                   
-               print('   ',end='')
-               
-               for string in temp[1]:
-                   if string=='black':
-                      print('\033[0;34;47mblack\033[0m',' ',end='')
-                
-                   else:    
-                      print(string,' ',end='')
-               print('   ',end='')
-               
-               if temp[2]==5000 or temp[2]==500:
-                   forceOpponent=True
-                   print('\033[1;34;47m',temp[2],'\033[0m')
-                   
-               elif temp[2]==100:
-                   forceOpponent=True
-                   print('\033[1;34m',temp[2],'\033[0m')
-               else:
-                   print(temp[2])
-               
-               
-                   
-            
-               
-               
-            #White 7022
-            print('\033[1;32;47mWhite Patterns:\033[0m')
-            print('\033[1;33mLocations\t\033[0m','\033[1;33mPattern\t\033[0m','\033[1;33mValue\t\033[0m')
-           
-            whiteScore=0
-            
-            for temp in white_Pattern:
-               whiteScore += temp[2]
-               for coordinate in temp[0]:
-                   #print(coordinate,piece_black)
-                   if coordinate==piece_white:
-                       print('\033[1;32;47m',coordinate,'\033[0m',end='')
-                   else:
-                       print(coordinate,end='')
-                   
-               print('   ',end='')
-               
-               for string in temp[1]:
-                   if string=='white':
-                      print('\033[0;32;47mwhite\033[0m',' ',end='')
-                
-                   else:    
-                      print(string,' ',end='')
-               print('   ',end='')
-               
-               if temp[2]==50000 or temp[2]==5000 or temp[2]==500:
-                   forceOpponent=True
-                   print('\033[1;32;47m',temp[2],'\033[0m')
-                   
-               elif temp[2]==100:
-                   forceOpponent=True
-                   print('\033[1;32m',temp[2],'\033[0m')
-                   
-               elif temp[2]==1000000:
-                   forceOpponent=True
-                   print('\033[1;35;47m',temp[2],'\033[0m')
-                   
-               else:
-                   print(temp[2])
-            
-            score = blackScore - whiteScore
-            if i == 0:
-                optimalSituationScore=score
-                
-            if i != 0:
-                print('\033[0;31mConclusion:\033[0m')
-                print('\033[0;31mblackScoreSum - whiteScoreSum =',score, \
-                            'which is smaller than Optimal path:' ,optimalSituationScore,'\033[0m' ) 
-            else:
-                print('\033[0;31mConclusion:\033[0m')
-                print('\033[0;31mblackScoreSum - whiteScoreSum =',score,'\033[0m')
-               
-            #just output two candidate paths 
-            #2 represent defense
-            if i >= 2 :
-                break
-    
-    def threat_evaluate(self):
+    def path_loc_pat_sco(self, path, state=None):
         '''
-        Return the board score for Minimax Search.
+        Return the pattern matches of the leaf a search path ends in,
+        as the search used to keep them: the path is played from the
+        current board, state (the AI's by default) moving first. A
+        path cut short by a cutoff has no leaf and gets [].
         '''
-        #exhaustive search
-        vectors = []
-        
-        
-        #row
-        for i in range(N):
-            
-            #7022
-            row_locations=[]
-            for j in range(N):
-                row_locations.append((i,j))
-            #7022    
-                
-            vectors.append((self.__gomoku.get_chessMap()[i],row_locations))#7022
-            
-            
-            
-
-        #column
-        for j in range(N):
-            vectors.append(([self.__gomoku.get_chessMap()[i][j] for i in
-                           range(N)],[(i,j)for i in range(N)])) #7022
-        
-        vectors.append(([self.__gomoku.get_chessMap()[x][x] for x in
-                       range(N)],[(x,x)for x in range(N)]))#7022
-       
-        #
-        for i in range(1, N - 4):
-            # y=x dialogue below
-            v = ([self.__gomoku.get_chessMap()[x][x - i] for x in
-                 range(i, N)],[(x,x-i)for x in range(i, N)]) #7022
-            vectors.append(v)
-            # y=x dialogue above
-            v = ([self.__gomoku.get_chessMap()[y - i][y] for y in
-                 range(i, N)],[(y-i,y) for y in range(i,N)])#7022
-                
-            vectors.append(v)
-
-        vectors.append(([self.__gomoku.get_chessMap()[x][N - x - 1]
-                       for x in range(N)],[(x,N-x-1) for x in range(N)]))#7022
-
-        
-        
-        for i in range(4, N - 1):
-            v = ([self.__gomoku.get_chessMap()[x][i - x] for x in
-                 range(i, -1, -1)],[(x,i-x) for x in range(i,-1,-1)])#7022
-            vectors.append(v)
-            v = ([self.__gomoku.get_chessMap()[x][N - x + N - i - 2]
-                 for x in range(N - i - 1, N)],[(x,N - x + N - i - 2)for x in range(N - i - 1, N)])#7022
-            vectors.append(v)
+        if state is None:
+            state = self.__currentState
+        if not path or path[0] != (None, None):
+            return []
+        moves = path[:0:-1]
+        for (i, j) in moves:
+            self.__gomoku.make_move(i, j, state)
+            if state == BoardState.WHITE:
+                state = BoardState.BLACK
+            else:
+                state = BoardState.WHITE
+        try:
+            return self.__evaluator.loc_pat_sco()
+        finally:
+            for move in moves:
+                self.__gomoku.undo_move()
 
-        #board_score = 0
+    def print_explanation(self,steps,loc_pat_sco):
+        '''
+        Explain the chosen path and the next two candidates, steps
+        and loc_pat_sco as alpha_beta_prune returns them with the
+        last three pattern matches filled in.
+        '''
+        if not self.explains('paths'):
+            return
+        paths = []
+        for i in range(min(len(steps), 3)):
+            #steps like [[(None,None),...,(white,white),(black,black)],...], the AI move comes last
+            path = steps[len(steps)-1-i]
+            patterns = loc_pat_sco[len(steps)-1-i]
+            blackScore = sum(temp[2] for temp in patterns['black'])
+            whiteScore = sum(temp[2] for temp in patterns['white'])
+            paths.append({'black': path[-1], 'white': path[-2],
+                          'black_patterns': patterns['black'],
+                          'white_patterns': patterns['white'],
+                          'score': blackScore - whiteScore})
+        self.explain({'type': 'paths', 'paths': paths})
 
-       
-        loc_pat_sco ={'white':[],'black':[]}
-        
-        attackOrDefense = 0
-        
-        
-        for v in vectors:
-            
-            score,temp_loc_pat_sco = evaluate_vector_addLoc(v)
-            #print('scloc',score,'+',loc,'+',v)
-            
-            #7022
-            #5000 and 500 are score of threat sequence
-            for tup in temp_loc_pat_sco['black']:
-                
-                if tup[2]== 5000 or tup[2]== 500:
-                    loc_pat_sco['black'].append(tup)
-                    attackOrDefense = 1
-                    
-            for tup in temp_loc_pat_sco['white']:
-                if tup[2]== 5000 or tup[2]== 500:
-                    loc_pat_sco['white'].append(tup)
-                    attackOrDefense = 2
-                    
-                   
-            #7022
-            
-            '''
-            #7022
-            if score['black'] != 0:
-                loc_pat_sco['black'] += temp_loc_pat_sco['black']
-                
-            elif score['white'] != 0:
-                loc_pat_sco['white'] += temp_loc_pat_sco['white']
-            #7022
-            '''
-            
-            '''
-            if self.__currentState == BoardState.WHITE:
-                board_score += score['black'] - score['white']
-            else:
-                board_score += score['white'] - score['black']
-            '''
-        #return board_score,loc_pat_sco       
-        return attackOrDefense,loc_pat_sco
+    def threat_evaluate(self):
+        '''
+        Return (attackOrDefense, loc_pat_sco): the fours and open
+        threes of both colors, and 1 for attack or 2 for defense as
+        the last line holding one has black or white ones.
+        '''
+        if self.__vectorized is not None:
+            return self.__vectorized.threat_evaluate(
+                self.__gomoku.get_board())
+        return self.__threatIndex.threats()
             
             
@@ -0,0 +1,102 @@
+from boardstate import *
+from evaluate import *
+
+
+class IncrementalEvaluator(object):
+    '''
+    Keeps the score of every line of a Gomoku board and rescores only
+    the (at most four) lines through a cell when it changes. The board
+    calls update(i, j) on every change once the evaluator is attached.
+    Lines are scored through cache, a LineCache, by default one of its
+    own with the pattern scores of scores.
+    '''
+
+    def __init__(
+        self,
+        gomoku,
+        scores=None,
+        cache=None,
+        ):
+        self.__gomoku = gomoku
+        if cache is None:
+            cache = LineCache(scores=scores)
+        self.__cache = cache
+
+        # every line of the board, the contents of a line read as a
+        # tuple are its cache key, and the lines through every cell
+
+        geometry = gomoku.get_geometry()
+        self.__size = geometry.size
+        self.__lines = geometry.line_locations
+        self.__lineCodes = geometry.line_codes
+        self.__cellLines = [[number for (number, position) in lines]
+                            for lines in geometry.cell_lines]
+
+        # per line: white score and black score, the pattern matches
+        # are only built when loc_pat_sco asks for them
+
+        self.refresh()
+        gomoku.attach(self)
+
+    def close(self):
+        '''
+        Stop following the board.
+        '''
+        self.__gomoku.detach(self)
+
+    def refresh(self):
+        '''
+        Rescore every line from scratch.
+        '''
+        self.__lineScores = [(0, 0)] * len(self.__lines)
+        self.__white = 0
+        self.__black = 0
+        for number in range(len(self.__lines)):
+            self.__score_line(number)
+
+    def update(self, i, j):
+        for number in self.__cellLines[i * self.__size + j]:
+            self.__score_line(number)
+
+    def __score_line(self, number):
+        codes = self.__lineCodes[number](self.__gomoku.get_board())
+        (oldWhite, oldBlack) = self.__lineScores[number]
+        (white, black) = self.__cache.scores(codes)
+        self.__white += white - oldWhite
+        self.__black += black - oldBlack
+        self.__lineScores[number] = (white, black)
+
+    def score(self, state):
+        '''
+        Return the same board score as gomokuAI.evaluate for the
+        player to move.
+        '''
+        if state == BoardState.WHITE:
+            return self.__black - self.__white
+        else:
+            return self.__white - self.__black
+
+    def loc_pat_sco(self):
+        '''
+        Return the pattern matches gomokuAI.evaluate collects,
+        rebuilt from the lines that score.
+        '''
+        board = self.__gomoku.get_board()
+        loc_pat_sco = {'white': [], 'black': []}
+        for (number, (white, black)) in enumerate(self.__lineScores):
+            if not white and not black:
+                continue
+            codes = self.__lineCodes[number](board)
+            score, line_loc_pat_sco = self.__cache.line_addLoc(codes,
+                    self.__lines[number])
+
+            # the same choice of matches evaluate makes for a line
+
+            if black != 0:
+                loc_pat_sco['black'] += line_loc_pat_sco['black']
+            else:
+                loc_pat_sco['white'] += line_loc_pat_sco['white']
+        return loc_pat_sco
+
+    def evaluate(self, state):
+        return self.score(state), self.loc_pat_sco()
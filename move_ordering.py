@@ -0,0 +1,83 @@
+from boardstate import *
+
+
+class MoveOrderer(object):
+    '''
+    Move ordering for alpha_beta_prune. Moves are tried as: the
+    principal variation move, the hash move from the transposition
+    table, the killer moves of the ply, then by history score. Moves
+    that tie keep the order they came in, so the static
+    evaluate_point order of generate() only breaks ties.
+    '''
+
+    def __init__(self, killers_per_ply=2):
+        self.__killersPerPly = killers_per_ply
+        self.__killers = []
+
+        # history score per (BoardState value, (i, j)), missing for
+        # moves without cutoffs, so any board size or shape fits
+
+        self.__history = {}
+
+    def new_search(self):
+        '''
+        Forget the killers and age the history before a new search.
+        '''
+        self.__killers = []
+        self.__history = dict((key, score // 2) for (key, score) in
+                              self.__history.items() if score > 1)
+
+    def killers(self, ply):
+        if ply < len(self.__killers):
+            return self.__killers[ply]
+        return []
+
+    def history(self, state, i, j):
+        return self.__history.get((state.value, (i, j)), 0)
+
+    def order(
+        self,
+        moves,
+        state,
+        ply,
+        hash_move=None,
+        pv_move=None,
+        ):
+        '''
+        Return moves in the order they should be searched.
+        '''
+        killers = self.killers(ply)
+        history = self.__history
+        value = state.value
+
+        def key(move):
+            if move == pv_move:
+                return (0, 0, 0)
+            if move == hash_move:
+                return (1, 0, 0)
+            if move in killers:
+                return (2, killers.index(move), 0)
+            return (3, 0, -history.get((value, move), 0))
+
+        return sorted(moves, key=key)
+
+    def cutoff(
+        self,
+        move,
+        state,
+        ply,
+        depth,
+        ):
+        '''
+        Record a move that caused a beta cutoff.
+        '''
+        while len(self.__killers) <= ply:
+            self.__killers.append([])
+        killers = self.__killers[ply]
+        if move in killers:
+            killers.remove(move)
+        killers.insert(0, move)
+        del killers[self.__killersPerPly:]
+
+        key = (state.value, move)
+        self.__history[key] = self.__history.get(key, 0) + depth * depth
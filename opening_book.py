@@ -0,0 +1,213 @@
+#!/usr/bin/python
+# -*- coding: utf-8 -*-
+
+import argparse
+import json
+import mmap
+import struct
+from boardstate import *
+from gomoku import ZOBRIST_WHITE_TO_MOVE, zobrist_keys
+
+# file layout: the header (magic, version, board size, records), then
+# one record per (position, move) sorted by position key, the moves of
+# a position by weight, heaviest first
+
+MAGIC = b'GMKB'
+VERSION = 2
+HEADER = struct.Struct('<4sIII')
+RECORD = struct.Struct('<QHH')
+
+def book_key(board_hash, state):
+    '''
+    Key of the position board_hash with state to move, the key the
+    transposition table uses.
+    '''
+    if state == BoardState.WHITE:
+        return board_hash ^ ZOBRIST_WHITE_TO_MOVE
+    return board_hash
+
+def _symmetries(i, j, size):
+    '''
+    The 8 images of (i, j) under the rotations and reflections of a
+    size * size board, always in the same order.
+    '''
+    last = size - 1
+    return [(i, j), (j, last - i), (last - i, last - j), (last - j, i),
+            (i, last - j), (last - j, last - i), (last - i, j), (j, i)]
+
+
+class OpeningBook(object):
+    '''
+    Read-only opening book: position key -> moves with weights, in a
+    file mapped into memory, so opening it reads nothing but the
+    header and every lookup is a binary search over the records. A
+    book holds the positions of one board size.
+    '''
+
+    def __init__(self, path):
+        self.__file = open(path, 'rb')
+        self.__map = mmap.mmap(self.__file.fileno(), 0,
+                               access=mmap.ACCESS_READ)
+        (magic, version) = struct.unpack_from('<4sI', self.__map, 0)
+        if magic != MAGIC or version != VERSION:
+            self.close()
+            raise ValueError('%s is not an opening book of version %d'
+                             % (path, VERSION))
+        (magic, version, self.__size, self.__count) = \
+            HEADER.unpack_from(self.__map, 0)
+
+    def __len__(self):
+        return self.__count
+
+    def get_size(self):
+        return self.__size
+
+    def close(self):
+        self.__map.close()
+        self.__file.close()
+
+    def __key_at(self, index):
+        return RECORD.unpack_from(self.__map, HEADER.size + index
+                                  * RECORD.size)[0]
+
+    def lookup(self, key):
+        '''
+        Return the [((i, j), weight), ...] of key, heaviest first.
+        '''
+        (low, high) = (0, self.__count)
+        while low < high:
+            middle = (low + high) // 2
+            if self.__key_at(middle) < key:
+                low = middle + 1
+            else:
+                high = middle
+        moves = []
+        for index in range(low, self.__count):
+            (recordKey, move, weight) = RECORD.unpack_from(self.__map,
+                    HEADER.size + index * RECORD.size)
+            if recordKey != key:
+                break
+            moves.append((divmod(move, self.__size), weight))
+        return moves
+
+    def probe(
+        self,
+        gomoku,
+        state,
+        rng=None,
+        ):
+        '''
+        Return the book move of state on gomoku, or None: the heaviest
+        one, or one drawn by weight when rng (a random.Random) is
+        given. Moves onto a taken cell are skipped, and a board of
+        another size has none.
+        '''
+        if gomoku.get_size() != self.__size:
+            return None
+        moves = [(move, weight) for (move, weight) in
+                 self.lookup(book_key(gomoku.get_hash(), state)) if
+                 gomoku.get_chessboard_state(*move) == BoardState.EMPTY]
+        if not moves:
+            return None
+        if rng is None:
+            return moves[0][0]
+        return rng.choices([move for (move, weight) in moves],
+                           [weight for (move, weight) in moves])[0]
+
+
+class BookBuilder(object):
+    '''
+    Collects (position, move) counts of a size * size board and
+    writes them as a book file.
+    '''
+
+    def __init__(self, size=N):
+        self.__size = size
+        self.__zobrist = zobrist_keys(size)
+        self.__weights = {}
+
+    def add(
+        self,
+        key,
+        i,
+        j,
+        weight=1,
+        ):
+        entry = (key, i * self.__size + j)
+        self.__weights[entry] = self.__weights.get(entry, 0) + weight
+
+    def add_game(
+        self,
+        moves,
+        winner,
+        plies=10,
+        skip=0,
+        ):
+        '''
+        Add the moves winner (BoardState.BLACK or WHITE) played in the
+        first plies moves of a game, moves being played alternately
+        from black, in all 8 orientations of the board. The first skip
+        moves (a set opening) are played but not added.
+        '''
+        for symmetry in range(8):
+            board_hash = 0
+            state = BoardState.BLACK
+            for (number, (i, j)) in enumerate(moves[:plies]):
+                (i, j) = _symmetries(i, j, self.__size)[symmetry]
+                if state == winner and number >= skip:
+                    self.add(book_key(board_hash, state), i, j)
+                board_hash ^= self.__zobrist[i * self.__size + j][
+                    state.value]
+                state = BoardState.WHITE if state == BoardState.BLACK \
+                    else BoardState.BLACK
+
+    def write(self, path, min_weight=1):
+        '''
+        Write the moves of weight min_weight or more to path. Weights
+        above 65535 are capped.
+        '''
+        records = sorted(((key, -weight, move) for ((key, move),
+                         weight) in self.__weights.items() if weight
+                         >= min_weight))
+        with open(path, 'wb') as book:
+            book.write(HEADER.pack(MAGIC, VERSION, self.__size,
+                       len(records)))
+            for (key, weight, move) in records:
+                book.write(RECORD.pack(key, move, min(-weight, 65535)))
+        return len(records)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build an opening book '
+            'from arena results (JSON lines).')
+    parser.add_argument('results', nargs='+')
+    parser.add_argument('--output', default='book.bin')
+    parser.add_argument('--plies', type=int, default=10,
+                        help='moves of each game that go in the book')
+    parser.add_argument('--min-weight', type=int, default=2,
+                        help='wins a move needs to be kept')
+    parser.add_argument('--size', type=int, default=N,
+                        help='board size, games on other sizes are '
+                        'left out')
+    args = parser.parse_args(argv)
+
+    builder = BookBuilder(args.size)
+    for path in args.results:
+        with open(path) as results:
+            for line in results:
+                game = json.loads(line)
+                if game.get('size', N) != args.size:
+                    continue
+                if game['result'] == 'black':
+                    winner = BoardState.BLACK
+                elif game['result'] == 'white':
+                    winner = BoardState.WHITE
+                else:
+                    continue
+                builder.add_game([tuple(move) for move in
+                                 game['move_list']], winner, args.plies,
+                                 game.get('opening', 0))
+    print(builder.write(args.output, args.min_weight), 'moves written')
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,313 @@
+import pickle
+from boardstate import *
+from gomoku import ZOBRIST_WHITE_TO_MOVE
+from gomoku_ai import gomokuAI
+
+# proof or disproof number of a solved node
+
+INFINITY = 1 << 30
+
+
+class ProofBudgetExceeded(Exception):
+    '''
+    Raised inside prove() when the node budget runs out.
+    '''
+    pass
+
+
+class ProofNumberSearch(object):
+    '''
+    Depth-first proof-number search (df-pn). Proves whether attacker,
+    to move on gomoku, can force five in a row whatever the defender
+    plays. Moves come from gomokuAI.generate, fives from
+    has_checkmate; a side facing a five has to block it. width limits
+    the attacker to the first moves of generate; the defender always
+    tries them all, so a proof holds against any defence while a
+    disproof then only covers those attacking moves.
+
+    Proof and disproof numbers live in a fixed-size table of
+    table_size slots, so memory stays bounded on long proofs. The
+    table can be saved with checkpoint() and loaded with resume() to
+    carry a proof on later.
+    '''
+
+    def __init__(
+        self,
+        gomoku,
+        attacker,
+        table_size=1 << 18,
+        width=None,
+        ):
+        self.__gomoku = gomoku
+        self.__attacker = attacker
+        self.__width = width
+        self.__ai = gomokuAI(gomoku, attacker, 1, tt_size=0,
+                             threat_budget=0)
+
+        # one entry per slot: (key, proof, disproof, work), work being
+        # the nodes searched to get the numbers
+
+        self.__size = 1
+        while self.__size * 2 <= table_size:
+            self.__size *= 2
+        self.__mask = self.__size - 1
+        self.__slots = [None] * self.__size
+        self.__nodes = 0
+        self.__budget = None
+
+    def get_nodes(self):
+        '''
+        Nodes searched so far, over every call of prove().
+        '''
+        return self.__nodes
+
+    def close(self):
+        self.__ai.close()
+
+    def __key(self, state):
+        if state == BoardState.WHITE:
+            return self.__gomoku.get_hash() ^ ZOBRIST_WHITE_TO_MOVE
+        return self.__gomoku.get_hash()
+
+    def __probe(self, key, unknown=(1, 1, 0)):
+        '''
+        (proof, disproof, work) of key, unknown when not in the table.
+        '''
+        entry = self.__slots[key & self.__mask]
+        if entry is not None and entry[0] == key:
+            return entry[1:]
+        return unknown
+
+    def __store(
+        self,
+        key,
+        proof,
+        disproof,
+        work,
+        ):
+        slot = key & self.__mask
+        entry = self.__slots[slot]
+
+        # a solved entry only gives way to the same position, an
+        # unsolved one to a solved entry or to more work
+
+        if entry is None or entry[0] == key:
+            self.__slots[slot] = (key, proof, disproof, work)
+        elif entry[1] and entry[2] and (not proof or not disproof
+                                        or work >= entry[3]):
+            self.__slots[slot] = (key, proof, disproof, work)
+
+    def __moves(self, state):
+        '''
+        (wins, moves): wins is True when state can make five at once,
+        else moves holds the moves worth trying, only the blocks when
+        the opponent threatens five.
+        '''
+        if state == BoardState.WHITE:
+            opponent = BoardState.BLACK
+        else:
+            opponent = BoardState.WHITE
+        blocks = []
+        for (i, j) in self.__gomoku.get_frontier_cells():
+            if self.__ai.has_checkmate(state, i, j, False):
+                return (True, [])
+            if self.__ai.has_checkmate(opponent, i, j, False):
+                blocks.append((i, j))
+        if blocks:
+            return (False, blocks)
+        if state == self.__attacker:
+            return (False, self.__ai.generate(state)[:self.__width])
+        return (False, self.__ai.generate(state))
+
+    def __mid(
+        self,
+        state,
+        proofThreshold,
+        disproofThreshold,
+        ):
+        '''
+        Search the node of state to move until its proof number
+        reaches proofThreshold or its disproof number reaches
+        disproofThreshold.
+        '''
+        self.__nodes += 1
+        if self.__budget is not None and self.__nodes > self.__budget:
+            raise ProofBudgetExceeded()
+        nodes = self.__nodes
+        key = self.__key(state)
+        attacking = state == self.__attacker
+        if state == BoardState.WHITE:
+            nextState = BoardState.BLACK
+        else:
+            nextState = BoardState.WHITE
+
+        # a five wins, a full board is a draw and so not proved
+        (wins, moves) = self.__moves(state)
+        if wins or not moves:
+            if wins and attacking:
+                (proof, disproof) = (0, INFINITY)
+            else:
+                (proof, disproof) = (INFINITY, 0)
+            self.__store(key, proof, disproof, 1)
+            return (proof, disproof)
+
+        # hash of the position after each move, the opponent to move
+        childKeys = []
+        for (i, j) in moves:
+            childKeys.append(key ^ self.__gomoku.zobrist_key(i, j, state)
+                             ^ ZOBRIST_WHITE_TO_MOVE)
+
+        # the numbers of the children, as the table has them or, when
+        # their entry was since overwritten by another position, as
+        # their last search returned them
+
+        children = [self.__probe(childKey) for childKey in childKeys]
+        while True:
+            children = [self.__probe(childKey, child) for (childKey,
+                        child) in zip(childKeys, children)]
+            if attacking:
+                proof = min(child[0] for child in children)
+                disproof = min(INFINITY, sum(child[1] for child in
+                               children))
+            else:
+                proof = min(INFINITY, sum(child[0] for child in
+                            children))
+                disproof = min(child[1] for child in children)
+            if proof >= proofThreshold or disproof \
+                >= disproofThreshold:
+                break
+
+            # the child most likely to settle the node, with the
+            # thresholds that keep it the best one
+            if attacking:
+                order = sorted(range(len(children)), key=lambda n: \
+                               children[n][0])
+            else:
+                order = sorted(range(len(children)), key=lambda n: \
+                               children[n][1])
+            best = order[0]
+            if len(order) > 1:
+                second = children[order[1]]
+            else:
+                second = (INFINITY, INFINITY)
+            (childProof, childDisproof, work) = children[best]
+            if attacking:
+                childProofThreshold = min(proofThreshold, second[0] + 1)
+                childDisproofThreshold = min(INFINITY, disproofThreshold
+                        - disproof + childDisproof)
+            else:
+                childProofThreshold = min(INFINITY, proofThreshold
+                        - proof + childProof)
+                childDisproofThreshold = min(disproofThreshold,
+                        second[1] + 1)
+
+            (i, j) = moves[best]
+            childNodes = self.__nodes
+            self.__gomoku.make_move(i, j, state)
+            try:
+                (childProof, childDisproof) = self.__mid(nextState,
+                        childProofThreshold, childDisproofThreshold)
+            finally:
+                self.__gomoku.undo_move()
+            children[best] = (childProof, childDisproof, work
+                              + self.__nodes - childNodes)
+
+        self.__store(key, proof, disproof, self.__nodes - nodes + 1)
+        return (proof, disproof)
+
+    def prove(self, node_budget=None):
+        '''
+        Run the search from the current position. Returns True when
+        the attacker has a forced win, False when it has none, None
+        when node_budget more nodes were not enough; calling again
+        carries on from the table.
+        '''
+        if node_budget is None:
+            self.__budget = None
+        else:
+            self.__budget = self.__nodes + node_budget
+        try:
+            (proof, disproof) = self.__mid(self.__attacker, INFINITY,
+                    INFINITY)
+        except ProofBudgetExceeded:
+            return None
+        return proof == 0
+
+    def main_line(self):
+        '''
+        Best line of the proof (or disproof) found so far, as
+        (steps, loc_pat_sco) in the shape print_explanation takes:
+        one path, leaf first behind (None, None), the attacker's
+        first move last.
+        '''
+        state = self.__attacker
+        line = []
+        while True:
+            if state == BoardState.WHITE:
+                nextState = BoardState.BLACK
+            else:
+                nextState = BoardState.WHITE
+            (wins, moves) = self.__moves(state)
+            if wins:
+                for (i, j) in self.__gomoku.get_frontier_cells():
+                    if self.__ai.has_checkmate(state, i, j, False):
+                        self.__gomoku.make_move(i, j, state)
+                        line.append((i, j))
+                        state = nextState
+                        break
+                break
+
+            # follow the child closest to settling the node, among
+            # equals the one that took the most work, which on a solved
+            # node is the longest resistance of the losing side
+            best = None
+            for (i, j) in moves:
+                self.__gomoku.make_move(i, j, state)
+                (proof, disproof, work) = \
+                    self.__probe(self.__key(nextState))
+                self.__gomoku.undo_move()
+                if state == self.__attacker:
+                    order = (proof, -work)
+                else:
+                    order = (disproof, -work)
+                if work and (best is None or order < best[1]):
+                    best = ((i, j), order)
+            if best is None:
+                break
+            (i, j) = best[0]
+            self.__gomoku.make_move(i, j, state)
+            line.append((i, j))
+            state = nextState
+
+        score, loc_pat_sco = self.__ai.negate(state)
+        for move in line:
+            self.__gomoku.undo_move()
+        if not line:
+            return [], []
+        return [[(None, None)] + line[::-1]], [loc_pat_sco]
+
+    def checkpoint(self, path):
+        '''
+        Save the table and node count to path.
+        '''
+        with open(path, 'wb') as checkpoint:
+            pickle.dump({
+                'root': self.__key(self.__attacker),
+                'attacker': self.__attacker.value,
+                'nodes': self.__nodes,
+                'slots': self.__slots,
+                }, checkpoint, pickle.HIGHEST_PROTOCOL)
+
+    def resume(self, path):
+        '''
+        Load a checkpoint of the same position and attacker.
+        '''
+        with open(path, 'rb') as checkpoint:
+            saved = pickle.load(checkpoint)
+        if saved['root'] != self.__key(self.__attacker) \
+            or saved['attacker'] != self.__attacker.value:
+            raise ValueError('checkpoint is of another position')
+        self.__nodes = saved['nodes']
+        self.__slots = saved['slots']
+        self.__size = len(self.__slots)
+        self.__mask = self.__size - 1
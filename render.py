@@ -10,8 +10,19 @@ IMAGE_PATH = 'UI/'
 WIDTH = 540
 HEIGHT = 540
 MARGIN = 22
-GRID = (WIDTH - 2 * MARGIN) / (N - 1)
 PIECE = 32
+FPS = 30
+
+# lines of the board drawn on chessboard.jpg, other sizes are drawn
+# over its colour
+
+IMAGE_SIZE = 15
+LINE_COLOR = (0, 0, 0)
+
+# events of a window shown again after being covered, pygame 2 sends
+# WINDOWEXPOSED and pygame 1 VIDEOEXPOSE
+
+EXPOSE_EVENTS = (VIDEOEXPOSE, getattr(pygame, 'WINDOWEXPOSED', VIDEOEXPOSE))
 
 
 class GameRender(object):
@@ -19,6 +30,14 @@ class GameRender(object):
     def __init__(self, gomoku):
         self.__gomoku = gomoku
 
+        # the board size is the one of gomoku, cells and pieces shrink
+        # to fit a bigger board in the same window
+
+        self.__size = gomoku.get_size()
+        self.__grid = (WIDTH - 2 * MARGIN) / (self.__size - 1)
+        self.__piece = min(PIECE, int(PIECE * self.__grid * (IMAGE_SIZE
+                           - 1) / (WIDTH - 2 * MARGIN)))
+
         # black starts first
 
         self.__currentPieceState = BoardState.BLACK
@@ -38,47 +57,119 @@ class GameRender(object):
                 + 'piece_black.png').convert_alpha()
         self.__ui_piece_white = pygame.image.load(IMAGE_PATH
                 + 'piece_white.png').convert_alpha()
+        if self.__size != IMAGE_SIZE:
+            self.__ui_chessboard = self.__draw_chessboard()
+        if self.__piece != PIECE:
+            size = (self.__piece, self.__piece)
+            self.__ui_piece_black = pygame.transform.smoothscale(
+                self.__ui_piece_black, size)
+            self.__ui_piece_white = pygame.transform.smoothscale(
+                self.__ui_piece_white, size)
+
+        # keeps the frame rate steady while the AI thinks
+
+        self.__clock = pygame.time.Clock()
+
+        # the board image with the stones on it, kept up to date from
+        # the cells the board reports changed; the screen is redrawn
+        # from it only where something changed
+
+        self.__layer = self.__ui_chessboard.copy()
+        self.__dirtyCells = set(range(self.__size * self.__size))
+        self.__fullRedraw = True
+
+        # the pieces and texts of the frame being drawn and of the
+        # last one shown, as (surface, position)
+
+        self.__overlays = []
+        self.__shownOverlays = []
+
+        # fonts by size and rendered texts by (text, size, color)
+
+        self.__fonts = {}
+        self.__texts = {}
+
+        gomoku.attach(self)
+
+    def __draw_chessboard(self):
+
+        # the board image without its lines, in its own colour, with
+        # the lines of this size drawn on
+
+        chessboard = pygame.Surface((WIDTH, HEIGHT)).convert()
+        chessboard.fill(self.__ui_chessboard.get_at((MARGIN // 2, MARGIN
+                        // 2)))
+        for n in range(self.__size):
+            offset = int(round(MARGIN + n * self.__grid))
+            pygame.draw.line(chessboard, LINE_COLOR, (MARGIN, offset),
+                             (WIDTH - MARGIN, offset))
+            pygame.draw.line(chessboard, LINE_COLOR, (offset, MARGIN),
+                             (offset, HEIGHT - MARGIN))
+        return chessboard
+
+    def update(self, i, j):
+
+        # called by the board whenever cell (i, j) changes
+
+        self.__dirtyCells.add(i * self.__size + j)
 
     def coordinate_transform_map2pixel(self, i, j):
 
         # transform chessMap coordinates to UI
 
-        return (MARGIN + j * GRID - PIECE / 2, MARGIN + i * GRID
-                - PIECE / 2)
+        return (MARGIN + j * self.__grid - self.__piece / 2, MARGIN + i
+                * self.__grid - self.__piece / 2)
 
     def coordinate_transform_pixel2map(self, x, y):
 
         # transform UI coordinates to chessMap
 
-        (i, j) = (int(round((y - MARGIN + PIECE / 2) / GRID)),
-                  int(round((x - MARGIN + PIECE / 2) / GRID)))
+        (i, j) = (int(round((y - MARGIN + self.__piece / 2)
+                  / self.__grid)), int(round((x - MARGIN + self.__piece
+                  / 2) / self.__grid)))
 
-        if i < 0 or i >= N or j < 0 or j >= N:
+        if i < 0 or i >= self.__size or j < 0 or j >= self.__size:
             return (None, None)
         else:
             return (i, j)
 
-    def draw_chess(self):
-
-        # board
+    def __cell_rect(self, k):
+        (x, y) = self.coordinate_transform_map2pixel(k // self.__size, k
+                % self.__size)
+        return pygame.Rect(int(x), int(y), self.__piece + 1, self.__piece
+                           + 1)
 
-        self.__screen.blit(self.__ui_chessboard, (0, 0))
-
-        # chess piece
-
-        for i in range(0, N):
-            for j in range(0, N):
-                (x, y) = self.coordinate_transform_map2pixel(i, j)
-                state = self.__gomoku.get_chessboard_state(i, j)
-                if state == BoardState.BLACK:
-                    self.__screen.blit(self.__ui_piece_black, (x, y))
-                elif state == BoardState.WHITE:
-                    self.__screen.blit(self.__ui_piece_white, (x, y))
-                else:
-
-                      # BoardState.EMPTY
+    def draw_chess(self):
 
-                    pass
+        # bring the changed cells of the stone layer up to date and
+        # start a new frame, the pieces and texts are drawn by display
+
+        self.__dirtyRects = []
+        for k in self.__dirtyCells:
+            rect = self.__cell_rect(k)
+            self.__layer.blit(self.__ui_chessboard, rect, rect)
+            (i, j) = divmod(k, self.__size)
+            (x, y) = self.coordinate_transform_map2pixel(i, j)
+            state = self.__gomoku.get_chessboard_state(i, j)
+            if state == BoardState.BLACK:
+                self.__layer.blit(self.__ui_piece_black, (x, y))
+            elif state == BoardState.WHITE:
+                self.__layer.blit(self.__ui_piece_white, (x, y))
+            self.__dirtyRects.append(rect)
+        self.__dirtyCells = set()
+        self.__overlays = []
+
+    def __font(self, size):
+        if size not in self.__fonts:
+            self.__fonts[size] = pygame.font.SysFont('Arial', size)
+        return self.__fonts[size]
+
+    def __text(self, text, size, color):
+        key = (text, size, color)
+        if key not in self.__texts:
+            self.__texts[key] = self.__font(size).render(text, True,
+                    color)
+        return self.__texts[key]
 
     def draw_mouse(self):
 
@@ -89,14 +180,15 @@ class GameRender(object):
         # chess piece moves with the mouse
 
         if self.__currentPieceState == BoardState.BLACK:
-            self.__screen.blit(self.__ui_piece_black, (x - PIECE / 2, y
-                               - PIECE / 2))
+            self.__overlays.append((self.__ui_piece_black, (x
+                                   - self.__piece // 2, y - self.__piece
+                                   // 2)))
         else:
-            self.__screen.blit(self.__ui_piece_white, (x - PIECE / 2, y
-                               - PIECE / 2))
+            self.__overlays.append((self.__ui_piece_white, (x
+                                   - self.__piece // 2, y - self.__piece
+                                   // 2)))
 
     def draw_result(self, result):
-        font = pygame.font.SysFont('Arial', 55)
         tips = 'Game Over:'
         if result == BoardState.BLACK:
             tips = tips + 'Black Wins'
@@ -104,8 +196,65 @@ class GameRender(object):
             tips = tips + 'White Wins'
         else:
             tips = tips + 'Draw'
-        text = font.render(tips, True, (0, 0, 255))
-        self.__screen.blit(text, (WIDTH / 2 - 200, HEIGHT / 2 - 50))
+        self.__overlays.append((self.__text(tips, 55, (0, 0, 255)),
+                               (WIDTH // 2 - 200, HEIGHT // 2 - 50)))
+
+    def draw_thinking(self):
+        self.__overlays.append((self.__text('AI thinking...', 24, (0, 0,
+                               255)), (WIDTH // 2 - 70, 0)))
+
+    def display(self):
+
+        # show the frame, redrawing only the changed cells and where
+        # the pieces and texts were and now are; a frame like the
+        # last one costs nothing
+
+        screen = self.__screen
+        if self.__fullRedraw:
+            screen.blit(self.__layer, (0, 0))
+            for (surface, position) in self.__overlays:
+                screen.blit(surface, position)
+            pygame.display.update()
+            self.__fullRedraw = False
+            self.__shownOverlays = self.__overlays
+            return
+
+        if not self.__dirtyRects and self.__overlays \
+            == self.__shownOverlays:
+            return
+        rects = list(self.__dirtyRects)
+        for (surface, position) in self.__shownOverlays \
+            + self.__overlays:
+            rects.append(surface.get_rect(topleft=position))
+        for rect in rects:
+            screen.blit(self.__layer, rect, rect)
+        for (surface, position) in self.__overlays:
+            screen.blit(surface, position)
+        pygame.display.update(rects)
+        self.__shownOverlays = self.__overlays
+
+    def tick(self):
+
+        # wait for the next frame
+
+        return self.__clock.tick(FPS)
+
+    def get_events(self, busy):
+
+        # the pending events; when nothing is busy, sleep until there
+        # is one instead of drawing frames that show nothing new
+
+        if busy:
+            events = pygame.event.get()
+        else:
+            events = [pygame.event.wait()] + pygame.event.get()
+
+        # a window shown again after being covered is drawn in full
+
+        for event in events:
+            if event.type in EXPOSE_EVENTS:
+                self.__fullRedraw = True
+        return events
 
     def one_step(self):
         (i, j) = (None, None)
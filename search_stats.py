@@ -0,0 +1,131 @@
+import time
+
+
+class SearchStats(object):
+    '''
+    What gomokuAI did to choose one move, as one_step returns it. It
+    is true when a move was played, so it can be tested like the True
+    or False one_step used to return.
+
+    Counters are always kept: nodes and leaves of alpha_beta_prune,
+    beta cutoffs by the index of the move that caused them (0 being
+    the first move tried), transposition table probes and hits, line
+    cache hits and misses, and
+    the nodes expanded and children searched at every ply, from which
+    branching() works out the branching factor. Nodes searched by the
+    worker processes of a parallel search are not counted.
+
+    seconds holds the time spent per phase, only when the AI was
+    created with timing on: generate, evaluate_point (also part of
+    generate), evaluate (scoring the leaves), threat_space and search.
+    '''
+
+    def __init__(self, hook=None):
+        self.played = False
+        self.move = None
+        self.reason = None
+        self.score = None
+        self.depth = None
+        self.pondered = False
+        self.elapsed = 0.0
+
+        self.nodes = 0
+        self.leaves = 0
+        self.cutoffs = {}
+        self.tableProbes = 0
+        self.tableHits = 0
+        self.lineHits = 0
+        self.lineMisses = 0
+        self.expanded = {}
+        self.children = {}
+
+        self.seconds = {}
+        self.__hook = hook
+
+    def __bool__(self):
+        return self.played
+
+    def add_time(self, phase, seconds):
+        '''
+        Add seconds to phase and pass them on to the timing hook.
+        '''
+        self.seconds[phase] = self.seconds.get(phase, 0.0) + seconds
+        if self.__hook is not None:
+            self.__hook(phase, seconds)
+
+    def branching(self):
+        '''
+        {ply: children searched per node expanded}.
+        '''
+        return dict((ply, self.children.get(ply, 0) / self.expanded[ply])
+                    for ply in sorted(self.expanded) if self.expanded[ply])
+
+    def table_hit_rate(self):
+        '''
+        Share of transposition table probes that found the position,
+        None when the table was not probed.
+        '''
+        if not self.tableProbes:
+            return None
+        return self.tableHits / self.tableProbes
+
+    def line_hit_rate(self):
+        '''
+        Share of line cache lookups that hit, None without lookups.
+        '''
+        if not self.lineHits + self.lineMisses:
+            return None
+        return self.lineHits / (self.lineHits + self.lineMisses)
+
+    def first_move_cutoff_rate(self):
+        '''
+        Share of beta cutoffs caused by the first move tried, a
+        measure of the move ordering; None without cutoffs.
+        '''
+        total = sum(self.cutoffs.values())
+        if not total:
+            return None
+        return self.cutoffs.get(0, 0) / total
+
+    def as_dict(self):
+        return {
+            'played': self.played,
+            'move': self.move,
+            'reason': self.reason,
+            'score': self.score,
+            'depth': self.depth,
+            'pondered': self.pondered,
+            'elapsed': self.elapsed,
+            'nodes': self.nodes,
+            'leaves': self.leaves,
+            'cutoffs': dict(self.cutoffs),
+            'table_probes': self.tableProbes,
+            'table_hits': self.tableHits,
+            'table_hit_rate': self.table_hit_rate(),
+            'line_hits': self.lineHits,
+            'line_misses': self.lineMisses,
+            'line_hit_rate': self.line_hit_rate(),
+            'branching': self.branching(),
+            'seconds': dict(self.seconds),
+            }
+
+    def __repr__(self):
+        return 'SearchStats(move=%r, reason=%r, nodes=%d, leaves=%d, ' \
+            'elapsed=%.3f)' % (self.move, self.reason, self.nodes,
+                               self.leaves, self.elapsed)
+
+
+def timed(function, phase, get_stats):
+    '''
+    Wrap function so every call adds its time to phase of the
+    SearchStats get_stats() returns.
+    '''
+
+    def timed_function(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            get_stats().add_time(phase, time.perf_counter() - start)
+
+    return timed_function
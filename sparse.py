@@ -0,0 +1,718 @@
+import bisect
+import random
+from itertools import repeat
+from boardstate import *
+from evaluate import *
+from geometry import DIRECTIONS
+from gomoku import zobrist_keys
+
+# lines are keyed (axis, offset): rows by i, columns by j, diagonals
+# by j - i and anti-diagonals by i + j. A cell's position on its row is
+# j, on every other line i.
+
+ROW = 0
+COLUMN = 1
+DIAGONAL = 2
+ANTI = 3
+
+# empty cells kept before the first and after the last stone of a
+# segment, enough for every window holding a stone, plus one after it
+# so the last window, which evaluate_line leaves out, is empty. Stones
+# further apart than GAP start a new segment.
+
+PAD_BEFORE = 5
+PAD_AFTER = 6
+GAP = PAD_BEFORE + PAD_AFTER
+
+# (i, j) steps to the cells one and two steps away along the axes
+
+NEAR = tuple((ydirection * step, xdirection * step) for (xdirection,
+             ydirection) in DIRECTIONS for step in (1, 2))
+
+# keys of the cells of an unbounded board, drawn per cell on first use
+
+_sparseKeys = {}
+
+def _cell_keys(i, j):
+    if (i, j) not in _sparseKeys:
+        rng = random.Random('zobrist %d %d' % (i, j))
+        _sparseKeys[(i, j)] = (0, rng.getrandbits(64), rng.getrandbits(64))
+    return _sparseKeys[(i, j)]
+
+def cell_lines(i, j):
+    '''
+    The (line, position) of the four lines through (i, j).
+    '''
+    return (((ROW, i), j), ((COLUMN, j), i), ((DIAGONAL, j - i), i),
+            ((ANTI, i + j), i))
+
+def line_cells(line, positions):
+    '''
+    The (i, j) at positions on line.
+    '''
+    (axis, offset) = line
+    if axis == ROW:
+        return [(offset, position) for position in positions]
+    if axis == COLUMN:
+        return [(position, offset) for position in positions]
+    if axis == DIAGONAL:
+        return [(position, position + offset) for position in positions]
+    return [(position, offset - position) for position in positions]
+
+
+class SparseGomoku(object):
+    '''
+    A board that only stores its stones: a dict (i, j) -> BoardState
+    value, with the stones of every line sorted by position. Nothing
+    is kept per cell of the board, so its cost grows with the stones
+    played, not with its area. size bounds it to size * size cells,
+    None leaves it unbounded (freestyle on an infinite board), any
+    (i, j) being a cell.
+
+    It has the interface of Gomoku the search uses, the frontier
+    holding (i, j) instead of flat indexes, and none of the flat board
+    buffer or Geometry tables. A bounded board hashes its stones with
+    the Zobrist keys of a Gomoku of its size.
+    '''
+
+    def __init__(self, size=None):
+        self.__size = size
+        if size is not None:
+            zobrist = zobrist_keys(size)
+            self.__keys = lambda i, j: zobrist[i * size + j]
+        else:
+            self.__keys = _cell_keys
+
+        self.__stones = {}
+        self.__lines = {}
+        self.__currentI = -1
+        self.__currentJ = -1
+        self.__currentState = BoardState.EMPTY
+        self.__hash = 0
+
+        # the empty cells with a stone within two steps, and the
+        # number of such stones of every cell that has some
+
+        self.__frontier = set()
+        self.__stonesNear = {}
+
+        self.__history = []
+        self.__observers = []
+
+    def attach(self, observer):
+        '''
+        Call observer.update(i, j) whenever cell (i, j) changes.
+        '''
+        self.__observers.append(observer)
+
+    def detach(self, observer):
+        self.__observers.remove(observer)
+
+    def get_size(self):
+        '''
+        Return the board size, None for an unbounded board.
+        '''
+        return self.__size
+
+    def is_inside(self, i, j):
+        size = self.__size
+        return size is None or 0 <= i < size and 0 <= j < size
+
+    def get_stones(self):
+        '''
+        Return the stones, (i, j) -> BoardState value.
+        '''
+        return self.__stones
+
+    def get_bounds(self):
+        '''
+        Return (top, left, bottom, right) of the bounding box of the
+        stones, None on an empty board.
+        '''
+        if not self.__stones:
+            return None
+        rows = [i for (i, j) in self.__stones]
+        columns = [j for (i, j) in self.__stones]
+        return (min(rows), min(columns), max(rows), max(columns))
+
+    def get_empty_count(self):
+        '''
+        Return the number of empty cells, None on an unbounded board.
+        '''
+        if self.__size is None:
+            return None
+        return self.__size * self.__size - len(self.__stones)
+
+    def get_last_move(self):
+        '''
+        Return the (i, j) of the last stone set, None before any.
+        '''
+        if self.__currentState == BoardState.EMPTY:
+            return None
+        return (self.__currentI, self.__currentJ)
+
+    def get_chessboard_state(self, i, j):
+        return STATES[self.__stones.get((i, j), 0)]
+
+    def zobrist_key(
+        self,
+        i,
+        j,
+        state,
+        ):
+        '''
+        Return the key a stone of state on (i, j) adds to the hash.
+        '''
+        return self.__keys(i, j)[state.value]
+
+    def get_hash(self):
+        '''
+        Return the Zobrist hash of the stones on the board.
+        '''
+        return self.__hash
+
+    def get_frontier(self):
+        '''
+        Return the set of empty cells (i, j) that have a stone within
+        two steps along a row, column or diagonal.
+        '''
+        return self.__frontier
+
+    def get_frontier_cells(self):
+        '''
+        Return the frontier in board order.
+        '''
+        return sorted(self.__frontier)
+
+    def has_stone_near(self, i, j):
+        '''
+        True when a stone lies within two steps of (i, j) along a
+        row, column or diagonal. Near the edge of a bounded board only
+        the cells gomokuAI.has_neighbor reads count: it gives up on an
+        axis at its first step off the board, other direction included.
+        '''
+        if (i, j) not in self.__stonesNear:
+            return False
+        size = self.__size
+        if size is None or 2 <= i < size - 2 and 2 <= j < size - 2:
+            return True
+        for axis in range(4):
+            for (xdirection, ydirection) in DIRECTIONS[2 * axis:2 * axis
+                    + 2]:
+                for step in (1, 2):
+                    cell = (i + ydirection * step, j + xdirection * step)
+                    if not self.is_inside(*cell):
+                        break
+                    if cell in self.__stones:
+                        return True
+                else:
+                    continue
+                break
+        return False
+
+    def __near(self, i, j):
+        cells = [(i + di, j + dj) for (di, dj) in NEAR]
+        if self.__size is None:
+            return cells
+        return [cell for cell in cells if self.is_inside(*cell)]
+
+    def __set_cell(
+        self,
+        i,
+        j,
+        value,
+        ):
+        '''
+        Write one cell, keeping the hash, the lines and the frontier
+        up to date.
+        '''
+        cell = (i, j)
+        old = self.__stones.get(cell, 0)
+        keys = self.__keys(i, j)
+        self.__hash ^= keys[old] ^ keys[value]
+        if value:
+            self.__stones[cell] = value
+        elif old:
+            del self.__stones[cell]
+
+        if not old and value:
+            for (line, position) in cell_lines(i, j):
+                bisect.insort(self.__lines.setdefault(line, []), position)
+            self.__frontier.discard(cell)
+            for near in self.__near(i, j):
+                self.__stonesNear[near] = self.__stonesNear.get(near, 0) \
+                    + 1
+                if near not in self.__stones:
+                    self.__frontier.add(near)
+        elif old and not value:
+            for (line, position) in cell_lines(i, j):
+                positions = self.__lines[line]
+                del positions[bisect.bisect_left(positions, position)]
+                if not positions:
+                    del self.__lines[line]
+            for near in self.__near(i, j):
+                self.__stonesNear[near] -= 1
+                if not self.__stonesNear[near]:
+                    del self.__stonesNear[near]
+                    self.__frontier.discard(near)
+            if cell in self.__stonesNear:
+                self.__frontier.add(cell)
+
+    def set_chessboard_state(
+        self,
+        i,
+        j,
+        state,
+        ):
+        if not self.is_inside(i, j):
+            raise IndexError('(%d, %d) is off the board' % (i, j))
+        self.__set_cell(i, j, state.value)
+        self.__currentI = i
+        self.__currentJ = j
+        self.__currentState = state
+        for observer in self.__observers:
+            observer.update(i, j)
+
+    def make_move(
+        self,
+        i,
+        j,
+        state,
+        ):
+        '''
+        Play a move that can be taken back with undo_move.
+        '''
+        self.__history.append((i, j, self.__currentI, self.__currentJ,
+                              self.__currentState))
+        self.set_chessboard_state(i, j, state)
+
+    def undo_move(self):
+        '''
+        Take back the last make_move and restore the previous last move.
+        '''
+        (i, j, lastI, lastJ, lastState) = self.__history.pop()
+        self.__set_cell(i, j, BoardState.EMPTY.value)
+        self.__currentI = lastI
+        self.__currentJ = lastJ
+        self.__currentState = lastState
+        for observer in self.__observers:
+            observer.update(i, j)
+
+    def copy(self):
+        '''
+        Return an independent board. Observers are not carried over.
+        '''
+        other = SparseGomoku(self.__size)
+        other.__stones = dict(self.__stones)
+        other.__lines = dict((line, list(positions)) for (line,
+                             positions) in self.__lines.items())
+        other.__currentI = self.__currentI
+        other.__currentJ = self.__currentJ
+        other.__currentState = self.__currentState
+        other.__hash = self.__hash
+        other.__frontier = set(self.__frontier)
+        other.__stonesNear = dict(self.__stonesNear)
+        return other
+
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def get_lines(self):
+        '''
+        Return the lines holding a stone.
+        '''
+        return self.__lines.keys()
+
+    def line_order(self, line):
+        '''
+        Sort key putting lines in the order gomokuAI.evaluate scans
+        them on a bounded board: rows, columns, then the diagonals
+        and the anti-diagonals from the main one outwards.
+        '''
+        (axis, offset) = line
+        if axis == DIAGONAL:
+            return (axis, abs(offset), offset > 0)
+        if axis == ANTI and self.__size is not None:
+            main = self.__size - 1
+            if offset == main:
+                return (axis, 0, 0, False)
+            return (axis, 1, -abs(offset - main), offset > main)
+        return line
+
+    def __line_range(self, line):
+        '''
+        (first, stop) of the positions of line on the board, None for
+        an unbounded end.
+        '''
+        size = self.__size
+        if size is None:
+            return (None, None)
+        (axis, offset) = line
+        if axis == ROW or axis == COLUMN:
+            return (0, size)
+        if axis == DIAGONAL:
+            return (max(0, -offset), min(size, size - offset))
+        return (max(0, offset - size + 1), min(size, offset + 1))
+
+    def __reversed_line(self, line):
+
+        # gomokuAI.evaluate reads the anti-diagonals above the main one
+        # upwards, so their last window is the one at the top
+
+        return line[0] == ANTI and self.__size is not None and line[1] \
+            < self.__size - 1
+
+    def is_reversed(self, line):
+        '''
+        True when gomokuAI.evaluate reads line backwards, from its
+        last position to its first.
+        '''
+        return self.__reversed_line(line)
+
+    def line_segments(self, line, backwards=None):
+        '''
+        Return the parts of line worth scoring as (codes, locations):
+        the cell values and (i, j) of every run of stones no more than
+        GAP apart, padded with the empty cells on either side, read
+        the way gomokuAI.evaluate reads the line, or backwards when
+        backwards is true. Their evaluate_line scores add up to the
+        score of the whole line read that way.
+        '''
+        positions = self.__lines.get(line)
+        if not positions:
+            return []
+        (first, stop) = self.__line_range(line)
+        if backwards is None:
+            backwards = self.__reversed_line(line)
+        if backwards:
+            (before, after) = (PAD_AFTER, PAD_BEFORE)
+        else:
+            (before, after) = (PAD_BEFORE, PAD_AFTER)
+
+        runs = []
+        start = previous = positions[0]
+        for position in positions[1:]:
+            if position - previous > GAP:
+                runs.append((start, previous))
+                start = position
+            previous = position
+        runs.append((start, previous))
+
+        stones = self.__stones
+        segments = []
+        for (low, high) in runs:
+            low -= before
+            high += after + 1
+            if first is not None:
+                (low, high) = (max(low, first), min(high, stop))
+            if backwards:
+                locations = line_cells(line, range(high - 1, low - 1, -1))
+            else:
+                locations = line_cells(line, range(low, high))
+            codes = tuple(map(stones.get, locations, repeat(0)))
+            segments.append((codes, locations))
+        if backwards:
+            segments.reverse()
+        return segments
+
+    def get_chess_result(self):
+        if self.connected_five(self.__currentI, self.__currentJ,
+                               self.__currentState):
+            return self.__currentState
+        else:
+            return BoardState.EMPTY
+
+    def direction_count(
+        self,
+        i,
+        j,
+        xdirection,
+        ydirection,
+        player,
+        ):
+        count = 0
+        player = player.value
+        # look four more steps on a certain direction
+        for step in range(1, 5):
+            if self.__stones.get((i + ydirection * step, j + xdirection
+                                 * step)) != player:
+                break
+            count += 1
+        return count
+
+    def connected_five(
+        self,
+        i,
+        j,
+        player,
+        ):
+
+        # four directions: horizontal, vertical, two diagonals
+
+        directions = [[(-1, 0), (1, 0)], [(0, -1), (0, 1)], [(-1, 1),
+                      (1, -1)], [(-1, -1), (1, 1)]]
+
+        for axis in directions:
+            axis_count = 1
+            for (xdirection, ydirection) in axis:
+                axis_count += self.direction_count(i, j, xdirection,
+                        ydirection, player)
+                if axis_count >= 5:
+                    return True
+
+        return False
+
+
+class SparseEvaluator(object):
+    '''
+    IncrementalEvaluator for a SparseGomoku: keeps the score of every
+    line holding a stone, scoring only its segments, and rescores the
+    four lines through a cell when it changes. Empty lines score
+    nothing and are not kept. On a bounded board the totals are the
+    ones gomokuAI.evaluate gives on a Gomoku with the same stones.
+    '''
+
+    def __init__(
+        self,
+        gomoku,
+        scores=None,
+        cache=None,
+        ):
+        self.__gomoku = gomoku
+        if cache is None:
+            cache = LineCache(scores=scores)
+        self.__cache = cache
+        self.refresh()
+        gomoku.attach(self)
+
+    def close(self):
+        '''
+        Stop following the board.
+        '''
+        self.__gomoku.detach(self)
+
+    def refresh(self):
+        '''
+        Rescore every line from scratch.
+        '''
+        self.__lineScores = {}
+        self.__forwardScores = {}
+        self.__white = 0
+        self.__black = 0
+        for line in list(self.__gomoku.get_lines()):
+            self.__score_line(line)
+
+    def update(self, i, j):
+        for (line, position) in cell_lines(i, j):
+            self.__score_line(line)
+            self.__forwardScores.pop(line, None)
+
+    def __line_scores(self, line, backwards=None):
+        (white, black) = (0, 0)
+        for (codes, locations) in self.__gomoku.line_segments(line,
+                backwards):
+            scores = self.__cache.scores(codes)
+            white += scores[0]
+            black += scores[1]
+        return white, black
+
+    def __score_line(self, line):
+        (white, black) = self.__line_scores(line)
+        (oldWhite, oldBlack) = self.__lineScores.pop(line, (0, 0))
+        self.__white += white - oldWhite
+        self.__black += black - oldBlack
+        if white or black:
+            self.__lineScores[line] = (white, black)
+
+    def score(self, state):
+        '''
+        Return the board score for the player to move, as
+        gomokuAI.evaluate does.
+        '''
+        if state == BoardState.WHITE:
+            return self.__black - self.__white
+        else:
+            return self.__white - self.__black
+
+    def point_score(
+        self,
+        i,
+        j,
+        state,
+        ):
+        '''
+        Return the evaluate_point score of (i, j): the scores for
+        state of the four lines through it.
+        '''
+        point_score = 0
+        for line in self.__point_lines(i, j):
+            if self.__gomoku.is_reversed(line):
+
+                # evaluate reads this line backwards, evaluate_point
+                # forwards: scored when asked, kept until it changes
+
+                if line not in self.__forwardScores:
+                    self.__forwardScores[line] = self.__line_scores(line,
+                            False)
+                (white, black) = self.__forwardScores[line]
+            else:
+                (white, black) = self.__lineScores.get(line, (0, 0))
+            if state == BoardState.WHITE:
+                point_score += white
+            else:
+                point_score += black
+        return point_score
+
+    def __point_lines(self, i, j):
+        '''
+        The lines evaluate_point reads for (i, j): the four through
+        it, except that left of the main anti-diagonal of a bounded
+        board it reads the anti-diagonal at the same distance from
+        the main one as (i, j) is from the main diagonal.
+        '''
+        lines = [line for (line, position) in cell_lines(i, j)]
+        size = self.__gomoku.get_size()
+        if size is not None and i + j < size - 1:
+            lines[3] = (ANTI, size - 1 - abs(i - j))
+        return lines
+
+    def loc_pat_sco(self):
+        '''
+        Return the pattern matches gomokuAI.evaluate collects, line
+        by line.
+        '''
+        loc_pat_sco = {'white': [], 'black': []}
+        for line in sorted(self.__lineScores,
+                           key=self.__gomoku.line_order):
+            (white, black) = self.__lineScores[line]
+            matches = {'white': [], 'black': []}
+            for (codes, locations) in self.__gomoku.line_segments(line):
+                score, segment_loc_pat_sco = self.__cache.line_addLoc(
+                    codes, locations)
+                matches['white'] += segment_loc_pat_sco['white']
+                matches['black'] += segment_loc_pat_sco['black']
+
+            # the same choice of matches evaluate makes for a line
+
+            if black != 0:
+                loc_pat_sco['black'] += matches['black']
+            else:
+                loc_pat_sco['white'] += matches['white']
+        return loc_pat_sco
+
+    def evaluate(self, state):
+        return self.score(state), self.loc_pat_sco()
+
+
+class SparseThreats(object):
+    '''
+    The ThreatIndex queries gomokuAI makes, answered straight from a
+    SparseGomoku: only the windows through stones are read, so there
+    is nothing to keep up to date between queries.
+    '''
+
+    def __init__(self, gomoku):
+        self.__gomoku = gomoku
+
+    def close(self):
+        pass
+
+    def has_five_or_four(self, state):
+        '''
+        True when some 5 cell window holds a five or a four of state.
+        '''
+        gomoku = self.__gomoku
+        stones = gomoku.get_stones()
+        value = state.value
+        for ((i, j), stone) in list(stones.items()):
+            if stone != value:
+                continue
+            for (di, dj) in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                for start in range(-4, 1):
+                    cells = [(i + di * step, j + dj * step) for step in
+                             range(start, start + 5)]
+                    if not (gomoku.is_inside(*cells[0])
+                            and gomoku.is_inside(*cells[-1])):
+                        continue
+                    (white, black, pattern) = PATTERN5_TABLE[encode_window(
+                        [stones.get(cell, 0) for cell in cells])]
+                    if pattern >= 0 and (white if state
+                            == BoardState.WHITE else black):
+                        return True
+        return False
+
+    def check(
+        self,
+        state,
+        i,
+        j,
+        ):
+        '''
+        The cells of the first _XXXX_ that state playing (i, j)
+        makes, walking each axis as gomokuAI.has_check does, or None.
+        '''
+        gomoku = self.__gomoku
+        stones = gomoku.get_stones()
+        four = [0] + [state.value] * 4 + [0]
+        directions = [[(-1, 0), (1, 0)], [(0, -1), (0, 1)], [(-1, 1),
+                      (1, -1)], [(-1, -1), (1, 1)]]
+        for axis in directions:
+            pattern = []
+            cells = []
+            for (xdirection, ydirection) in axis:
+
+                # steps -1 to 4, up to the edge of the board
+
+                for step in range(-1, 5):
+                    cell = (i + ydirection * step, j + xdirection * step)
+                    if not gomoku.is_inside(*cell):
+                        break
+                    pattern.append(stones.get(cell, 0))
+                    cells.append(cell)
+                if len(pattern) > 2:
+                    pattern[1] = state.value
+                if pattern == four:
+                    return cells
+        return None
+
+    def threats(self):
+        '''
+        (attackOrDefense, loc_pat_sco) as ThreatIndex.threats gives
+        them: the evaluate pattern matches worth 5000 or 500, line by
+        line, and 1 or 2 as the last line holding one has black or
+        white ones.
+        '''
+        gomoku = self.__gomoku
+        loc_pat_sco = {'white': [], 'black': []}
+        attackOrDefense = 0
+        for line in sorted(gomoku.get_lines(), key=gomoku.line_order):
+            matches = []
+            for (codes, locations) in gomoku.line_segments(line):
+                for (start, length, white, black, pattern) in \
+                    scan_line(codes):
+                    matches.append((length, start, locations, white,
+                                    black, pattern))
+
+            # a line lists its 5 cell windows before its 6 cell ones
+
+            lineThreat = 0
+            for (length, start, locations, white, black, pattern) in \
+                sorted(matches, key=lambda match: match[0]):
+                if length == 5:
+                    (white_patterns, black_patterns) = (WHITE_5PATTERNS,
+                            BLACK_5PATTERNS)
+                else:
+                    (white_patterns, black_patterns) = (WHITE_6PATTERNS,
+                            BLACK_6PATTERNS)
+                cells = list(locations[start:start + length])
+                if black in (5000, 500):
+                    loc_pat_sco['black'].append((cells,
+                            black_patterns[pattern], black))
+                    lineThreat = lineThreat or 1
+                elif white in (5000, 500):
+                    loc_pat_sco['white'].append((cells,
+                            white_patterns[pattern], white))
+                    lineThreat = 2
+            if lineThreat:
+                attackOrDefense = lineThreat
+        return attackOrDefense, loc_pat_sco
@@ -0,0 +1,296 @@
+'''
+The scalar scoring of the original gomokuAI, kept as the reference
+the faster evaluators are checked against: every window is turned
+into strings and compared with every pattern, lines are read off a
+chessMap of BoardState rows. Only the board size is a parameter.
+'''
+
+import random
+from boardstate import *
+from evaluate import *
+from gomoku import Gomoku
+
+
+def evaluate_vector(vector):
+    '''
+    Return the score for a vector (line or column or diagonal)
+    '''
+    return evaluate_vector_addLoc((vector, list(range(len(vector)))))[0]
+
+def evaluate_vector_addLoc(vector_value_locations):
+    '''
+    Return the score for a vector and its pattern matches.
+    '''
+    (vector, loc_vec) = vector_value_locations
+    string_list = enum_to_string(vector)
+    score = {'white': 0, 'black': 0}
+    loc_pat_sco = {'white': [], 'black': []}
+    length = len(string_list)
+
+    if length == 5:
+        for i in range(len(WHITE_5PATTERNS)):
+            if WHITE_5PATTERNS[i] == string_list:
+                score['white'] += WHITE_5SCORES[i]
+                loc_pat_sco['white'].append((loc_vec, WHITE_5PATTERNS[i],
+                                             WHITE_5SCORES[i]))
+            if BLACK_5PATTERNS[i] == string_list:
+                score['black'] += BLACK_5SCORES[i]
+                loc_pat_sco['black'].append((loc_vec, BLACK_5PATTERNS[i],
+                                             BLACK_5SCORES[i]))
+        return score, loc_pat_sco
+
+    # the last window of each length is never scored
+
+    for i in range(length - 5):
+        temp = string_list[i:i + 5]
+        loc_temp = list(loc_vec[i:i + 5])
+        for p in range(len(WHITE_5PATTERNS)):
+            if WHITE_5PATTERNS[p] == temp:
+                score['white'] += WHITE_5SCORES[p]
+                loc_pat_sco['white'].append((loc_temp, WHITE_5PATTERNS[p],
+                                             WHITE_5SCORES[p]))
+            if BLACK_5PATTERNS[p] == temp:
+                score['black'] += BLACK_5SCORES[p]
+                loc_pat_sco['black'].append((loc_temp, BLACK_5PATTERNS[p],
+                                             BLACK_5SCORES[p]))
+
+    for i in range(length - 6):
+        temp = string_list[i:i + 6]
+        loc_temp = list(loc_vec[i:i + 6])
+        for p in range(len(WHITE_6PATTERNS)):
+            if WHITE_6PATTERNS[p] == temp:
+                score['white'] += WHITE_6SCORES[p]
+                loc_pat_sco['white'].append((loc_temp, WHITE_6PATTERNS[p],
+                                             WHITE_6SCORES[p]))
+            if BLACK_6PATTERNS[p] == temp:
+                score['black'] += BLACK_6SCORES[p]
+                loc_pat_sco['black'].append((loc_temp, BLACK_6PATTERNS[p],
+                                             BLACK_6SCORES[p]))
+    return score, loc_pat_sco
+
+def vectors(chess_map):
+    '''
+    Every line evaluate scans as (cells, locations), in its order.
+    '''
+    N = len(chess_map)
+    lines = []
+    for i in range(N):
+        lines.append([(i, j) for j in range(N)])
+    for j in range(N):
+        lines.append([(i, j) for i in range(N)])
+    lines.append([(x, x) for x in range(N)])
+    for i in range(1, N - 4):
+        lines.append([(x, x - i) for x in range(i, N)])
+        lines.append([(y - i, y) for y in range(i, N)])
+    lines.append([(x, N - x - 1) for x in range(N)])
+    for i in range(4, N - 1):
+        lines.append([(x, i - x) for x in range(i, -1, -1)])
+        lines.append([(x, N - x + N - i - 2) for x in range(N - i - 1,
+                     N)])
+    return [([chess_map[i][j] for (i, j) in line], line) for line in
+            lines]
+
+def evaluate(chess_map, state):
+    '''
+    Return (board score for state to move, loc_pat_sco).
+    '''
+    board_score = 0
+    loc_pat_sco = {'white': [], 'black': []}
+    for v in vectors(chess_map):
+        score, temp_loc_pat_sco = evaluate_vector_addLoc(v)
+        if score['black'] != 0:
+            loc_pat_sco['black'] += temp_loc_pat_sco['black']
+        elif score['white'] != 0:
+            loc_pat_sco['white'] += temp_loc_pat_sco['white']
+        if state == BoardState.WHITE:
+            board_score += score['black'] - score['white']
+        else:
+            board_score += score['white'] - score['black']
+    return board_score, loc_pat_sco
+
+def point_vectors(chess_map, i, j):
+    '''
+    The four lines evaluate_point scores for (i, j).
+    '''
+    N = len(chess_map)
+    lines = [chess_map[i], [chess_map[y][j] for y in range(N)]]
+    if j > i:
+        lines.append([chess_map[x][x + j - i] for x in range(0, N - j
+                     + i)])
+    elif j == i:
+        lines.append([chess_map[x][x] for x in range(N)])
+    else:
+        lines.append([chess_map[x + i - j][x] for x in range(0, N - i
+                     + j)])
+    if i + j == N - 1:
+        lines.append([chess_map[x][N - 1 - x] for x in range(N)])
+    elif i + j < N - 1:
+        lines.append([chess_map[x][N - 1 - x - abs(i - j)] for x in
+                     range(N - abs(i - j))])
+    else:
+        lines.append([chess_map[x][N - 1 - x + i + j - N + 1] for x in
+                     range(i + j - N + 1, N)])
+    return lines
+
+def evaluate_point(chess_map, i, j, state):
+    '''
+    Return the point score of (i, j) for state.
+    '''
+    point_score = 0
+    for v in point_vectors(chess_map, i, j):
+        score = evaluate_vector(v)
+        if state == BoardState.WHITE:
+            point_score += score['white']
+        else:
+            point_score += score['black']
+    return point_score
+
+def threat_evaluate(chess_map):
+    '''
+    Return (attackOrDefense, loc_pat_sco) of the fours and open threes.
+    '''
+    loc_pat_sco = {'white': [], 'black': []}
+    attackOrDefense = 0
+    for v in vectors(chess_map):
+        score, temp_loc_pat_sco = evaluate_vector_addLoc(v)
+        for tup in temp_loc_pat_sco['black']:
+            if tup[2] == 5000 or tup[2] == 500:
+                loc_pat_sco['black'].append(tup)
+                attackOrDefense = 1
+        for tup in temp_loc_pat_sco['white']:
+            if tup[2] == 5000 or tup[2] == 500:
+                loc_pat_sco['white'].append(tup)
+                attackOrDefense = 2
+    return attackOrDefense, loc_pat_sco
+
+def has_neighbor(chess_map, i, j):
+    '''
+    Whether a stone is within two steps of (i, j), an axis given up at
+    its first step off the board, the other direction included.
+    '''
+    N = len(chess_map)
+    directions = [[(-1, 0), (1, 0)], [(0, -1), (0, 1)], [(-1, 1), (1,
+                  -1)], [(-1, -1), (1, 1)]]
+    for axis in directions:
+        for (xdirection, ydirection) in axis:
+            if xdirection != 0 and (j + xdirection < 0 or j + xdirection
+                                    >= N):
+                break
+            if ydirection != 0 and (i + ydirection < 0 or i + ydirection
+                                    >= N):
+                break
+            if chess_map[i + ydirection][j + xdirection] \
+                != BoardState.EMPTY:
+                return True
+            if xdirection != 0 and (j + xdirection * 2 < 0 or j
+                                    + xdirection * 2 >= N):
+                break
+            if ydirection != 0 and (i + ydirection * 2 < 0 or i
+                                    + ydirection * 2 >= N):
+                break
+            if chess_map[i + ydirection * 2][j + xdirection * 2] \
+                != BoardState.EMPTY:
+                return True
+    return False
+
+def direction_pattern(
+    chess_map,
+    i,
+    j,
+    xdirection,
+    ydirection,
+    ):
+    '''
+    The cells -1 to 4 steps from (i, j), stopping at the edge, and
+    their locations.
+    '''
+    N = len(chess_map)
+    pattern = []
+    fourStore = []
+    for step in range(-1, 5):
+        if xdirection != 0 and (j + xdirection * step < 0 or j
+                                + xdirection * step >= N):
+            break
+        if ydirection != 0 and (i + ydirection * step < 0 or i
+                                + ydirection * step >= N):
+            break
+        pattern.append(chess_map[i + ydirection * step][j + xdirection
+                       * step])
+        fourStore.append((i + ydirection * step, j + xdirection * step))
+    return pattern, fourStore
+
+def has_check(chess_map, state, i, j):
+    '''
+    Return (True, cells) when playing (i, j) makes an unblocked four,
+    as the original has_check found it, else (False, cells).
+    '''
+    directions = [[(-1, 0), (1, 0)], [(0, -1), (0, 1)], [(-1, 1), (1,
+                  -1)], [(-1, -1), (1, 1)]]
+    for axis in directions:
+        currentPattern = []
+        fourStore = []
+        for (xdirection, ydirection) in axis:
+            (pattern, spots) = direction_pattern(chess_map, i, j,
+                    xdirection, ydirection)
+            currentPattern += pattern
+            fourStore += spots
+            if len(currentPattern) > 2:
+                currentPattern[1] = state
+            if enum_to_string(currentPattern) == WHITE_6PATTERNS[0]:
+                return True, fourStore
+            if enum_to_string(currentPattern) == BLACK_6PATTERNS[0]:
+                return True, fourStore
+    return False, fourStore
+
+def has_five_or_four(chess_map, state):
+    '''
+    Whether any line holds a five or four pattern of state, every
+    window included.
+    '''
+    if state == BoardState.WHITE:
+        patterns = WHITE_5PATTERNS
+    else:
+        patterns = BLACK_5PATTERNS
+    for (vector, locations) in vectors(chess_map):
+        temp = enum_to_string(vector)
+        for pattern in patterns:
+            if sublist(pattern, temp):
+                return True
+    return False
+
+def random_position(size, stones, seed, spread=None):
+    '''
+    A Gomoku of size with stones random stones of both colors drawn
+    from seed, within spread of the centre (the whole board when
+    None) so that lines fill up.
+    '''
+    rng = random.Random(seed)
+    gomoku = Gomoku(size)
+    if spread is None:
+        (low, high) = (0, size - 1)
+    else:
+        (low, high) = (max(0, size // 2 - spread), min(size - 1, size
+                       // 2 + spread))
+    placed = 0
+    while placed < stones:
+        (i, j) = (rng.randint(low, high), rng.randint(low, high))
+        if gomoku.get_chessboard_state(i, j) == BoardState.EMPTY:
+            gomoku.set_chessboard_state(i, j, rng.choice((BoardState.BLACK,
+                                        BoardState.WHITE)))
+            placed += 1
+    return gomoku
+
+def line_position(size, cells, state):
+    '''
+    A Gomoku of size with state stones on cells.
+    '''
+    gomoku = Gomoku(size)
+    for (i, j) in cells:
+        gomoku.set_chessboard_state(i, j, state)
+    return gomoku
+
+def rows(gomoku):
+    '''
+    The board as lists of BoardState rows.
+    '''
+    return [list(row) for row in gomoku.get_chessMap()]
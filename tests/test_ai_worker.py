@@ -0,0 +1,85 @@
+import time
+import pytest
+from boardstate import *
+from gomoku import Gomoku
+from ai_worker import AIWorker
+from gomoku_ai import gomokuAI
+from explanation import QUIET
+
+
+def wait_move(worker, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        move = worker.poll_move()
+        if move is not None:
+            return move
+        time.sleep(0.01)
+    raise AssertionError('no result from the worker')
+
+def make_worker():
+    gomoku = Gomoku()
+    gomoku.set_chessboard_state(7, 7, BoardState.WHITE)
+    return AIWorker(gomoku, BoardState.BLACK, 1, threat_budget=0,
+                    verbosity=QUIET)
+
+def test_move_is_returned():
+    worker = make_worker()
+    worker.request_move()
+    (i, j, state) = wait_move(worker)
+    assert state == BoardState.BLACK and i is not None
+    assert not worker.is_thinking()
+    worker.close()
+
+def test_no_stone_is_reported():
+    worker = make_worker()
+    worker.get_ai().one_step = lambda : False
+    worker.request_move()
+    assert wait_move(worker) == (None, None, BoardState.BLACK)
+    assert not worker.is_thinking()
+    worker.close()
+
+def full_board(size=9):
+    # runs of at most two stones along every axis, so no five
+
+    gomoku = Gomoku(size)
+    for i in range(size):
+        for j in range(size):
+            if (j + 2 * i) % 4 < 2:
+                gomoku.set_chessboard_state(i, j, BoardState.BLACK)
+            else:
+                gomoku.set_chessboard_state(i, j, BoardState.WHITE)
+    return gomoku
+
+@pytest.mark.parametrize('make_board', [Gomoku, full_board],
+                         ids=['empty', 'full'])
+def test_board_without_moves(make_board):
+    gomoku = make_board()
+    before = bytes(gomoku.get_board())
+    ai = gomokuAI(gomoku, BoardState.BLACK, 2, verbosity=QUIET)
+    assert not ai.one_step()
+    assert bytes(gomoku.get_board()) == before
+    ai.close()
+
+    worker = AIWorker(gomoku, BoardState.BLACK, 2, verbosity=QUIET)
+    worker.request_move()
+    assert wait_move(worker) == (None, None, BoardState.BLACK)
+    worker.close()
+
+def test_search_error_is_raised():
+    worker = make_worker()
+
+    def fail():
+        raise RuntimeError('search failed')
+
+    worker.get_ai().one_step = fail
+    worker.request_move()
+    with pytest.raises(RuntimeError):
+        wait_move(worker)
+    assert not worker.is_thinking()
+
+    # the worker keeps serving requests
+
+    del worker.get_ai().one_step
+    worker.request_move()
+    assert wait_move(worker)[0] is not None
+    worker.close()
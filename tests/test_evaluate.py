@@ -0,0 +1,55 @@
+import itertools
+import pytest
+from boardstate import *
+from evaluate import *
+from explanation import QUIET
+from gomoku_ai import gomokuAI
+import reference
+
+
+SIZES = [15, 19, 9]
+
+def lines_of(length):
+    return itertools.product(range(3), repeat=length)
+
+@pytest.mark.parametrize('length', [5, 6, 7])
+def test_tables_match_pattern_lists(length):
+    for codes in lines_of(length):
+        vector = [STATES[value] for value in codes]
+        locations = [(0, j) for j in range(length)]
+        score = reference.evaluate_vector(vector)
+        assert evaluate_line(list(codes)) == (score['white'],
+                score['black'])
+        assert evaluate_line_addLoc(list(codes), locations) == \
+            reference.evaluate_vector_addLoc((vector, locations))
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('seed', range(3))
+def test_evaluate_matches_scalar(size, seed):
+    gomoku = reference.random_position(size, 25 + 10 * seed, seed, 5)
+    rows = reference.rows(gomoku)
+    for state in (BoardState.BLACK, BoardState.WHITE):
+        ai = gomokuAI(gomoku, state, 1, threat_budget=0,
+                      verbosity=QUIET)
+        assert ai.evaluate() == reference.evaluate(rows, state)
+        ai.close()
+
+@pytest.mark.parametrize('size', SIZES)
+def test_evaluate_point_matches_scalar(size):
+    gomoku = reference.random_position(size, 30, size, 5)
+    rows = reference.rows(gomoku)
+    ai = gomokuAI(gomoku, BoardState.BLACK, 1, threat_budget=0,
+                  verbosity=QUIET)
+    for i in range(size):
+        for j in range(size):
+            for state in (BoardState.BLACK, BoardState.WHITE):
+                assert ai.evaluate_point(i, j, state) == \
+                    reference.evaluate_point(rows, i, j, state)
+    ai.close()
+
+def test_last_window_is_skipped():
+    # a five ending a line lies in the last window, never scored
+
+    codes = [0] * 10 + [1] * 5
+    assert evaluate_line(codes) == (0, 5000)
+    assert evaluate_line([0] * 9 + [1] * 5 + [0])[1] >= 1000000
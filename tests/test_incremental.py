@@ -0,0 +1,79 @@
+import pytest
+from boardstate import *
+from incremental import IncrementalEvaluator
+import reference
+
+
+SIZES = [15, 19, 9]
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('seed', range(4))
+def test_score_matches_scalar_evaluate(size, seed):
+    gomoku = reference.random_position(size, 30 + 10 * seed, seed, 5)
+    evaluator = IncrementalEvaluator(gomoku)
+    rows = reference.rows(gomoku)
+    for state in (BoardState.BLACK, BoardState.WHITE):
+        assert evaluator.score(state) == reference.evaluate(rows,
+                state)[0]
+
+@pytest.mark.parametrize('size', SIZES)
+def test_score_follows_make_and_undo(size):
+    gomoku = reference.random_position(size, 20, size, 4)
+    evaluator = IncrementalEvaluator(gomoku)
+    before = evaluator.score(BoardState.BLACK)
+
+    cells = [(i, j) for i in range(size) for j in range(size)
+             if gomoku.get_chessboard_state(i, j) == BoardState.EMPTY]
+    state = BoardState.BLACK
+    for (i, j) in cells[::7]:
+        gomoku.make_move(i, j, state)
+        state = BoardState.WHITE if state == BoardState.BLACK \
+            else BoardState.BLACK
+        assert evaluator.score(state) == reference.evaluate(
+            reference.rows(gomoku), state)[0]
+    for (i, j) in cells[::7]:
+        gomoku.undo_move()
+    assert evaluator.score(BoardState.BLACK) == before
+
+def test_last_window_is_not_scored():
+    # five at the end of a row sits in the window evaluate skips
+
+    size = 15
+    gomoku = reference.line_position(size, [(7, j) for j in range(size
+            - 5, size)], BoardState.BLACK)
+    evaluator = IncrementalEvaluator(gomoku)
+    score = reference.evaluate(reference.rows(gomoku),
+                               BoardState.WHITE)[0]
+    assert evaluator.score(BoardState.WHITE) == score
+    assert score < 1000000
+
+# a row holding threes of both colors: evaluate keeps only the black
+# matches of a line that has any
+
+BOTH_COLORS = [((7, 1), BoardState.BLACK), ((7, 2), BoardState.BLACK),
+               ((7, 3), BoardState.BLACK), ((7, 8), BoardState.WHITE),
+               ((7, 9), BoardState.WHITE), ((7, 10), BoardState.WHITE),
+               ((3, 3), BoardState.WHITE), ((4, 3), BoardState.WHITE)]
+
+def test_matches_keep_black_before_white():
+    gomoku = reference.line_position(15, [], BoardState.BLACK)
+    for ((i, j), state) in BOTH_COLORS:
+        gomoku.set_chessboard_state(i, j, state)
+    evaluator = IncrementalEvaluator(gomoku)
+    expected = reference.evaluate(reference.rows(gomoku),
+                                  BoardState.BLACK)
+    assert evaluator.evaluate(BoardState.BLACK) == expected
+    assert expected[1]['black']
+    assert not [cells for (cells, pattern, score) in
+                expected[1]['white'] if all(i == 7 for (i, j) in cells)]
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_are_rebuilt_as_scalar_evaluate(size, seed):
+    gomoku = reference.random_position(size, 30 + 10 * seed, seed, 5)
+    evaluator = IncrementalEvaluator(gomoku)
+    gomoku.make_move(0, 0, BoardState.BLACK)
+    gomoku.undo_move()
+    for state in (BoardState.BLACK, BoardState.WHITE):
+        assert evaluator.evaluate(state) == reference.evaluate(
+            reference.rows(gomoku), state)
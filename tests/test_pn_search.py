@@ -0,0 +1,94 @@
+import pytest
+from boardstate import *
+from gomoku import Gomoku
+from pn_search import ProofNumberSearch
+import reference
+
+
+def position(cells):
+    # black to move with cells, white stones in far corners
+
+    gomoku = reference.line_position(15, cells, BoardState.BLACK)
+    for (i, j) in [(1, 1), (1, 13), (13, 1), (13, 13)][:len(cells)]:
+        gomoku.set_chessboard_state(i, j, BoardState.WHITE)
+    return gomoku
+
+def drawn_board():
+    # a 9 * 9 board with runs of two at most and two cells left
+
+    gomoku = Gomoku(9)
+    for i in range(9):
+        for j in range(9):
+            if (i, j) in [(4, 4), (4, 5)]:
+                continue
+            if (j + 2 * i) % 4 < 2:
+                gomoku.set_chessboard_state(i, j, BoardState.BLACK)
+            else:
+                gomoku.set_chessboard_state(i, j, BoardState.WHITE)
+    return gomoku
+
+SPLIT_THREE = [(7, 5), (7, 6), (7, 8)]
+BENT_FOUR = [(7, 7), (7, 8), (8, 7), (9, 7)]
+
+@pytest.mark.parametrize('cells', [SPLIT_THREE, BENT_FOUR])
+def test_proves_a_forced_win(cells):
+    search = ProofNumberSearch(position(cells), BoardState.BLACK,
+                               width=3)
+    assert search.prove(2000) is True
+    search.close()
+
+def test_disproves_a_drawn_board():
+    search = ProofNumberSearch(drawn_board(), BoardState.BLACK)
+    assert search.prove(2000) is False
+    search.close()
+
+@pytest.mark.parametrize('cells', [SPLIT_THREE, BENT_FOUR])
+def test_proves_with_a_colliding_table(cells):
+    # 8 slots: children keep overwriting each other's entries
+
+    search = ProofNumberSearch(position(cells), BoardState.BLACK,
+                               table_size=8, width=3)
+    assert search.prove(2000) is True
+    search.close()
+
+def test_checkpoint_and_resume(tmp_path):
+    path = str(tmp_path / 'proof.ckpt')
+    search = ProofNumberSearch(position(BENT_FOUR), BoardState.BLACK,
+                               width=3)
+    assert search.prove(3) is None
+    search.checkpoint(path)
+    nodes = search.get_nodes()
+    search.close()
+
+    resumed = ProofNumberSearch(position(BENT_FOUR), BoardState.BLACK,
+                                width=3)
+    resumed.resume(path)
+    assert resumed.get_nodes() == nodes
+    assert resumed.prove(2000) is True
+    resumed.close()
+
+    other = ProofNumberSearch(position(SPLIT_THREE), BoardState.BLACK)
+    with pytest.raises(ValueError):
+        other.resume(path)
+    other.close()
+
+def test_main_line_ends_in_five():
+    gomoku = position(SPLIT_THREE)
+    before = bytes(gomoku.get_board())
+    search = ProofNumberSearch(gomoku, BoardState.BLACK, width=3)
+    assert search.prove(2000)
+    (steps, loc_pat_sco) = search.main_line()
+    search.close()
+    assert bytes(gomoku.get_board()) == before
+    assert len(steps) == 1 and len(loc_pat_sco) == 1
+    assert steps[0][0] == (None, None)
+
+    # played from the attacker's first move, the line makes five
+
+    state = BoardState.BLACK
+    for (i, j) in steps[0][:0:-1]:
+        assert gomoku.get_chessboard_state(i, j) == BoardState.EMPTY
+        gomoku.set_chessboard_state(i, j, state)
+        state = BoardState.WHITE if state == BoardState.BLACK \
+            else BoardState.BLACK
+    assert gomoku.get_chess_result() == BoardState.BLACK
@@ -0,0 +1,45 @@
+import time
+from boardstate import *
+from gomoku import Gomoku
+from gomoku_ai import gomokuAI
+from explanation import QUIET
+
+
+def play_reply(ponder, budget, think):
+    '''
+    Let the AI move, wait think seconds, play the reply it expects
+    and return the SearchStats of its next move.
+    '''
+    gomoku = Gomoku()
+    for (i, j, state) in [(7, 7, BoardState.BLACK), (7, 8,
+                          BoardState.WHITE), (8, 8, BoardState.BLACK),
+                          (6, 6, BoardState.WHITE)]:
+        gomoku.set_chessboard_state(i, j, state)
+
+    # too deep for any search to finish in the budget
+
+    ai = gomokuAI(gomoku, BoardState.BLACK, 8, ponder=ponder,
+                  time_budget=budget, threat_budget=0, verbosity=QUIET)
+    try:
+        assert ai.one_step()
+        (i, j) = ai.get_pv()[1]
+        time.sleep(think)
+        gomoku.set_chessboard_state(i, j, BoardState.WHITE)
+        stats = ai.one_step()
+        assert stats
+        return stats
+    finally:
+        ai.close()
+
+def test_ponder_wait_shares_the_move_budget():
+    budget = 0.3
+    stats = play_reply(True, budget, 0)
+    assert stats.elapsed < 1.5 * budget
+
+def test_ponder_searches_at_least_as_deep():
+    budget = 0.3
+    plain = play_reply(False, budget, 0.6)
+    pondered = play_reply(True, budget, 0.6)
+    assert pondered.pondered
+    assert pondered.depth >= plain.depth >= 2
+    assert pondered.elapsed < 1.5 * budget
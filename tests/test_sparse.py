@@ -0,0 +1,99 @@
+import pytest
+from boardstate import *
+from gomoku import Gomoku
+from gomoku_ai import gomokuAI
+from sparse import SparseGomoku
+from explanation import QUIET
+import benchmark
+import reference
+
+
+SIZES = [15, 19, 9]
+
+def sparse_copy(gomoku):
+    size = gomoku.get_size()
+    sparse = SparseGomoku(size)
+    for i in range(size):
+        for j in range(size):
+            state = gomoku.get_chessboard_state(i, j)
+            if state != BoardState.EMPTY:
+                sparse.set_chessboard_state(i, j, state)
+    return sparse
+
+def assert_same_answers(dense, sparse):
+    size = dense.get_size()
+    assert sparse.get_hash() == dense.get_hash()
+    assert sparse.get_frontier_cells() == dense.get_frontier_cells()
+    for state in (BoardState.BLACK, BoardState.WHITE):
+        a = gomokuAI(dense, state, 1, threat_budget=0, verbosity=QUIET)
+        b = gomokuAI(sparse, state, 1, threat_budget=0, verbosity=QUIET)
+        assert b.evaluate() == a.evaluate()
+        assert b.threat_evaluate() == a.threat_evaluate()
+        assert b.opponent_has_checkmate(state) == \
+            a.opponent_has_checkmate(state)
+        assert b.generate() == a.generate()
+        for i in range(size):
+            for j in range(size):
+                assert b.has_neighbor(BoardState.EMPTY, i, j) == \
+                    a.has_neighbor(BoardState.EMPTY, i, j)
+                assert b.evaluate_point(i, j) == a.evaluate_point(i, j)
+                assert b.has_check(state, i, j) == a.has_check(state, i,
+                        j)
+        a.close()
+        b.close()
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('seed', range(3))
+def test_bounded_sparse_board_matches_dense(size, seed):
+    dense = reference.random_position(size, 12 + 12 * seed, seed)
+    assert_same_answers(dense, sparse_copy(dense))
+
+@pytest.mark.parametrize('size', SIZES)
+def test_sparse_board_follows_make_and_undo(size):
+    dense = reference.random_position(size, 16, size, 4)
+    sparse = sparse_copy(dense)
+    cells = [(i, j) for i in range(size) for j in range(size)
+             if dense.get_chessboard_state(i, j) == BoardState.EMPTY]
+    state = BoardState.BLACK
+    for (i, j) in cells[::11]:
+        dense.make_move(i, j, state)
+        sparse.make_move(i, j, state)
+        state = BoardState.WHITE if state == BoardState.BLACK \
+            else BoardState.BLACK
+    assert_same_answers(dense, sparse)
+    for (i, j) in cells[::11]:
+        dense.undo_move()
+        sparse.undo_move()
+    assert_same_answers(dense, sparse)
+
+@pytest.mark.parametrize('seed', range(4))
+def test_sparse_search_plays_the_dense_move(seed):
+    dense = reference.random_position(15, 10 + 4 * seed, seed, 5)
+    sparse = sparse_copy(dense)
+    moves = []
+    for gomoku in (dense, sparse):
+        ai = gomokuAI(gomoku, BoardState.BLACK, 2, threat_budget=0,
+                      verbosity=QUIET)
+        stats = ai.one_step()
+        ai.close()
+        moves.append((stats.move, stats.reason, stats.score))
+    assert moves[1] == moves[0]
+
+@pytest.mark.parametrize('board', [Gomoku, SparseGomoku])
+@pytest.mark.parametrize('cell', [(-1, 4), (4, 9), (9, 0), (0, -1)])
+def test_moves_off_a_bounded_board_are_refused(board, cell):
+    gomoku = board(9)
+    with pytest.raises(IndexError):
+        gomoku.set_chessboard_state(cell[0], cell[1], BoardState.BLACK)
+    assert not gomoku.is_inside(*cell)
+
+@pytest.mark.parametrize('sparse', [False, True])
+def test_benchmark_position_must_fit(sparse):
+    # kept centred, the position does not fit on a 4 * 4 board
+
+    moves = benchmark.CORPUS['knight'][1]
+    with pytest.raises(ValueError):
+        benchmark.position(moves, 4, sparse)
+    (gomoku, state) = benchmark.position(moves, 9, sparse)
+    assert gomoku.get_chessboard_state(4, 4) == BoardState.BLACK
+    assert state == BoardState.BLACK
@@ -0,0 +1,66 @@
+import pytest
+from boardstate import *
+from threat_index import ThreatIndex
+import reference
+
+
+SIZES = [15, 19, 9]
+
+def assert_matches_scalar(index, gomoku):
+    rows = reference.rows(gomoku)
+    assert index.threats() == reference.threat_evaluate(rows)
+    for state in (BoardState.BLACK, BoardState.WHITE):
+        assert index.has_five_or_four(state) == \
+            reference.has_five_or_four(rows, state)
+    size = gomoku.get_size()
+    for i in range(size):
+        for j in range(size):
+            for state in (BoardState.BLACK, BoardState.WHITE):
+                (check, cells) = reference.has_check(rows, state, i, j)
+                if check:
+                    assert index.check(state, i, j) == cells
+                else:
+                    assert index.check(state, i, j) is None
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('seed', range(3))
+def test_index_matches_scalar(size, seed):
+    gomoku = reference.random_position(size, 25 + 10 * seed, seed, 4)
+    index = ThreatIndex(gomoku)
+    assert_matches_scalar(index, gomoku)
+
+@pytest.mark.parametrize('size', SIZES)
+def test_index_follows_make_and_undo(size):
+    gomoku = reference.random_position(size, 20, size, 4)
+    index = ThreatIndex(gomoku)
+    cells = [(i, j) for i in range(size) for j in range(size)
+             if gomoku.get_chessboard_state(i, j) == BoardState.EMPTY]
+    state = BoardState.BLACK
+    for (i, j) in cells[::9]:
+        gomoku.make_move(i, j, state)
+        state = BoardState.WHITE if state == BoardState.BLACK \
+            else BoardState.BLACK
+    assert_matches_scalar(index, gomoku)
+    for (i, j) in cells[::9]:
+        gomoku.undo_move()
+    assert_matches_scalar(index, gomoku)
+
+# fixed positions of black stones: an open three, which has_check only
+# finds on one side, and the middle of a 3 cell corner diagonal,
+# which it walks both ways as 3 + 3 cells
+
+FIXED = [
+    [(7, 5), (7, 6), (7, 7)],
+    [(7, 5), (8, 6), (9, 7)],
+    [(1, 1), (2, 0)],
+    [(13, 13), (14, 12)],
+    [(1, 13), (0, 12)],
+    ]
+
+@pytest.mark.parametrize('cells', FIXED)
+def test_fixed_checks(cells):
+    gomoku = reference.line_position(15, cells, BoardState.BLACK)
+    index = ThreatIndex(gomoku)
+    assert_matches_scalar(index, gomoku)
+    assert any(index.check(BoardState.BLACK, i, j) for i in range(15)
+               for j in range(15))
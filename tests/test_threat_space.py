@@ -0,0 +1,36 @@
+import time
+from boardstate import *
+from gomoku import Gomoku
+from gomoku_ai import gomokuAI
+from threat_space import ThreatSpaceSearch
+from explanation import QUIET
+import reference
+
+
+def open_three():
+    # black to move with an open three, white far away
+
+    gomoku = reference.line_position(15, [(7, 5), (7, 6), (7, 7)],
+                                     BoardState.BLACK)
+    for (i, j) in [(1, 1), (1, 13), (13, 1)]:
+        gomoku.set_chessboard_state(i, j, BoardState.WHITE)
+    return gomoku
+
+def test_wins_within_the_default_budget():
+    line = ThreatSpaceSearch(open_three(), 50).solve(BoardState.BLACK)
+    assert line is not None
+    assert line[0] in [(7, 4), (7, 8)]
+
+def test_gives_up_at_the_deadline():
+    search = ThreatSpaceSearch(open_three(), 1000)
+    assert search.solve(BoardState.BLACK, deadline=time.time() - 1) \
+        is None
+
+def test_move_stays_within_the_time_budget():
+    gomoku = reference.random_position(15, 40, 3, 5)
+    budget = 0.2
+    ai = gomokuAI(gomoku, BoardState.BLACK, 8, threat_budget=1000,
+                  verbosity=QUIET)
+    stats = ai.one_step(time_budget=budget)
+    ai.close()
+    assert stats.elapsed < 1.5 * budget
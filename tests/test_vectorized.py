@@ -0,0 +1,64 @@
+import pytest
+from boardstate import *
+from explanation import QUIET
+import reference
+
+np = pytest.importorskip('numpy')
+from vectorized import VectorizedEvaluator
+from gomoku_ai import gomokuAI
+
+
+SIZES = [15, 19, 9]
+
+@pytest.mark.parametrize('size', SIZES)
+@pytest.mark.parametrize('seed', range(3))
+def test_matches_scalar(size, seed):
+    gomoku = reference.random_position(size, 25 + 10 * seed, seed, 5)
+    evaluator = VectorizedEvaluator(gomoku.get_geometry())
+    board = gomoku.get_board()
+    rows = reference.rows(gomoku)
+    for state in (BoardState.BLACK, BoardState.WHITE):
+        assert evaluator.evaluate(board, state) == \
+            reference.evaluate(rows, state)
+    assert evaluator.threat_evaluate(board) == \
+        reference.threat_evaluate(rows)
+
+def test_last_window_and_black_first():
+    # a five ending a row is never scored, and a row with threats of
+    # both colors lists its black ones first
+
+    gomoku = reference.line_position(15, [(0, j) for j in range(10,
+            15)] + [(7, 1), (7, 2), (7, 3)], BoardState.BLACK)
+    for j in (8, 9, 10):
+        gomoku.set_chessboard_state(7, j, BoardState.WHITE)
+    evaluator = VectorizedEvaluator(gomoku.get_geometry())
+    board = gomoku.get_board()
+    rows = reference.rows(gomoku)
+    assert evaluator.evaluate(board, BoardState.WHITE) == \
+        reference.evaluate(rows, BoardState.WHITE)
+    assert evaluator.threat_evaluate(board) == \
+        reference.threat_evaluate(rows)
+
+def test_batch_totals_match_scalar():
+    gomokus = [reference.random_position(15, 30, seed, 5) for seed in
+               range(4)]
+    evaluator = VectorizedEvaluator(gomokus[0].get_geometry())
+    (white, black) = evaluator.batch_totals([list(gomoku.get_board())
+            for gomoku in gomokus])
+    for (n, gomoku) in enumerate(gomokus):
+        score = reference.evaluate(reference.rows(gomoku),
+                                   BoardState.BLACK)[0]
+        assert int(white[n]) - int(black[n]) == score
+
+@pytest.mark.parametrize('seed', range(3))
+def test_score_set_matches_scalar_ai(seed):
+    # with another score set the vectorized AI scores as the scalar one
+
+    gomoku = reference.random_position(15, 30 + 10 * seed, seed, 5)
+    scalar = gomokuAI(gomoku, BoardState.BLACK, 1, scores='dong',
+                      verbosity=QUIET)
+    vectorized = gomokuAI(gomoku, BoardState.BLACK, 1, scores='dong',
+                          vectorized=True, verbosity=QUIET)
+    for state in (BoardState.BLACK, BoardState.WHITE):
+        assert vectorized.evaluate(state) == scalar.evaluate(state)
+    assert vectorized.threat_evaluate() == scalar.threat_evaluate()
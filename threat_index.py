@@ -0,0 +1,276 @@
+from boardstate import *
+from evaluate import *
+
+# axis of each board line, in the order gomokuAI.has_check tries
+# them: row, column, anti-diagonal, diagonal
+
+_AXIS_ROW = 0
+_AXIS_COLUMN = 1
+_AXIS_ANTI = 2
+_AXIS_DIAGONAL = 3
+
+def _check_table(first, last):
+    '''
+    For every 6 cell window code, the color whose stones fill cells
+    first to last with both ends of the window empty, else 0.
+    '''
+    table = [0] * 3 ** 6
+    for code in range(3 ** 6):
+        digits = []
+        rest = code
+        for p in range(6):
+            digits.insert(0, rest % 3)
+            rest //= 3
+        color = digits[first]
+        if color and digits[0] == 0 and digits[5] == 0 and \
+            digits[first:last + 1] == [color] * (last - first + 1):
+            table[code] = color
+    return table
+
+# has_check looks for _XXXX_ once the cell is played. In a window
+# running the same way as the line that is _XXX?_ with the cell at
+# offset 4, in a reversed one _?XXX_ with the cell at offset 1.
+
+CHECK_FORWARD = _check_table(1, 3)
+CHECK_REVERSED = _check_table(2, 4)
+
+_shortChecks = {}
+
+def short_checks(size):
+    '''
+    (cell, axis) -> (cell behind, cell ahead) for the middle cells of
+    3 cell diagonals of a size * size board. has_check walks their
+    axis both ways, the two 3 cell walks add up to 6 cells and are
+    matched against _XXXX_ too.
+    '''
+    if size in _shortChecks:
+        return _shortChecks[size]
+    checks = {}
+    directions = ((_AXIS_ROW, 0, -1), (_AXIS_COLUMN, -1, 0),
+                  (_AXIS_ANTI, 1, -1), (_AXIS_DIAGONAL, -1, -1))
+    inside = lambda i, j: 0 <= i < size and 0 <= j < size
+    for i in range(size):
+        for j in range(size):
+            for (axis, di, dj) in directions:
+                if inside(i + di, j + dj) and inside(i - di, j - dj) \
+                    and not inside(i + 2 * di, j + 2 * dj) \
+                    and not inside(i - 2 * di, j - 2 * dj):
+                    checks[(i * size + j, axis)] = ((i - di) * size + j
+                            - dj, (i + di) * size + j + dj)
+    _shortChecks[size] = checks
+    return checks
+
+
+class ThreatIndex(object):
+    '''
+    Index of the threats on a Gomoku board, per color: the 5 cell
+    windows holding a five or a four, the windows evaluate scores as
+    a four or an open three, and the cells that make an unblocked four
+    as has_check defines it. The board calls update(i, j) on every
+    change; the windows through changed cells are only rescored when
+    the index is next read, so moves made and taken back by the
+    search cost nothing more than recording the cell.
+    '''
+
+    def __init__(self, gomoku):
+        self.__gomoku = gomoku
+        size = gomoku.get_size()
+        self.__size = size
+        self.__shortChecks = short_checks(size)
+
+        # every 5 and 6 cell window of every line, by line in the
+        # order evaluate scans them: (line, length, cells, locations,
+        # scored by evaluate, runs against the has_check direction)
+
+        self.__windows = []
+        self.__cellWindows = [[] for k in range(size * size)]
+        lines = gomoku.get_geometry().line_locations
+        for (number, line) in enumerate(lines):
+            axis = self.__axis(line)
+            reversedLine = axis == _AXIS_ANTI and line[0][0] < line[-1][0]
+            for length in (5, 6):
+                for start in range(len(line) - length + 1):
+                    if len(line) == 5:
+                        locations = line
+                        scored = True
+                    else:
+                        locations = line[start:start + length]
+                        scored = start < len(line) - length
+                    window = (number, length, tuple(i * size + j for
+                              (i, j) in locations), locations, scored,
+                              axis, reversedLine)
+                    for k in window[2]:
+                        self.__cellWindows[k].append(len(self.__windows))
+                    self.__windows.append(window)
+
+        self.refresh()
+        gomoku.attach(self)
+
+    def __axis(self, line):
+        ((i0, j0), (i1, j1)) = (line[0], line[1])
+        if i0 == i1:
+            return _AXIS_ROW
+        if j0 == j1:
+            return _AXIS_COLUMN
+        if (i1 - i0) * (j1 - j0) < 0:
+            return _AXIS_ANTI
+        return _AXIS_DIAGONAL
+
+    def close(self):
+        '''
+        Stop following the board.
+        '''
+        self.__gomoku.detach(self)
+
+    def refresh(self):
+        '''
+        Rebuild the index from scratch.
+        '''
+        self.__codes = [None] * len(self.__windows)
+
+        # per BoardState value: number of windows matching a
+        # 5-pattern, scored windows worth 5000 or 500, and
+        # (cell, axis) -> window for has_check
+
+        self.__fiveWindows = [0, 0, 0]
+        self.__threatWindows = [set(), set(), set()]
+        self.__checks = [{}, {}, {}]
+        self.__dirty = set(range(self.__size * self.__size))
+
+    def update(self, i, j):
+        self.__dirty.add(i * self.__size + j)
+
+    def __sync(self):
+        if not self.__dirty:
+            return
+        numbers = set()
+        for k in self.__dirty:
+            numbers.update(self.__cellWindows[k])
+        self.__dirty = set()
+
+        board = self.__gomoku.get_board()
+        for number in numbers:
+            window = self.__windows[number]
+            code = 0
+            for k in window[2]:
+                code = code * 3 + board[k]
+            if code != self.__codes[number]:
+                if self.__codes[number] is not None:
+                    self.__classify(number, self.__codes[number], False)
+                self.__codes[number] = code
+                self.__classify(number, code, True)
+
+    def __classify(
+        self,
+        number,
+        code,
+        add,
+        ):
+        (line, length, cells, locations, scored, axis, reversedLine) = \
+            self.__windows[number]
+        if length == 5:
+            (white, black, pattern) = PATTERN5_TABLE[code]
+        else:
+            (white, black, pattern) = PATTERN6_TABLE[code]
+        if pattern >= 0:
+            for (color, score) in ((BoardState.BLACK.value, black),
+                                   (BoardState.WHITE.value, white)):
+                if not score:
+                    continue
+                if length == 5:
+                    self.__fiveWindows[color] += (1 if add else -1)
+                if scored and score in (5000, 500):
+                    if add:
+                        self.__threatWindows[color].add(number)
+                    else:
+                        self.__threatWindows[color].discard(number)
+
+        if length == 6:
+            if reversedLine:
+                (color, cell) = (CHECK_REVERSED[code], cells[1])
+            else:
+                (color, cell) = (CHECK_FORWARD[code], cells[4])
+            if color:
+                if add:
+                    self.__checks[color][(cell, axis)] = number
+                else:
+                    del self.__checks[color][(cell, axis)]
+
+    def has_five_or_four(self, state):
+        '''
+        True when some 5 cell window holds a five or a four of state.
+        '''
+        self.__sync()
+        return self.__fiveWindows[state.value] > 0
+
+    def check(
+        self,
+        state,
+        i,
+        j,
+        ):
+        '''
+        The cells of the first _XXXX_ (axes in has_check order) that
+        state playing (i, j) makes, walking the way has_check does,
+        or None.
+        '''
+        self.__sync()
+        checks = self.__checks[state.value]
+        k = i * self.__size + j
+        for axis in (_AXIS_ROW, _AXIS_COLUMN, _AXIS_ANTI,
+                     _AXIS_DIAGONAL):
+            number = checks.get((k, axis))
+            if number is not None:
+                (line, length, cells, locations, scored, axis,
+                 reversedLine) = self.__windows[number]
+                if reversedLine:
+                    return list(locations)
+                return list(reversed(locations))
+            if (k, axis) in self.__shortChecks:
+                (behind, ahead) = self.__shortChecks[(k, axis)]
+                board = self.__gomoku.get_board()
+                if board[behind] == 0 and board[k] == state.value \
+                    and board[ahead] == state.value:
+                    cells = [divmod(behind, self.__size), (i, j),
+                             divmod(ahead, self.__size)]
+                    return cells + cells[::-1]
+        return None
+
+    def threats(self):
+        '''
+        (attackOrDefense, loc_pat_sco) as threat_evaluate returns
+        them: the evaluate pattern matches worth 5000 or 500, line by
+        line, and 1 or 2 as the last line holding one has black or
+        white ones.
+        '''
+        self.__sync()
+        black = self.__threatWindows[BoardState.BLACK.value]
+        white = self.__threatWindows[BoardState.WHITE.value]
+        loc_pat_sco = {'white': [], 'black': []}
+        attackOrDefense = 0
+        lastLine = -1
+        for number in sorted(black | white):
+            (line, length, cells, locations, scored, axis,
+             reversedLine) = self.__windows[number]
+            if length == 5:
+                (white_patterns, black_patterns) = (WHITE_5PATTERNS,
+                        BLACK_5PATTERNS)
+                entry = PATTERN5_TABLE[self.__codes[number]]
+            else:
+                (white_patterns, black_patterns) = (WHITE_6PATTERNS,
+                        BLACK_6PATTERNS)
+                entry = PATTERN6_TABLE[self.__codes[number]]
+            if number in black:
+                loc_pat_sco['black'].append((list(locations),
+                        black_patterns[entry[2]], entry[1]))
+            else:
+                loc_pat_sco['white'].append((list(locations),
+                        white_patterns[entry[2]], entry[0]))
+
+            # black matches of a line come before its white ones
+            if line != lastLine:
+                lastLine = line
+                attackOrDefense = 1 if number in black else 2
+            elif number in white:
+                attackOrDefense = 2
+        return attackOrDefense, loc_pat_sco
@@ -0,0 +1,290 @@
+import time
+from boardstate import *
+from gomoku import zobrist_keys
+
+class NodeBudgetExceeded(Exception):
+    '''
+    Raised inside the search when the node budget or the time runs
+    out.
+    '''
+    pass
+
+
+def _run(codes):
+    '''
+    Length of the row of own stones through the centre of codes.
+    '''
+    count = 1
+    p = 3
+    while p >= 0 and codes[p] == 1:
+        count += 1
+        p -= 1
+    p = 5
+    while p < 9 and codes[p] == 1:
+        count += 1
+        p += 1
+    return count
+
+def _five_points(codes):
+    '''
+    Offsets of the empty cells of codes that make five through the
+    centre.
+    '''
+    points = []
+    for p in range(9):
+        if codes[p] == 0:
+            codes[p] = 1
+            if _run(codes) >= 5:
+                points.append(p)
+            codes[p] = 0
+    return points
+
+
+class ThreatSpaceSearch(object):
+    '''
+    Threat-space search: looks for a forced win made only of forcing
+    moves. In VCF (victory by continuous fours) every attacking move
+    is a four the defender must block; VCT (victory by continuous
+    threats) also allows open threes, answered by every cell that
+    stops the three or by a four of the defender. Searches a copy of
+    the board and stops after node_budget moves, or at the deadline a
+    search is given.
+    '''
+
+    def __init__(self, gomoku, node_budget=5000):
+        self.__gomoku = gomoku
+        self.__nodeBudget = node_budget
+
+        # the cells two steps around every cell, and the nine cells
+        # centred on it along each axis (-1 off the board)
+        geometry = gomoku.get_geometry()
+        self.__size = geometry.size
+        self.__zobrist = zobrist_keys(geometry.size)
+        self.__neighbors = geometry.neighbors
+        self.__probes = geometry.probes
+        self.__nodes = 0
+
+    def get_nodes(self):
+        '''
+        Moves played by the last search.
+        '''
+        return self.__nodes
+
+    def vcf(
+        self,
+        state,
+        max_depth=15,
+        deadline=None,
+        ):
+        '''
+        Return the winning line of fours for state to move, as a list
+        of (i, j) from state's first move to the five, or None. The
+        search gives up at deadline, a time.time() value.
+        '''
+        self.__start(deadline)
+        return self.__solve(state, max_depth, False)
+
+    def vct(
+        self,
+        state,
+        max_depth=5,
+        deadline=None,
+        ):
+        '''
+        Like vcf, with open threes among the attacking moves.
+        '''
+        self.__start(deadline)
+        return self.__solve(state, max_depth, True)
+
+    def solve(
+        self,
+        state,
+        vcf_depth=15,
+        vct_depth=5,
+        deadline=None,
+        ):
+        '''
+        Try vcf, then vct, sharing one node budget and deadline.
+        '''
+        self.__start(deadline)
+        line = self.__solve(state, vcf_depth, False)
+        if line is None:
+            line = self.__solve(state, vct_depth, True)
+        return line
+
+    def __start(self, deadline):
+        self.__nodes = 0
+        self.__deadline = deadline
+        self.__board = bytearray(self.__gomoku.get_board())
+        self.__hash = self.__gomoku.get_hash()
+
+        # stones within two steps of each cell, every four or three
+        # has a stone of its own that close
+
+        self.__near = [0] * len(self.__board)
+        for k in range(len(self.__board)):
+            if self.__board[k]:
+                for n in self.__neighbors[k]:
+                    self.__near[n] += 1
+
+    def __solve(self, state, max_depth, vct):
+        self.__failed = {}
+        try:
+            line = self.__attack(state.value, max_depth, vct)
+        except NodeBudgetExceeded:
+            return None
+        if line is None:
+            return None
+        return [divmod(k, self.__size) for k in line]
+
+    def __play(self, k, color):
+        self.__nodes += 1
+        if self.__nodes > self.__nodeBudget:
+            raise NodeBudgetExceeded()
+        self.__board[k] = color
+        self.__hash ^= self.__zobrist[k][color]
+        for n in self.__neighbors[k]:
+            self.__near[n] += 1
+
+    def __undo(self, k):
+        self.__hash ^= self.__zobrist[k][self.__board[k]]
+        self.__board[k] = 0
+        for n in self.__neighbors[k]:
+            self.__near[n] -= 1
+
+    def __candidates(self):
+        board = self.__board
+        near = self.__near
+        return [k for k in range(len(board)) if near[k] and not board[k]]
+
+    def __codes(self, probe, color):
+
+        # 1 own stone, 0 empty, 2 opponent stone or off the board;
+        # the centre is taken as an own stone
+
+        board = self.__board
+        codes = [2] * 9
+        for p in range(9):
+            cell = probe[p]
+            if cell >= 0:
+                value = board[cell]
+                if value == color:
+                    codes[p] = 1
+                elif value == 0:
+                    codes[p] = 0
+        codes[4] = 1
+        return codes
+
+    def __threat(self, k, color, threes):
+        '''
+        What playing k makes for color: (five, cells that would then
+        make five, cells that stop the open threes it makes).
+        '''
+        fivePoints = []
+        defenses = []
+        for probe in self.__probes[k]:
+            codes = self.__codes(probe, color)
+            own = codes.count(1)
+            if own < 3:
+                continue
+            if _run(codes) >= 5:
+                return (True, [], [])
+            points = _five_points(codes)
+            if points:
+                fivePoints += [probe[p] for p in points]
+                continue
+            if not threes:
+                continue
+
+            # an open three: some empty cell of the axis turns it
+            # into a four with two ways to make five
+
+            stops = []
+            for p in range(1, 8):
+                if codes[p] == 0:
+                    codes[p] = 1
+                    points = _five_points(codes)
+                    codes[p] = 0
+                    if len(points) >= 2:
+                        stops.append(probe[p])
+                        stops += [probe[q] for q in points]
+            defenses += stops
+        return (False, fivePoints, defenses)
+
+    def __makes_five(self, k, color):
+        for probe in self.__probes[k]:
+            if _run(self.__codes(probe, color)) >= 5:
+                return True
+        return False
+
+    def __attack(self, color, depth, vct):
+        '''
+        Winning line for color to move, as flat cells, or None.
+        '''
+        # every call scans all the candidates, time is checked as often
+        if self.__deadline is not None and time.time() > self.__deadline:
+            raise NodeBudgetExceeded()
+
+        opponent = 3 - color
+        candidates = self.__candidates()
+
+        fours = []
+        threes = []
+        blocks = []
+        for k in candidates:
+            (five, fivePoints, defenses) = self.__threat(k, color, vct)
+            if five:
+                return [k]
+            if fivePoints:
+                fours.append((-len(set(fivePoints)), k, fivePoints))
+            elif defenses:
+                threes.append((k, defenses))
+            if self.__makes_five(k, opponent):
+                blocks.append(k)
+
+        # an opponent four must be blocked first, two cannot be
+
+        if len(blocks) > 1:
+            return None
+        if depth == 0:
+            return None
+        key = (self.__hash, color)
+        if self.__failed.get(key, -1) >= depth:
+            return None
+
+        fours.sort()
+        moves = [(k, fivePoints, None) for (order, k, fivePoints) in
+                 fours]
+        moves += [(k, None, defenses) for (k, defenses) in threes]
+        if blocks:
+            moves = [move for move in moves if move[0] == blocks[0]]
+
+        for (k, fivePoints, defenses) in moves:
+            self.__play(k, color)
+            if fivePoints is not None:
+                replies = sorted(set(fivePoints))
+            else:
+                replies = set(defenses)
+                for reply in self.__candidates():
+                    if self.__threat(reply, opponent, False)[1]:
+                        replies.add(reply)
+                replies = sorted(replies)
+
+            # every reply must lose, the longest defence is the line
+
+            line = None
+            for reply in replies:
+                self.__play(reply, opponent)
+                subline = self.__attack(color, depth - 1, vct)
+                self.__undo(reply)
+                if subline is None:
+                    line = None
+                    break
+                if line is None or len(subline) + 1 > len(line):
+                    line = [reply] + subline
+            self.__undo(k)
+            if line is not None:
+                return [k] + line
+
+        self.__failed[key] = depth
+        return None
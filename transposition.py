@@ -0,0 +1,63 @@
+#bound types of a stored score
+EXACT = 0
+LOWER = 1  # the real score is at least the stored one
+UPPER = 2  # the real score is at most the stored one
+
+
+class TranspositionTable(object):
+    '''
+    Fixed-size table of search results keyed by position hash. Every
+    slot holds one entry:
+    (key, depth, score, bound, best move, age, steps, loc_pat_sco).
+    A slot is given to a new entry when it is empty, holds the same
+    position, comes from an older search, or was searched less deep.
+    '''
+
+    def __init__(self, size=1 << 16):
+
+        # round down to a power of two so a mask picks the slot
+
+        self.__size = 1
+        while self.__size * 2 <= size:
+            self.__size *= 2
+        self.__mask = self.__size - 1
+        self.__slots = [None] * self.__size
+        self.__age = 0
+
+    def get_size(self):
+        return self.__size
+
+    def new_search(self):
+        '''
+        Start a new search, older entries become first to be replaced.
+        '''
+        self.__age += 1
+
+    def clear(self):
+        self.__slots = [None] * self.__size
+
+    def probe(self, key):
+        '''
+        Return the entry stored for key, or None.
+        '''
+        entry = self.__slots[key & self.__mask]
+        if entry is not None and entry[0] == key:
+            return entry
+        return None
+
+    def store(
+        self,
+        key,
+        depth,
+        score,
+        bound,
+        move,
+        steps=None,
+        loc_pat_sco=None,
+        ):
+        slot = key & self.__mask
+        entry = self.__slots[slot]
+        if entry is None or entry[0] == key or entry[5] != self.__age \
+            or depth >= entry[1]:
+            self.__slots[slot] = (key, depth, score, bound, move,
+                                  self.__age, steps, loc_pat_sco)
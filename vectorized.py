@@ -0,0 +1,214 @@
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:  # numpy is only needed for the vectorized mode
+    np = None
+
+from boardstate import *
+from evaluate import *
+from geometry import geometry
+
+
+class VectorizedEvaluator(object):
+    '''
+    Whole-board pattern scoring with NumPy. Every 5 and 6 cell window
+    of every line is gathered at once and looked up in the pattern
+    tables in one batch, giving the same totals and pattern matches
+    as gomokuAI.evaluate and gomokuAI.threat_evaluate. board is the
+    Geometry of the boards scored, 15 * 15 by default, and tables the
+    (5 cell table, 6 cell table) evaluate scores with, as
+    evaluate.pattern_tables returns them.
+    '''
+
+    def __init__(self, board=None, tables=None):
+        if np is None:
+            raise ImportError('the vectorized evaluator needs numpy')
+        if board is None:
+            board = geometry(N)
+
+        size = board.size
+        self.__cellCount = size * size
+        self.__lines = board.line_locations
+        lengths = np.array([len(line) for line in self.__lines])
+
+        # every line padded to size cells with index size * size, a
+        # cell past the end of the board that always reads as empty
+
+        index = np.full((len(self.__lines), size), size * size,
+                        dtype=np.intp)
+        for (number, line) in enumerate(self.__lines):
+            index[number, :len(line)] = [i * size + j for (i, j) in line]
+
+        # the windows evaluate_vector scores: the whole line for a line
+        # of five, otherwise every window except the last one
+
+        starts5 = np.arange(size - 4)[np.newaxis, :]
+        starts6 = np.arange(size - 5)[np.newaxis, :]
+        lengths = lengths[:, np.newaxis]
+        valid5 = (lengths != 5) & (starts5 < lengths - 5) \
+            | (lengths == 5) & (starts5 == 0)
+        valid6 = (lengths != 5) & (starts6 < lengths - 6)
+
+        self.__windows5 = sliding_window_view(index, 5, axis=1)[valid5]
+        self.__windows6 = sliding_window_view(index, 6, axis=1)[valid6]
+        (self.__line5, self.__start5) = np.nonzero(valid5)
+        (self.__line6, self.__start6) = np.nonzero(valid6)
+
+        self.__powers5 = 3 ** np.arange(4, -1, -1)
+        self.__powers6 = 3 ** np.arange(5, -1, -1)
+        # evaluate scores with tables, threat_evaluate finds fours and
+        # open threes by the default scores as ThreatIndex does
+        self.__threatLookup = self.__lookup(PATTERN5_TABLE, PATTERN6_TABLE)
+        if tables is None:
+            self.__scoreLookup = self.__threatLookup
+        else:
+            self.__scoreLookup = self.__lookup(*tables)
+
+        self.__cells = np.zeros(size * size + 1, dtype=np.int64)
+
+    @staticmethod
+    def __lookup(table5, table6):
+        '''
+        Return the (white, black, pattern) arrays of table5 and table6.
+        '''
+        return tuple(np.array(column, dtype=np.int64) for table in
+                     (table5, table6) for column in zip(*table))
+
+    def __window_scores(self, board):
+        cells = self.__cells
+        cells[:self.__cellCount] = np.frombuffer(bytes(board), dtype=np.uint8)
+        codes5 = cells[self.__windows5] @ self.__powers5
+        codes6 = cells[self.__windows6] @ self.__powers6
+        return codes5, codes6
+
+    def totals(self, board):
+        '''
+        Return (white score, black score) summed over the board.
+        '''
+        (codes5, codes6) = self.__window_scores(board)
+        (white5, black5, pattern5, white6, black6, pattern6) = \
+            self.__scoreLookup
+        white = int(white5[codes5].sum() + white6[codes6].sum())
+        black = int(black5[codes5].sum() + black6[codes6].sum())
+        return white, black
+
+    def batch_totals(self, boards):
+        '''
+        Score many boards at once. boards is a (count, cells) array of
+        cell values, the result two arrays of white and black totals.
+        '''
+        boards = np.asarray(boards, dtype=np.int64)
+        cells = np.zeros((boards.shape[0], self.__cellCount + 1),
+                         dtype=np.int64)
+        cells[:, :self.__cellCount] = boards
+        codes5 = cells[:, self.__windows5] @ self.__powers5
+        codes6 = cells[:, self.__windows6] @ self.__powers6
+        (white5, black5, pattern5, white6, black6, pattern6) = \
+            self.__scoreLookup
+        white = white5[codes5].sum(axis=1) + white6[codes6].sum(axis=1)
+        black = black5[codes5].sum(axis=1) + black6[codes6].sum(axis=1)
+        return white, black
+
+    def __matches(self, board, lookup):
+        '''
+        Return per line white and black totals, and the matching
+        windows as (line, length, start, white, black, pattern) in the
+        order evaluate_vector_addLoc lists them, scored with lookup.
+        '''
+        (codes5, codes6) = self.__window_scores(board)
+        count = len(self.__lines)
+        white5 = lookup[0][codes5]
+        black5 = lookup[1][codes5]
+        pattern5 = lookup[2][codes5]
+        white6 = lookup[3][codes6]
+        black6 = lookup[4][codes6]
+        pattern6 = lookup[5][codes6]
+
+        line_white = np.bincount(self.__line5, white5, count) \
+            + np.bincount(self.__line6, white6, count)
+        line_black = np.bincount(self.__line5, black5, count) \
+            + np.bincount(self.__line6, black6, count)
+
+        matches = []
+        for k in np.nonzero(pattern5 >= 0)[0]:
+            matches.append((self.__line5[k], 5, self.__start5[k],
+                           white5[k], black5[k], pattern5[k]))
+        for k in np.nonzero(pattern6 >= 0)[0]:
+            matches.append((self.__line6[k], 6, self.__start6[k],
+                           white6[k], black6[k], pattern6[k]))
+        matches.sort(key=lambda match: (match[0], match[1], match[2]))
+        return line_white, line_black, matches
+
+    def __records(self, match):
+        (line, length, start, white, black, pattern) = match
+        loc_vec = self.__lines[line]
+        if len(loc_vec) == 5:
+            loc_temp = list(loc_vec)
+        else:
+            loc_temp = loc_vec[start:start + length]
+        if length == 5:
+            (white_patterns, black_patterns) = (WHITE_5PATTERNS,
+                    BLACK_5PATTERNS)
+        else:
+            (white_patterns, black_patterns) = (WHITE_6PATTERNS,
+                    BLACK_6PATTERNS)
+        white_record = None
+        black_record = None
+        if white:
+            white_record = (loc_temp, white_patterns[pattern], int(white))
+        if black:
+            black_record = (loc_temp, black_patterns[pattern], int(black))
+        return white_record, black_record
+
+    def evaluate(self, board, state):
+        '''
+        Same result as gomokuAI.evaluate, state being the player to move.
+        '''
+        (line_white, line_black, matches) = self.__matches(board,
+                self.__scoreLookup)
+        loc_pat_sco = {'white': [], 'black': []}
+        for match in matches:
+            (white_record, black_record) = self.__records(match)
+            line = match[0]
+            if line_black[line] != 0:
+                if black_record is not None:
+                    loc_pat_sco['black'].append(black_record)
+            elif line_white[line] != 0:
+                if white_record is not None:
+                    loc_pat_sco['white'].append(white_record)
+
+        white = int(line_white.sum())
+        black = int(line_black.sum())
+        if state == BoardState.WHITE:
+            board_score = black - white
+        else:
+            board_score = white - black
+        return board_score, loc_pat_sco
+
+    def threat_evaluate(self, board):
+        '''
+        Same result as gomokuAI.threat_evaluate.
+        '''
+        (line_white, line_black, matches) = self.__matches(board,
+                self.__threatLookup)
+        loc_pat_sco = {'white': [], 'black': []}
+        attackOrDefense = 0
+
+        # per line every black threat comes before every white one
+
+        by_line = {}
+        for match in matches:
+            by_line.setdefault(match[0], []).append(match)
+        for line in sorted(by_line):
+            records = [self.__records(match) for match in by_line[line]]
+            for (white_record, black_record) in records:
+                if black_record is not None and black_record[2] in (5000,
+                        500):
+                    loc_pat_sco['black'].append(black_record)
+                    attackOrDefense = 1
+            for (white_record, black_record) in records:
+                if white_record is not None and white_record[2] in (5000,
+                        500):
+                    loc_pat_sco['white'].append(white_record)
+                    attackOrDefense = 2
+        return attackOrDefense, loc_pat_sco